@@ -5,10 +5,12 @@ from flask_jwt_extended import JWTManager
 
 from backend.config import Config
 from backend.extensions import db
+from backend.services.json_provider import init_json_provider
 
 # App initialisieren
 app = Flask(__name__)
 app.config.from_object(Config)
+init_json_provider(app)
 CORS(app,
      resources={r"/api/*": {"origins": "http://localhost:3000"}},
      supports_credentials=True,
@@ -33,12 +35,27 @@ app.register_blueprint(form_builder_bp)
 from backend.routes.import_routes import import_bp
 app.register_blueprint(import_bp)
 
+from backend.services.import_jobs import init_import_jobs
+init_import_jobs(app)
+
 from backend.routes.auth_routes import auth_bp
 app.register_blueprint(auth_bp)
 
 from backend.routes.protected_routes import protected_bp
 app.register_blueprint(protected_bp)
 
+from backend.routes.export_routes import export_bp
+app.register_blueprint(export_bp)
+
+from backend.routes.logic_routes import logic_bp
+app.register_blueprint(logic_bp)
+
+from backend.routes.diff_routes import diff_bp
+app.register_blueprint(diff_bp)
+
+from backend.routes.monitoring_routes import monitoring_bp
+app.register_blueprint(monitoring_bp)
+
 # Test-Route
 @app.route("/api/hello")
 def hello():
@@ -0,0 +1,166 @@
+"""
+Microbenchmark for /api/form-builder/data: ORM objects + hand-built dicts +
+stdlib JSON (the old implementation) against the row serializers + orjson.
+
+    python -m backend.benchmarks.form_builder_bench --questions 20000 --repeat 5
+
+Runs against a throw-away SQLite database unless --database-url is given.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=20000)
+    parser.add_argument("--sections", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default=None)
+    return parser.parse_args()
+
+
+def legacy_builder_data(Form, Section, Question):
+    forms = Form.query.all()
+    sections = Section.query.all()
+    questions = Question.query.all()
+    return {
+        "forms": [
+            {"id": f.id, "name": f.name, "description": f.description, "created_at": f.created_at.isoformat()}
+            for f in forms
+        ],
+        "sections": [
+            {"id": s.id, "title": s.title, "order": s.order, "form_id": s.form_id}
+            for s in sections
+        ],
+        "questions": [
+            {
+                "id": q.id,
+                "variable_name": q.variable_name,
+                "label": q.label,
+                "field_type": q.field_type,
+                "choices": q.choices,
+                "required": q.required,
+                "dependencies": q.dependencies,
+                "section_id": q.section_id,
+                "validation_type": q.validation_type,
+                "validation_min": q.validation_min,
+                "validation_max": q.validation_max,
+                "identifier": q.identifier,
+                "branching_logic": q.branching_logic,
+                "field_annotation": q.field_annotation,
+                "field_note": q.field_note,
+                "custom_alignment": q.custom_alignment,
+                "question_number": q.question_number,
+                "matrix_group_name": q.matrix_group_name,
+                "matrix_ranking": q.matrix_ranking
+            } for q in questions
+        ]
+    }
+
+
+def seed(db, Form, Section, Question, question_count, section_count):
+    from sqlalchemy import insert
+
+    form = Form(name="Benchmark", description="form_builder_bench")
+    db.session.add(form)
+    db.session.flush()
+    sections = [Section(title=f"Section {i}", order=i, form_id=form.id) for i in range(section_count)]
+    db.session.add_all(sections)
+    db.session.flush()
+
+    rows = [
+        {
+            "variable_name": f"bench_{i}",
+            "label": f"Benchmark question {i}",
+            "field_type": "radio",
+            "choices": {"1": "Yes", "0": "No"},
+            "required": bool(i % 2),
+            "validation_type": "integer",
+            "validation_min": "0",
+            "validation_max": "100",
+            "branching_logic": f"[bench_{i - 1}] = '1'" if i else "",
+            "field_note": "note",
+            "version": "1.0",
+            "version_major": 1,
+            "version_minor": 0,
+            "section_id": sections[i % section_count].id,
+        }
+        for i in range(question_count)
+    ]
+    db.session.execute(insert(Question), rows)
+    db.session.commit()
+
+
+def measure(label, fn, repeat, rows):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{label:<38} best {best * 1000:8.1f} ms  median {statistics.median(timings) * 1000:8.1f} ms  "
+          f"{rows / best:12,.0f} rows/s")
+    return best
+
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="form_builder_bench_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    from flask.json.provider import DefaultJSONProvider
+    from backend.app import app
+    from backend.extensions import db
+    from backend.dbmodels.form_models import Form, Section, Question
+    from backend.services.json_provider import ORJSONProvider, orjson
+    from backend.services.serializers import FORM, QUESTION_FLAT, SECTION
+
+    with app.app_context():
+        db.create_all()
+        if not args.database_url:
+            seed(db, Form, Section, Question, args.questions, args.sections)
+        rows = db.session.query(Question.id).count()
+        print(f"{rows:,} questions, best of {args.repeat} runs\n")
+
+        stdlib = DefaultJSONProvider(app)
+        fast = ORJSONProvider(app) if orjson is not None else None
+
+        def rows_payload():
+            return {
+                "forms": FORM.all(FORM.select()),
+                "sections": SECTION.all(SECTION.select()),
+                "questions": QUESTION_FLAT.all(QUESTION_FLAT.select())
+            }
+
+        def run(build, provider):
+            def fn():
+                db.session.expunge_all()
+                provider.dumps(build())
+            return fn
+
+        baseline = measure("ORM objects + stdlib json", run(
+            lambda: legacy_builder_data(Form, Section, Question), stdlib), args.repeat, rows)
+        serializers = measure("row serializers + stdlib json", run(rows_payload, stdlib), args.repeat, rows)
+        results = [serializers]
+        if fast is not None:
+            results.append(measure("row serializers + orjson", run(rows_payload, fast), args.repeat, rows))
+        else:
+            print("orjson not installed, skipping")
+
+        print(f"\nspeed-up: {baseline / min(results):.1f}x")
+
+        payload = rows_payload()
+        measure("  encode only: stdlib json", lambda: stdlib.dumps(payload), args.repeat, rows)
+        if fast is not None:
+            measure("  encode only: orjson", lambda: fast.dumps(payload), args.repeat, rows)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
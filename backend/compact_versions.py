@@ -0,0 +1,48 @@
+"""
+Delta-encodes existing question version histories.
+
+Versions written before delta storage are full copies. This keeps a full
+snapshot every N versions (VERSION_SNAPSHOT_INTERVAL) and stores only the
+changed columns in between; the newest version of every question stays
+full. Safe to run repeatedly, already encoded versions are skipped.
+Shared question contents no question refers to any more (left over by
+deleted forms) are removed as well.
+
+    python -m backend.compact_versions [--interval N] [--batch-size N]
+"""
+import argparse
+import sys
+import time
+
+from backend.app import app
+from backend.extensions import db
+from backend.services.content_hash import prune_question_contents
+from backend.services.version_storage import compact_question_versions, storage_stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interval", type=int, default=None,
+                        help="versions per snapshot (default: VERSION_SNAPSHOT_INTERVAL)")
+    parser.add_argument("--batch-size", type=int, default=200, help="version groups per transaction")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with app.app_context():
+        before = storage_stats()
+        start = time.perf_counter()
+        groups, encoded = compact_question_versions(interval=args.interval, batch_size=args.batch_size)
+        pruned = prune_question_contents()
+        db.session.commit()
+        after = storage_stats()
+        print(f"🗜️ {groups:,} Versionsgruppen geprüft, {encoded:,} Versionen als Delta gespeichert "
+              f"({time.perf_counter() - start:.1f} s)")
+        print(f"   vorher: {before['full']:,} vollständig / {before['delta']:,} Delta, "
+              f"nachher: {after['full']:,} vollständig / {after['delta']:,} Delta")
+        print(f"   {after['shared']:,} Versionen mit geteiltem Inhalt, {pruned:,} verwaiste Inhalte entfernt")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,117 @@
 import os
+import tempfile
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 
 load_dotenv()
 
+
+def engine_options(url):
+    """
+    create_engine() options for `url` from the DB_* environment variables.
+    Pool sizing only applies to pooled engines (in-memory SQLite uses a
+    StaticPool); the statement timeout is set per connection on PostgreSQL,
+    SQLite connections wait up to DB_SQLITE_BUSY_TIMEOUT seconds for the
+    write lock.
+    """
+    if not url:
+        return {}
+    parsed = make_url(url)
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+    }
+    if not (parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")):
+        options["pool_size"] = int(os.getenv("DB_POOL_SIZE", 5))
+        options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", 10))
+        options["pool_timeout"] = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+    if parsed.get_backend_name() == "postgresql" and statement_timeout:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    if parsed.get_backend_name() == "sqlite":
+        options["connect_args"] = {"timeout": float(os.getenv("DB_SQLITE_BUSY_TIMEOUT", 30))}
+    return options
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Verbindungspool: Größe, Overflow, Recycle (s), Pre-Ping; Statement-Timeout in ms (0 = aus, nur PostgreSQL)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Optionales Lese-Replikat: GET-Katalog-Endpunkte (@replica_read) lesen dort, Schreibzugriffe bleiben auf dem Primary
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = (
+        {"replica": {"url": DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)}}
+        if DATABASE_REPLICA_URL else {}
+    )
     SECRET_KEY = os.getenv("SECRET_KEY")
 
     JWT_SECRET_KEY = "super-secret-jwt-key"
     JWT_TOKEN_LOCATION = ["headers"]
     JWT_HEADER_NAME = "Authorization"
     JWT_HEADER_TYPE = "Bearer"
+
+    # Import: Anzahl Fragen pro INSERT-Batch, COPY nur auf PostgreSQL
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 64 * 1024))
+    # Rohzeilen für ImportedCSV.content: ab dieser Größe (Zeichen) in eine temporäre Datei ausgelagert
+    IMPORT_CONTENT_SPOOL_SIZE = int(os.getenv("IMPORT_CONTENT_SPOOL_SIZE", 4 * 1024 * 1024))
+    IMPORT_USE_COPY = os.getenv("IMPORT_USE_COPY", "true").lower() in ("1", "true", "yes")
+    # Inhalte importierter Fragen je content_hash nur einmal speichern (question_contents)
+    IMPORT_SHARED_CONTENT = os.getenv("IMPORT_SHARED_CONTENT", "true").lower() in ("1", "true", "yes")
+
+    # Sammel-Import (/api/import-batch): Parser-Prozesse (0 = alle Kerne), darunter wird im Request-Prozess geparst
+    IMPORT_PARSE_WORKERS = int(os.getenv("IMPORT_PARSE_WORKERS", 0))
+    IMPORT_PARSE_INLINE_BYTES = int(os.getenv("IMPORT_PARSE_INLINE_BYTES", 1024 * 1024))
+    IMPORT_ARCHIVE_MAX_FILES = int(os.getenv("IMPORT_ARCHIVE_MAX_FILES", 200))
+    IMPORT_ARCHIVE_MAX_BYTES = int(os.getenv("IMPORT_ARCHIVE_MAX_BYTES", 200 * 1024 * 1024))
+
+    # Hintergrund-Importe (/api/import-jobs): Worker-Threads, Ablage der Uploads, Fortschritts-Intervall in Sekunden
+    IMPORT_JOB_WORKERS = int(os.getenv("IMPORT_JOB_WORKERS", 2))
+    IMPORT_JOB_DIR = os.getenv("IMPORT_JOB_DIR", os.path.join(tempfile.gettempdir(), "redcap_import_jobs"))
+    IMPORT_JOB_PROGRESS_INTERVAL = float(os.getenv("IMPORT_JOB_PROGRESS_INTERVAL", 1.0))
+    IMPORT_JOB_KEEP_FILES = os.getenv("IMPORT_JOB_KEEP_FILES", "false").lower() in ("1", "true", "yes")
+    # Beim ersten Request: liegengebliebene Jobs früherer Prozesse wieder einreihen bzw. als fehlgeschlagen markieren
+    IMPORT_JOB_RECOVER = os.getenv("IMPORT_JOB_RECOVER", "true").lower() in ("1", "true", "yes")
+
+    # Keyset-Pagination der Listen-Endpunkte (?limit=&cursor=)
+    PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 100))
+    PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 1000))
+
+    # Neuversuche, falls zwei Bearbeitungen gleichzeitig dieselbe Versionsnummer vergeben
+    VERSION_ALLOCATION_RETRIES = int(os.getenv("VERSION_ALLOCATION_RETRIES", 10))
+
+    # Versionsspeicherung: alle N Versionen ein vollständiger Snapshot, dazwischen nur die geänderten Spalten (1 = immer vollständig)
+    VERSION_SNAPSHOT_INTERVAL = int(os.getenv("VERSION_SNAPSHOT_INTERVAL", 10))
+
+    # ZIP-Export mehrerer Formulare: Worker-Threads, Obergrenze je Archiv, ab dieser Größe (Bytes) wird eine CSV auf Platte zwischengespeichert
+    EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 4))
+    EXPORT_ZIP_MAX_FORMS = int(os.getenv("EXPORT_ZIP_MAX_FORMS", 500))
+    EXPORT_SPOOL_SIZE = int(os.getenv("EXPORT_SPOOL_SIZE", 4 * 1024 * 1024))
+
+    # Antwort-Cache der Katalog-Endpunkte (ETag / If-None-Match)
+    CACHE_GENERATION_TTL = float(os.getenv("CACHE_GENERATION_TTL", 1.0))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 256))
+
+    # Schnellerer JSON-Encoder (orjson), falls installiert
+    JSON_USE_ORJSON = os.getenv("JSON_USE_ORJSON", "true").lower() in ("1", "true", "yes")
+
+    # Volltextsuche im Fragenkatalog: PostgreSQL-Textsuchkonfiguration und Seitengröße
+    SEARCH_TEXT_CONFIG = os.getenv("SEARCH_TEXT_CONFIG", "simple")
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", 20))
+
+    # Duplikaterkennung (MinHash/LSH): Signaturlänge, Anzahl Bänder, Mindestähnlichkeit
+    SIMILARITY_NUM_PERM = int(os.getenv("SIMILARITY_NUM_PERM", 64))
+    SIMILARITY_BANDS = int(os.getenv("SIMILARITY_BANDS", 16))
+    SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", 0.5))
+    SIMILARITY_MAX_CANDIDATES = int(os.getenv("SIMILARITY_MAX_CANDIDATES", 200))
+
+    # Auswertung der Branching Logic: maximale Anzahl Testdatensätze je Anfrage
+    BRANCHING_LOGIC_MAX_RECORDS = int(os.getenv("BRANCHING_LOGIC_MAX_RECORDS", 50000))
+
+    # Prüfung von Record-Exporten gegen ein Formular: Zeilen je spaltenweise geprüftem Batch
+    VALIDATION_BATCH_SIZE = int(os.getenv("VALIDATION_BATCH_SIZE", 5000))
+
+    # Diff zweier Dictionaries/Formularstände: Anzahl gecachter Ergebnisse (Schlüssel: Paar der Inhalts-Hashes)
+    DIFF_CACHE_SIZE = int(os.getenv("DIFF_CACHE_SIZE", 128))
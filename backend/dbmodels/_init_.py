@@ -2,3 +2,7 @@ from .user import *
 from .form_models import *
 from .imported_csv import *
 from .custom_form import *
+from .data_generation import *
+from .question_similarity import *
+from .import_job import *
+from .variable_reference import *
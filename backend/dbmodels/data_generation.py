@@ -0,0 +1,9 @@
+from backend.extensions import db
+
+
+# Einzeiliger Zähler, den jeder Schreibpfad erhöht – gecachte Katalog-Antworten hängen daran
+class DataGeneration(db.Model):
+    __tablename__ = "data_generation"
+
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
@@ -1,6 +1,10 @@
 from backend.extensions import db
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import JSON, TSVECTOR
+from sqlalchemy.orm import validates
 from datetime import datetime
+import hashlib
+import json
 
 class Form(db.Model):
     __tablename__ = "forms"
@@ -34,15 +38,89 @@ class Section(db.Model):
     )
 
 
+def parse_version(version):
+    """Splits a version string like "1.10" into (major, minor) integers."""
+    try:
+        major, _, minor = str(version).partition(".")
+        return int(major), int(minor or 0)
+    except (TypeError, ValueError):
+        return None, None
+
+
+# Inhaltliche Felder einer Frage (ohne Variablenname, Section und Versionsdaten)
+QUESTION_CONTENT_FIELDS = (
+    "label", "field_type", "choices", "required", "dependencies",
+    "validation_type", "validation_min", "validation_max", "identifier",
+    "branching_logic", "field_annotation", "field_note", "custom_alignment",
+    "question_number", "matrix_group_name", "matrix_ranking",
+)
+_BOOLEAN_CONTENT_FIELDS = ("required", "matrix_ranking")
+
+
+def question_content_hash(values):
+    """
+    Canonical SHA-256 of a question's content, from a dict of column values
+    or a Question. Empty strings and NULL hash differently, so payloads that
+    share a hash (question_contents) store exactly the same values.
+    """
+    get = values.get if isinstance(values, dict) else lambda name: getattr(values, name, None)
+    payload = {}
+    for name in QUESTION_CONTENT_FIELDS:
+        value = get(name)
+        if name in _BOOLEAN_CONTENT_FIELDS:
+            value = bool(value)
+        payload[name] = value
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QuestionContent(db.Model):
+    """
+    Content of imported questions, stored once per distinct payload
+    (content_hash) and shared by every question row with that payload.
+    """
+    __tablename__ = "question_contents"
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False, unique=True)
+    label = db.Column(db.Text, nullable=True)
+    field_type = db.Column(db.String(50), nullable=True)
+    choices = db.Column(JSON(none_as_null=True), nullable=True)
+    required = db.Column(db.Boolean, nullable=True)
+    dependencies = db.Column(JSON(none_as_null=True), nullable=True)
+    validation_type = db.Column(db.String(100), nullable=True)
+    validation_min = db.Column(db.String(100), nullable=True)
+    validation_max = db.Column(db.String(100), nullable=True)
+    identifier = db.Column(db.String(100), nullable=True)
+    branching_logic = db.Column(db.String(255), nullable=True)
+    field_annotation = db.Column(db.String(255), nullable=True)
+    field_note = db.Column(db.Text, nullable=True)
+    custom_alignment = db.Column(db.String(50), nullable=True)
+    question_number = db.Column(db.String(50), nullable=True)
+    matrix_group_name = db.Column(db.String(100), nullable=True)
+    matrix_ranking = db.Column(db.Boolean, nullable=True)
+
+
 class Question(db.Model):
     __tablename__ = "questions"
+    __table_args__ = (
+        # Eindeutige Versionen je (Section, Variable); dient zugleich als Index für die neueste Version
+        db.UniqueConstraint("section_id", "variable_name", "version_major", "version_minor", name="uq_questions_version"),
+        # Kollisionsprüfung beim Import: Gleichheit und Präfix-Suche (LIKE 'name\_%')
+        db.Index("ix_questions_variable_name", "variable_name", postgresql_ops={"variable_name": "varchar_pattern_ops"}),
+        # Volltextsuche: GIN-Index über search_vector, nur auf PostgreSQL
+        db.Index("ix_questions_search_vector", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     variable_name = db.Column(db.String(255), nullable=False)
-    label = db.Column(db.Text, nullable=False)
-    field_type = db.Column(db.String(50), nullable=False)
-    choices = db.Column(JSON, nullable=True)
+    # Inhaltsspalten sind NULL-fähig: Delta-Versionen speichern NULL für alles, was sie vom Snapshot erben
+    label = db.Column(db.Text, nullable=True)
+    field_type = db.Column(db.String(50), nullable=True)
+    # none_as_null: None als SQL-NULL (nicht JSON 'null'), damit geerbte Werte per COALESCE aufgelöst werden
+    choices = db.Column(JSON(none_as_null=True), nullable=True)
     required = db.Column(db.Boolean, default=False)
-    dependencies = db.Column(JSON, nullable=True)
+    dependencies = db.Column(JSON(none_as_null=True), nullable=True)
 
     validation_type = db.Column(db.String(100), nullable=True)
     validation_min = db.Column(db.String(100), nullable=True)
@@ -58,9 +136,31 @@ class Question(db.Model):
     matrix_ranking = db.Column(db.Boolean, default=False)
 
     version = db.Column(db.String(10), default="1.0")
+    version_major = db.Column(db.Integer, default=1)
+    version_minor = db.Column(db.Integer, default=0)
     last_modified = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     modified_by = db.Column(db.String(255), nullable=True)
 
     section_id = db.Column(db.Integer, db.ForeignKey("sections.id", ondelete="CASCADE"))
     change_type = db.Column(db.String, default="changed")  # z. B. 'imported', 'created', 'fixed', 'changed'
-    change_annotation = db.Column(db.Text, nullable=True)
\ No newline at end of file
+    change_annotation = db.Column(db.Text, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
+    # Gesetzt bei Delta-Versionen: vollständiger Snapshot, gegen den nur die geänderten Spalten gespeichert sind
+    base_id = db.Column(db.Integer, db.ForeignKey("questions.id"), nullable=True, index=True)
+    # Gesetzt bei importierten Fragen: der Inhalt steht (geteilt) in question_contents, die Inhaltsspalten sind NULL
+    content_id = db.Column(db.Integer, db.ForeignKey("question_contents.id"), nullable=True, index=True)
+    # Suchtext (PostgreSQL), per Trigger gepflegt – siehe question_search.ensure_search_index; auf SQLite ungenutzt (FTS5-Tabelle)
+    search_vector = db.deferred(db.Column(TSVECTOR().with_variant(db.Text(), "sqlite"), nullable=True))
+
+    @validates("version")
+    def _sync_version_numbers(self, key, value):
+        self.version_major, self.version_minor = parse_version(value)
+        return value
+
+
+@event.listens_for(Question, "before_insert")
+@event.listens_for(Question, "before_update")
+def _set_content_hash(mapper, connection, target):
+    # Bei Delta-Versionen und geteilten Inhalten fehlen die Spalten; ihr Hash wird beim Schreiben übernommen
+    if target.base_id is None and target.content_id is None:
+        target.content_hash = question_content_hash(target)
@@ -0,0 +1,27 @@
+from backend.extensions import db
+from sqlalchemy.dialects.postgresql import JSON
+from datetime import datetime
+
+
+# Hintergrund-Import einer hochgeladenen Datei; Status wird vom Worker fortgeschrieben
+class ImportJob(db.Model):
+    __tablename__ = "import_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(1024), nullable=True)
+    file_size = db.Column(db.BigInteger, nullable=True)
+    force = db.Column(db.Boolean, default=False)
+
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    phase = db.Column(db.String(20), nullable=False, default="uploaded")  # uploaded, hashing, parsing, writing, indexing, done
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    result = db.Column(JSON, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    created_by_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    imported_csv_id = db.Column(db.Integer, db.ForeignKey("imported_csvs.id", ondelete="SET NULL"), nullable=True)
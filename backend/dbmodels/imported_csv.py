@@ -8,6 +8,12 @@ class ImportedCSV(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
     content = db.Column(JSON, nullable=False)
+    # SHA-256 der hochgeladenen Datei – erkennt erneute Uploads derselben Datei
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
+    row_count = db.Column(db.Integer, nullable=True)
+    column_count = db.Column(db.Integer, nullable=True)
+    # Vorberechnete Formular-Struktur (form → sections → questions), wird beim Import befüllt
+    structure = db.Column(JSON(none_as_null=True), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # 🔧 Nur ein Foreign Key zur User-Tabelle
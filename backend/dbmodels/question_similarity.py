@@ -0,0 +1,23 @@
+from backend.extensions import db
+from sqlalchemy.dialects.postgresql import JSON
+
+
+# MinHash-Signatur je Frage (nur die jeweils neueste Version einer Variable ist indexiert)
+class QuestionSignature(db.Model):
+    __tablename__ = "question_signatures"
+
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    signature = db.Column(JSON, nullable=False)
+
+
+# LSH-Buckets: eine Zeile je (Frage, Band); Kandidaten teilen mindestens einen Bucket
+class QuestionLSHBand(db.Model):
+    __tablename__ = "question_lsh_bands"
+    __table_args__ = (
+        db.Index("ix_question_lsh_bands_bucket", "band", "bucket"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
+    band = db.Column(db.SmallInteger, nullable=False)
+    bucket = db.Column(db.BigInteger, nullable=False)
@@ -0,0 +1,15 @@
+from backend.extensions import db
+
+
+# Rückwärtsindex: welche Frage (neueste Version) verweist in Branching Logic, Berechnung oder Action Tags auf welche Variable
+class VariableReference(db.Model):
+    __tablename__ = "variable_references"
+    __table_args__ = (
+        db.UniqueConstraint("question_id", "variable_name", "source", name="uq_variable_references"),
+        db.Index("ix_variable_references_variable_name", "variable_name"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    variable_name = db.Column(db.String(255), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
+    source = db.Column(db.String(20), nullable=False)  # 'branching_logic', 'calculation', 'annotation'
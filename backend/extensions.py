@@ -1,3 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from backend.services.db_routing import RoutingSession
+
+# Routing-Session: Lesezugriffe markierter GET-Endpunkte gehen an das optionale Lese-Replikat
+db = SQLAlchemy(session_options={"class_": RoutingSession})
@@ -1,11 +1,25 @@
 import os
 import sys
 
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+# Projektwurzel, damit das Skript auch als python backend/init_db.py läuft
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app import app
-from extensions import db
+# Über das Paket importieren: "from app import app" ergäbe eine zweite, nicht registrierte db-Instanz
+from backend.app import app
+from backend.extensions import db
+from backend.services.question_versions import backfill_version_numbers
+from backend.services.form_structure import backfill_form_structures
+from backend.services.question_search import ensure_search_index
+from backend.services.similarity import backfill_similarity_index
+from backend.services.content_hash import backfill_question_hashes
+from backend.services.variable_references import backfill_variable_references
 
 with app.app_context():
     db.create_all()
+    backfill_version_numbers()
+    backfill_form_structures()
+    ensure_search_index()
+    backfill_similarity_index()
+    backfill_question_hashes()
+    backfill_variable_references()
     print("📦 Datenbanktabellen wurden erfolgreich erstellt.")
@@ -26,10 +26,26 @@ from backend.dbmodels.user import User
 from backend.dbmodels.form_models import Form, Section, Question
 from backend.dbmodels.imported_csv import ImportedCSV
 from backend.dbmodels.custom_form import CustomForm, CustomSection, CustomQuestion
+from backend.dbmodels.data_generation import DataGeneration
+from backend.dbmodels.import_job import ImportJob
+from backend.dbmodels.question_similarity import QuestionLSHBand, QuestionSignature
+from backend.dbmodels.variable_reference import VariableReference
+from backend.services.question_search import FTS_TABLE
 
 # ❗ Ziel-Metadaten setzen – automatisch aus db
 target_metadata = db.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # FTS5-Tabelle der SQLite-Suche (samt Schattentabellen) pflegt ensure_search_index(), nicht das Modell
+    if type_ == "table" and name.startswith(FTS_TABLE):
+        return False
+    # Nur auf PostgreSQL angelegt (ddl_if), anderswo nicht als fehlend melden
+    if type_ == "index" and name == "ix_questions_search_vector":
+        return context.get_context().dialect.name == "postgresql"
+    return True
+
+
 # Alembic-Setup
 def run_migrations_offline():
     """Run migrations in 'offline' mode."""
@@ -37,6 +53,7 @@ def run_migrations_offline():
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -55,6 +72,7 @@ def run_migrations_online():
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
+            include_object=include_object,
         )
         with context.begin_transaction():
             context.run_migrations()
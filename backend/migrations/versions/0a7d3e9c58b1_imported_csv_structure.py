@@ -0,0 +1,36 @@
+"""imported csv structure
+
+Adds imported_csvs.structure, the precomputed form representation of an
+upload. Existing uploads get it from backfill_form_structures()
+(init_db.py) or on first read. Skipped if the column already exists.
+
+Revision ID: 0a7d3e9c58b1
+Revises: f1c94a2b6d05
+Create Date: 2026-10-18 13:41:19.842265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7d3e9c58b1'
+down_revision: Union[str, None] = 'f1c94a2b6d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("imported_csvs")}
+    if "structure" not in columns:
+        op.add_column("imported_csvs", sa.Column("structure", postgresql.JSON(none_as_null=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("imported_csvs") as batch_op:
+        batch_op.drop_column("structure")
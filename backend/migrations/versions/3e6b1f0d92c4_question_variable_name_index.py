@@ -0,0 +1,37 @@
+"""question variable name index
+
+Adds ix_questions_variable_name, used to resolve variable-name collisions
+on import (equality and LIKE 'name\\_%' prefix lookups; varchar_pattern_ops
+on PostgreSQL). Skipped if the index already exists.
+
+Revision ID: 3e6b1f0d92c4
+Revises: 0a7d3e9c58b1
+Create Date: 2026-10-18 13:58:02.517736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e6b1f0d92c4'
+down_revision: Union[str, None] = '0a7d3e9c58b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    indexes = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("questions")}
+    if "ix_questions_variable_name" not in indexes:
+        op.create_index(
+            "ix_questions_variable_name", "questions", ["variable_name"],
+            postgresql_ops={"variable_name": "varchar_pattern_ops"}
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_questions_variable_name", table_name="questions")
@@ -0,0 +1,126 @@
+"""question version columns
+
+Adds questions.version_major / version_minor, fills them from the version
+string and creates uq_questions_version. Databases created by db.create_all()
+with the current models already have them; the steps are skipped there.
+
+The old version allocation could give two edits of one question the same
+number. Before the constraint is created, such duplicates are renumbered:
+the oldest row keeps its number, the others get the next free minor
+versions of the same major, in id order.
+
+Revision ID: 5b2e7c41d9a3
+Revises: 
+Create Date: 2026-10-18 10:12:40.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e7c41d9a3'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _parse_version(version):
+    # wie form_models.parse_version: "1.10" -> (1, 10), Unlesbares -> (0, 0)
+    try:
+        major, _, minor = str(version).partition(".")
+        return int(major), int(minor or 0)
+    except (TypeError, ValueError):
+        return 0, 0
+
+
+def _renumber_duplicate_versions(bind, questions):
+    key = (questions.c.section_id, questions.c.variable_name, questions.c.version_major, questions.c.version_minor)
+    duplicates = bind.execute(
+        sa.select(*key)
+        .where(questions.c.section_id.is_not(None), questions.c.variable_name.is_not(None))
+        .group_by(*key)
+        .having(sa.func.count() > 1)
+    ).all()
+    renumber = (
+        questions.update()
+        .where(questions.c.id == sa.bindparam("_id"))
+        .values(version=sa.bindparam("_version"), version_minor=sa.bindparam("_minor"))
+    )
+    for section_id, variable_name, major, minor in duplicates:
+        group = (
+            questions.c.section_id == section_id,
+            questions.c.variable_name == variable_name,
+            questions.c.version_major == major,
+        )
+        ids = bind.execute(
+            sa.select(questions.c.id).where(*group, questions.c.version_minor == minor).order_by(questions.c.id)
+        ).scalars().all()
+        top = bind.execute(sa.select(sa.func.max(questions.c.version_minor)).where(*group)).scalar()
+        bind.execute(renumber, [
+            {"_id": question_id, "_version": f"{major}.{top + offset}", "_minor": top + offset}
+            for offset, question_id in enumerate(ids[1:], 1)
+        ])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {column["name"] for column in inspector.get_columns("questions")}
+
+    with op.batch_alter_table("questions") as batch_op:
+        if "version_major" not in columns:
+            batch_op.add_column(sa.Column("version_major", sa.Integer(), nullable=True))
+        if "version_minor" not in columns:
+            batch_op.add_column(sa.Column("version_minor", sa.Integer(), nullable=True))
+
+    # Plain SQL: last_modified bleibt unverändert (kein onupdate)
+    questions = sa.table(
+        "questions",
+        sa.column("id", sa.Integer),
+        sa.column("section_id", sa.Integer),
+        sa.column("variable_name", sa.String),
+        sa.column("version", sa.String),
+        sa.column("version_major", sa.Integer),
+        sa.column("version_minor", sa.Integer),
+    )
+    fill = (
+        questions.update()
+        .where(questions.c.id == sa.bindparam("_id"))
+        .values(version_major=sa.bindparam("_major"), version_minor=sa.bindparam("_minor"))
+    )
+    while True:
+        rows = bind.execute(
+            sa.select(questions.c.id, questions.c.version)
+            .where(questions.c.version_major.is_(None))
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for question_id, version in rows:
+            major, minor = _parse_version(version)
+            params.append({"_id": question_id, "_major": major, "_minor": minor})
+        bind.execute(fill, params)
+
+    constraints = {constraint["name"] for constraint in inspector.get_unique_constraints("questions")}
+    if "uq_questions_version" not in constraints:
+        # Doppelte Versionen je (Section, Variable) aus der alten Vergabe zuerst umnummerieren
+        _renumber_duplicate_versions(bind, questions)
+        with op.batch_alter_table("questions") as batch_op:
+            batch_op.create_unique_constraint(
+                "uq_questions_version", ["section_id", "variable_name", "version_major", "version_minor"]
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("questions") as batch_op:
+        batch_op.drop_constraint("uq_questions_version", type_="unique")
+        batch_op.drop_column("version_minor")
+        batch_op.drop_column("version_major")
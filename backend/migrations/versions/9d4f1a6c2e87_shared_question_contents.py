@@ -0,0 +1,121 @@
+"""shared question contents
+
+Adds the content hashes of questions and uploaded files, the table
+question_contents (question content stored once per content hash) and
+questions.content_id; questions.label / field_type become nullable (NULL
+for shared content). Steps whose objects already exist are skipped.
+
+Revision ID: 9d4f1a6c2e87
+Revises: 5b2e7c41d9a3
+Create Date: 2026-10-18 11:02:17.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f1a6c2e87'
+down_revision: Union[str, None] = '5b2e7c41d9a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns(inspector, table):
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def _indexes(inspector, table):
+    return {index["name"] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if "content_hash" not in _columns(inspector, "imported_csvs"):
+        op.add_column("imported_csvs", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    if "ix_imported_csvs_content_hash" not in _indexes(inspector, "imported_csvs"):
+        op.create_index("ix_imported_csvs_content_hash", "imported_csvs", ["content_hash"])
+
+    if not inspector.has_table("question_contents"):
+        op.create_table(
+            "question_contents",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("content_hash", sa.String(length=64), nullable=False),
+            sa.Column("label", sa.Text(), nullable=True),
+            sa.Column("field_type", sa.String(length=50), nullable=True),
+            sa.Column("choices", postgresql.JSON(none_as_null=True), nullable=True),
+            sa.Column("required", sa.Boolean(), nullable=True),
+            sa.Column("dependencies", postgresql.JSON(none_as_null=True), nullable=True),
+            sa.Column("validation_type", sa.String(length=100), nullable=True),
+            sa.Column("validation_min", sa.String(length=100), nullable=True),
+            sa.Column("validation_max", sa.String(length=100), nullable=True),
+            sa.Column("identifier", sa.String(length=100), nullable=True),
+            sa.Column("branching_logic", sa.String(length=255), nullable=True),
+            sa.Column("field_annotation", sa.String(length=255), nullable=True),
+            sa.Column("field_note", sa.Text(), nullable=True),
+            sa.Column("custom_alignment", sa.String(length=50), nullable=True),
+            sa.Column("question_number", sa.String(length=50), nullable=True),
+            sa.Column("matrix_group_name", sa.String(length=100), nullable=True),
+            sa.Column("matrix_ranking", sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("content_hash"),
+        )
+
+    columns = {column["name"]: column for column in inspector.get_columns("questions")}
+    with op.batch_alter_table("questions") as batch_op:
+        for name, type_ in (("label", sa.Text()), ("field_type", sa.String(length=50))):
+            if not columns[name]["nullable"]:
+                batch_op.alter_column(name, existing_type=type_, nullable=True)
+        if "content_hash" not in columns:
+            batch_op.add_column(sa.Column("content_hash", sa.String(length=64), nullable=True))
+        if "content_id" not in columns:
+            batch_op.add_column(sa.Column("content_id", sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(
+                "fk_questions_content_id_question_contents", "question_contents", ["content_id"], ["id"]
+            )
+
+    indexes = _indexes(inspector, "questions")
+    if "ix_questions_content_hash" not in indexes:
+        op.create_index("ix_questions_content_hash", "questions", ["content_hash"])
+    if "ix_questions_content_id" not in indexes:
+        op.create_index("ix_questions_content_id", "questions", ["content_id"])
+    # Hashes bestehender Fragen füllt backfill_question_hashes() (init_db.py)
+
+
+# Inhaltsspalten, die bei geteilten Inhalten in question_contents stehen
+_CONTENT_COLUMNS = (
+    "label", "field_type", "choices", "required", "dependencies",
+    "validation_type", "validation_min", "validation_max", "identifier",
+    "branching_logic", "field_annotation", "field_note", "custom_alignment",
+    "question_number", "matrix_group_name", "matrix_ranking",
+)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Geteilte Inhalte zurück in die Fragen kopieren, bevor content_id und question_contents wegfallen
+    assignments = ", ".join(
+        f"{name} = (SELECT qc.{name} FROM question_contents qc WHERE qc.id = questions.content_id)"
+        for name in _CONTENT_COLUMNS
+    )
+    op.execute(f"UPDATE questions SET {assignments} WHERE content_id IS NOT NULL")
+    # label / field_type waren vor dem Upgrade NOT NULL
+    for name in ("label", "field_type"):
+        op.execute(f"UPDATE questions SET {name} = '' WHERE {name} IS NULL")
+
+    op.drop_index("ix_questions_content_id", table_name="questions")
+    op.drop_index("ix_questions_content_hash", table_name="questions")
+    with op.batch_alter_table("questions") as batch_op:
+        batch_op.drop_constraint("fk_questions_content_id_question_contents", type_="foreignkey")
+        batch_op.drop_column("content_id")
+        batch_op.drop_column("content_hash")
+        batch_op.alter_column("label", existing_type=sa.Text(), nullable=False)
+        batch_op.alter_column("field_type", existing_type=sa.String(length=50), nullable=False)
+    op.drop_table("question_contents")
+    op.drop_index("ix_imported_csvs_content_hash", table_name="imported_csvs")
+    op.drop_column("imported_csvs", "content_hash")
@@ -0,0 +1,44 @@
+"""question delta storage
+
+Adds questions.base_id (the snapshot a delta version is stored against)
+with its index and foreign key. Existing versions stay full copies until
+python -m backend.compact_versions encodes them. Skipped if the column
+already exists.
+
+Revision ID: c3a8e5f1b742
+Revises: 9d4f1a6c2e87
+Create Date: 2026-10-18 12:24:51.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8e5f1b742'
+down_revision: Union[str, None] = '9d4f1a6c2e87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if "base_id" in {column["name"] for column in inspector.get_columns("questions")}:
+        return
+
+    # SQLite baut die Tabelle dabei neu auf; die Suchtrigger legt ensure_search_index() (init_db.py) wieder an
+    with op.batch_alter_table("questions") as batch_op:
+        batch_op.add_column(sa.Column("base_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_questions_base_id_questions", "questions", ["base_id"], ["id"])
+    op.create_index("ix_questions_base_id", "questions", ["base_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_questions_base_id", table_name="questions")
+    with op.batch_alter_table("questions") as batch_op:
+        batch_op.drop_constraint("fk_questions_base_id_questions", type_="foreignkey")
+        batch_op.drop_column("base_id")
@@ -0,0 +1,48 @@
+"""question search vector
+
+Adds questions.search_vector (tsvector on PostgreSQL, unused text column
+elsewhere) and its GIN index on PostgreSQL. The trigger that fills the
+column and the SQLite FTS5 table are maintained by
+question_search.ensure_search_index() (init_db.py), which also indexes
+the existing questions. Steps whose objects already exist are skipped.
+
+Revision ID: e5d27b90c4f1
+Revises: c3a8e5f1b742
+Create Date: 2026-10-18 12:51:08.337120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5d27b90c4f1'
+down_revision: Union[str, None] = 'c3a8e5f1b742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    postgres = bind.dialect.name == "postgresql"
+
+    if "search_vector" not in {column["name"] for column in inspector.get_columns("questions")}:
+        column_type = postgresql.TSVECTOR() if postgres else sa.Text()
+        op.add_column("questions", sa.Column("search_vector", column_type, nullable=True))
+    if postgres and "ix_questions_search_vector" not in {index["name"] for index in inspector.get_indexes("questions")}:
+        op.create_index("ix_questions_search_vector", "questions", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS questions_search_vector ON questions")
+        op.execute("DROP FUNCTION IF EXISTS questions_search_vector()")
+        op.drop_index("ix_questions_search_vector", table_name="questions")
+    with op.batch_alter_table("questions") as batch_op:
+        batch_op.drop_column("search_vector")
@@ -0,0 +1,71 @@
+"""imported csv counts
+
+Adds imported_csvs.row_count / column_count (returned by the metadata-only
+listing) and fills them from the stored content of existing uploads.
+Skipped if the columns already exist.
+
+Revision ID: f1c94a2b6d05
+Revises: e5d27b90c4f1
+Create Date: 2026-10-18 13:20:44.071593
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c94a2b6d05'
+down_revision: Union[str, None] = 'e5d27b90c4f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Der Inhalt wird vollständig geladen -> kleine Batches
+BATCH_SIZE = 20
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    columns = {column["name"] for column in sa.inspect(bind).get_columns("imported_csvs")}
+    if "row_count" in columns:
+        return
+
+    op.add_column("imported_csvs", sa.Column("row_count", sa.Integer(), nullable=True))
+    op.add_column("imported_csvs", sa.Column("column_count", sa.Integer(), nullable=True))
+
+    imported_csvs = sa.table(
+        "imported_csvs",
+        sa.column("id", sa.Integer),
+        sa.column("content", sa.JSON),
+        sa.column("row_count", sa.Integer),
+        sa.column("column_count", sa.Integer),
+    )
+    fill = (
+        imported_csvs.update()
+        .where(imported_csvs.c.id == sa.bindparam("_id"))
+        .values(row_count=sa.bindparam("_rows"), column_count=sa.bindparam("_columns"))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(imported_csvs.c.id, imported_csvs.c.content)
+            .where(imported_csvs.c.id > last_id)
+            .order_by(imported_csvs.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        bind.execute(fill, [
+            {"_id": csv_id, "_rows": len(content or []), "_columns": len(content[0]) if content else 0}
+            for csv_id, content in rows
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("imported_csvs") as batch_op:
+        batch_op.drop_column("column_count")
+        batch_op.drop_column("row_count")
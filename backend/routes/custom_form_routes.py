@@ -1,12 +1,16 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, current_app, request, jsonify
 from backend.extensions import db
 from backend.dbmodels.custom_form import CustomForm, CustomSection, CustomQuestion
-import io
-import csv
 from backend.dbmodels.user import User
 from datetime import datetime
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy.orm import joinedload
+from backend.services.pagination import get_page_request, keyset_page, page_response
+from backend.services.response_cache import bump_data_generation, cached_response
+from backend.services.db_routing import replica_read
+from backend.services.serializers import CUSTOM_FORM, CUSTOM_QUESTION, CUSTOM_SECTION, USER_REF, user_ref
+from backend.services.csv_export import REDCAP_HEADER, csv_download, custom_form_rows, iter_csv
+from backend.services.record_validation import custom_form_validator, validate_upload
+import csv
 
 
 
@@ -64,6 +68,7 @@ def create_custom_form():
             )
 
     db.session.add(custom_form)
+    bump_data_generation()
     db.session.commit()
 
     return jsonify({"message": "Custom form created successfully"}), 201
@@ -71,53 +76,49 @@ def create_custom_form():
 
 # 📥 Get all custom forms
 @custom_form_bp.route("/api/custom-forms", methods=["GET"])
+@replica_read
+@cached_response
 def get_custom_forms():
-    forms = CustomForm.query.options(joinedload(CustomForm.created_by)).order_by(CustomForm.created_at.desc()).all()
-    result = []
-
-    for form in forms:
-        result.append({
-            "id": form.id,
-            "name": form.name,
-            "created_at": form.created_at.isoformat(),
-            "created_by": {
-    "id": form.created_by.id,
-    "username": form.created_by.username
-} if form.created_by else None,
-            "sections": [
-                {
-                    "id": s.id,
-                    "title": s.title,
-                    "order": s.order,
-                    "questions": [
-                        {
-                            "id": q.id,
-                            "variable_name": q.variable_name,
-                            "label": q.label,
-                            "field_type": q.field_type,
-                            "choices": q.choices,
-                            "required": q.required,
-                            "dependencies": q.dependencies,
-                            "validation_type": q.validation_type,
-                            "validation_min": q.validation_min,
-                            "validation_max": q.validation_max,
-                            "identifier": q.identifier,
-                            "branching_logic": q.branching_logic,
-                            "field_note": q.field_note,
-                            "custom_alignment": q.custom_alignment,
-                            "question_number": q.question_number,
-                            "matrix_group_name": q.matrix_group_name,
-                            "matrix_ranking": q.matrix_ranking,
-                            "field_annotation": q.field_annotation,
-                            "version": q.version
-                        }
-                        for q in s.questions
-                    ]
-                }
-                for s in form.sections
-            ]
-        })
+    try:
+        page = get_page_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = (
+        db.session.query(*CUSTOM_FORM.columns, *USER_REF.labelled("user_"))
+        .outerjoin(User, CustomForm.created_by_id == User.id)
+    )
+    if page:
+        forms, next_cursor = keyset_page(query, CustomForm, page)
+    else:
+        forms = query.order_by(CustomForm.created_at.desc()).all()
+
+    # Sections und Fragen je eine Query über Spalten-Tupel, gruppiert nach Formular bzw. Section
+    section_stmt = CUSTOM_SECTION.select(CustomSection.form_id).order_by(CustomSection.id)
+    question_stmt = (
+        CUSTOM_QUESTION.select(CustomQuestion.section_id)
+        .join(CustomSection, CustomQuestion.section_id == CustomSection.id)
+        .order_by(CustomQuestion.id)
+    )
+    if page:
+        form_ids = [form.id for form in forms]
+        section_stmt = section_stmt.where(CustomSection.form_id.in_(form_ids))
+        question_stmt = question_stmt.where(CustomSection.form_id.in_(form_ids))
+    sections_by_form = CUSTOM_SECTION.grouped(section_stmt)
+    questions_by_section = CUSTOM_QUESTION.grouped(question_stmt)
 
+    result = []
+    field_count = len(CUSTOM_FORM.columns)
+    for row in forms:
+        form = CUSTOM_FORM(row)
+        form["created_by"] = user_ref(row[field_count:])
+        form["sections"] = sections_by_form.get(form["id"], [])
+        for section in form["sections"]:
+            section["questions"] = questions_by_section.get(section["id"], [])
+        result.append(form)
+
+    if page:
+        return page_response(result, next_cursor)
     return jsonify(result)
 
 
@@ -133,6 +134,7 @@ def delete_custom_form(form_id):
         db.session.delete(section)
 
     db.session.delete(form)
+    bump_data_generation()
     db.session.commit()
 
     return jsonify({"message": "Form deleted"}), 200
@@ -156,91 +158,23 @@ def export_custom_form(form_id):
     if not form:
         return jsonify({"error": "Form not found"}), 404
 
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-
-    header = [
-        "Variable / Field Name",
-        "Form Name",
-        "Section Header",
-        "Field Type",
-        "Field Label",
-        "Choices, Calculations, OR Slider Labels",
-        "Field Note",
-        "Text Validation Type OR Show Slider Number",
-        "Text Validation Min",
-        "Text Validation Max",
-        "Identifier?",
-        "Branching Logic (Show field only if...)",
-        "Required Field?",
-        "Custom Alignment",
-        "Question Number (surveys only)",
-        "Matrix Group Name",
-        "Matrix Ranking?",
-        "Field Annotation",
-    ]
-    writer.writerow(header)
-
-    sections = (
-        CustomSection.query
-        .filter_by(form_id=form.id)
-        .order_by(CustomSection.order.asc(), CustomSection.id.asc())
-        .all()
-    )
+    # Streaming: eine sortierte Join-Abfrage mit serverseitigem Cursor, Ausgabe blockweise
+    filename = f"form_{form.id}.csv"
+    return csv_download(iter_csv(REDCAP_HEADER, custom_form_rows(form)), filename)
 
-    for section in sections:
-        questions = (
-            CustomQuestion.query
-            .filter_by(section_id=section.id)
-            .order_by(CustomQuestion.id.asc())
-            .all()
-        )
-        for q in questions:
-            variable_name = q.variable_name or ""
-            form_name = form.name or ""
-            section_header = section.title or ""
-            field_type = q.field_type or ""
-            field_label = q.label or ""
-            field_note = q.field_note or ""
-            validation_type = q.validation_type or ""
-            validation_min = q.validation_min or ""
-            validation_max = q.validation_max or ""
-            identifier = q.identifier or ""
-            branching_logic = q.branching_logic or ""
-            required_field = "y" if q.required else "n"
-            custom_alignment = q.custom_alignment or ""
-            question_number = str(q.question_number or "")
-            matrix_group_name = q.matrix_group_name or ""
-            matrix_ranking = "y" if getattr(q, "matrix_ranking", False) else "n"
-            field_annotation = q.field_annotation or ""
-
-            choices_str = ""
-            if q.choices is not None:
-                try:
-                    if isinstance(q.choices, (list, tuple)):
-                        pairs = [f"{item['value']}, {item['label']}" for item in q.choices]
-                        choices_str = " | ".join(pairs)
-                    else:
-                        choices_str = str(q.choices)
-                except:
-                    choices_str = str(q.choices)
-
-            row = [
-                variable_name, form_name, section_header, field_type,
-                field_label, choices_str, field_note,
-                validation_type, validation_min, validation_max,
-                identifier, branching_logic, required_field,
-                custom_alignment, question_number,
-                matrix_group_name, matrix_ranking, field_annotation,
-            ]
-            writer.writerow(row)
-
-    csv_data = buffer.getvalue()
-    buffer.close()
 
-    filename = f"form_{form.id}.csv"
-    return Response(
-        csv_data,
-        mimetype="text/csv; charset=utf-8",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+# ✅ Check a REDCap records export against the form before loading it
+@custom_form_bp.route("/api/custom-forms/<int:form_id>/validate-records", methods=["POST"])
+def validate_custom_form_records(form_id):
+    file = request.files.get("file")
+    if not file:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    validator = custom_form_validator(form_id)
+    if validator is None:
+        return jsonify({"error": "Form not found or without questions"}), 404
+
+    try:
+        return jsonify(validate_upload(validator, file, current_app.config))
+    except (ValueError, csv.Error) as e:
+        return jsonify({"error": str(e)}), 400
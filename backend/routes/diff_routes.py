@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify, request
+from backend.services.dictionary_diff import cached_diff, load_side, parse_as_of
+import time
+
+diff_bp = Blueprint("diff", __name__)
+
+
+# 🔀 Server-side diff of two dictionaries / form states, aligned by variable_name
+@diff_bp.route("/api/diff", methods=["GET"])
+def diff_dictionaries():
+    started = time.perf_counter()
+    try:
+        left = load_side(request.args.get("left"), as_of=parse_as_of(request.args.get("left_as_of")))
+        right = load_side(request.args.get("right"), as_of=parse_as_of(request.args.get("right_as_of")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    missing = [ref for ref, side in ((request.args.get("left"), left), (request.args.get("right"), right)) if side is None]
+    if missing:
+        return jsonify({"error": "Not found", "missing": missing}), 404
+
+    diff, cached = cached_diff(left, right)
+    return jsonify({
+        "left": left.describe(),
+        "right": right.describe(),
+        "cached": cached,
+        "seconds": round(time.perf_counter() - started, 4),
+        **diff
+    })
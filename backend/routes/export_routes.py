@@ -0,0 +1,98 @@
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from backend.extensions import db
+from backend.services.csv_export import render_form_csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import io
+import json
+import re
+import zipfile
+
+export_bp = Blueprint("export", __name__)
+
+FORM_REF = re.compile(r"^(imported|custom|form)_\d+$")
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, non-seekable sink for zipfile; drained after each archive entry."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _render_in_app(app, form_ref, spool_size):
+    # Jeder Worker-Thread bekommt seinen eigenen App-Kontext und damit eine eigene DB-Session
+    with app.app_context():
+        try:
+            return form_ref, render_form_csv(form_ref, spool_size), None
+        except Exception as e:
+            return form_ref, None, str(e)
+        finally:
+            db.session.remove()
+
+
+# 📦 Export several forms as one ZIP archive of REDCap data dictionaries
+@export_bp.route("/api/export-zip", methods=["POST"])
+def export_zip():
+    data = request.get_json(silent=True) or {}
+    form_refs = list(dict.fromkeys(data.get("forms") or []))
+
+    if not form_refs:
+        return jsonify({"error": "No forms selected"}), 400
+    invalid = [ref for ref in form_refs if not isinstance(ref, str) or not FORM_REF.match(ref)]
+    if invalid:
+        return jsonify({"error": "Invalid form IDs", "invalid": invalid}), 400
+
+    max_forms = current_app.config.get("EXPORT_ZIP_MAX_FORMS", 500)
+    if len(form_refs) > max_forms:
+        return jsonify({"error": f"At most {max_forms} forms per archive"}), 400
+
+    app = current_app._get_current_object()
+    workers = current_app.config.get("EXPORT_WORKERS", 4)
+    spool_size = current_app.config.get("EXPORT_SPOOL_SIZE", 4 * 1024 * 1024)
+
+    def generate():
+        stream = _ZipStream()
+        manifest = {"created_at": datetime.utcnow().isoformat(), "files": {}, "missing": [], "errors": {}}
+
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_render_in_app, app, ref, spool_size) for ref in form_refs]
+                for future in as_completed(futures):
+                    form_ref, rendered, error = future.result()
+                    if error:
+                        manifest["errors"][form_ref] = error
+                    elif rendered is None:
+                        manifest["missing"].append(form_ref)
+                    else:
+                        # Stückweise ins Archiv: weder CSV noch komprimierter Eintrag liegen ganz im Speicher
+                        filename, content = rendered
+                        with content, archive.open(filename, "w") as entry:
+                            for chunk in iter(lambda: content.read(COPY_CHUNK_SIZE), b""):
+                                entry.write(chunk)
+                                yield stream.drain()
+                        manifest["files"][form_ref] = filename
+                    yield stream.drain()
+
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+        yield stream.drain()
+
+    filename = f"redcap_dictionaries_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
@@ -1,7 +1,17 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from backend.extensions import db
 from backend.dbmodels.imported_csv import ImportedCSV
 from backend.dbmodels.form_models import Form, Section, Question
+from backend.services.bulk_import import VariableNameAllocator
+from backend.services.similarity import index_form_questions
+from backend.services.variable_references import index_form_references
+from backend.services.response_cache import bump_data_generation, cached_response
+from backend.services.db_routing import replica_read
+from backend.services.pagination import get_page_request, keyset_page, page_response
+from backend.services.serializers import FORM, QUESTION, QUESTION_FLAT, SECTION, requested_fields
+from backend.services.record_validation import form_validator, validate_upload
+from backend.services.version_storage import version_content
+import csv
 
 form_builder_bp = Blueprint("form_builder", __name__)
 
@@ -21,99 +31,62 @@ def parse_choices(choice_str):
 
 # Flat structured output of all form data
 @form_builder_bp.route("/api/form-builder/data", methods=["GET"])
+@replica_read
+@cached_response
 def get_builder_data():
-    forms = Form.query.all()
-    sections = Section.query.all()
-    questions = Question.query.all()
+    # ?fields= wählt die Spalten der Fragen; nicht angefragte Spalten werden gar nicht erst gelesen
+    try:
+        questions = requested_fields(QUESTION_FLAT)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    # Spalten-Tupel statt ORM-Objekte, Serializer sind vorab aufgebaut
     return jsonify({
-        "forms": [
-            {
-                "id": f.id,
-                "name": f.name,
-                "description": f.description,
-                "created_at": f.created_at.isoformat()
-            } for f in forms
-        ],
-        "sections": [
-            {
-                "id": s.id,
-                "title": s.title,
-                "order": s.order,
-                "form_id": s.form_id
-            } for s in sections
-        ],
-        "questions": [
-            {
-                "id": q.id,
-                "variable_name": q.variable_name,
-                "label": q.label,
-                "field_type": q.field_type,
-                "choices": q.choices,
-                "required": q.required,
-                "dependencies": q.dependencies,
-                "section_id": q.section_id,
-                "validation_type": q.validation_type,
-                "validation_min": q.validation_min,
-                "validation_max": q.validation_max,
-                "identifier": q.identifier,
-                "branching_logic": q.branching_logic,
-                "field_annotation": q.field_annotation,
-                "field_note": q.field_note,
-                "custom_alignment": q.custom_alignment,
-                "question_number": q.question_number,
-                "matrix_group_name": q.matrix_group_name,
-                "matrix_ranking": q.matrix_ranking
-            } for q in questions
-        ]
+        "forms": FORM.all(FORM.select()),
+        "sections": SECTION.all(SECTION.select()),
+        "questions": questions.all(questions.select())
     })
 
 
 # Fully nested form output
 @form_builder_bp.route("/api/forms/full", methods=["GET"])
+@replica_read
+@cached_response
 def get_full_forms():
-    forms = Form.query.all()
+    try:
+        page = get_page_request()
+        questions = requested_fields(QUESTION)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    form_query = db.session.query(*FORM.columns)
+    if page:
+        forms, next_cursor = keyset_page(form_query, Form, page)
+    else:
+        forms = form_query.all()
+
+    section_stmt = SECTION.select().order_by(Section.id)
+    question_stmt = questions.select(Question.section_id).order_by(Question.id)
+    if page:
+        form_ids = [form.id for form in forms]
+        section_stmt = section_stmt.where(Section.form_id.in_(form_ids))
+        question_stmt = question_stmt.join(Section, Question.section_id == Section.id).where(Section.form_id.in_(form_ids))
+
+    questions_by_section = questions.grouped(question_stmt)
+    sections_by_form = {}
+    for section in SECTION.all(section_stmt):
+        form_id = section.pop("form_id")
+        section["questions"] = questions_by_section.get(section["id"], [])
+        sections_by_form.setdefault(form_id, []).append(section)
+
     result = []
+    for row in forms:
+        form = FORM(row)
+        form["sections"] = sections_by_form.get(form["id"], [])
+        result.append(form)
 
-    for form in forms:
-        result.append({
-            "id": form.id,
-            "name": form.name,
-            "description": form.description,
-            "created_at": form.created_at.isoformat(),
-
-            "sections": [
-                {
-                    "id": section.id,
-                    "title": section.title,
-                    "order": section.order,
-                    "questions": [
-                        {
-                            "id": question.id,
-                            "variable_name": question.variable_name,
-                            "label": question.label,
-                            "field_type": question.field_type,
-                            "choices": question.choices,
-                            "required": question.required,
-                            "dependencies": question.dependencies,
-                            "validation_type": question.validation_type,
-                            "validation_min": question.validation_min,
-                            "validation_max": question.validation_max,
-                            "identifier": question.identifier,
-                            "branching_logic": question.branching_logic,
-                            "field_annotation": question.field_annotation,
-                            "field_note": question.field_note,
-                            "custom_alignment": question.custom_alignment,
-                            "question_number": question.question_number,
-                            "matrix_group_name": question.matrix_group_name,
-                            "matrix_ranking": question.matrix_ranking
-                        }
-                        for question in section.questions
-                    ]
-                }
-                for section in form.sections
-            ]
-        })
+    if page:
+        return page_response(result, next_cursor)
     return jsonify(result)
 
 
@@ -136,31 +109,38 @@ def create_new_form():
     db.session.add(default_section)
     db.session.flush()
 
-    for qid in question_ids:
+    # Zwei Versionen derselben Frage landen in derselben Section: jede Kopie bekommt einen eigenen Namen
+    names = VariableNameAllocator()
+    for qid in dict.fromkeys(question_ids):
         original = Question.query.get(qid)
         if original:
+            content = version_content(original)
             copied = Question(
-                variable_name=f"{original.variable_name}_{new_form.id}",
-                label=original.label,
-                field_type=original.field_type,
-                choices=original.choices,
-                required=original.required,
-                dependencies=original.dependencies,
-                validation_type=original.validation_type,
-                validation_min=original.validation_min,
-                validation_max=original.validation_max,
-                identifier=original.identifier,
-                branching_logic=original.branching_logic,
-                field_annotation=original.field_annotation,
-                field_note=original.field_note,
-                custom_alignment=original.custom_alignment,
-                question_number=original.question_number,
-                matrix_group_name=original.matrix_group_name,
-                matrix_ranking=original.matrix_ranking,
+                variable_name=names.allocate(f"{original.variable_name}_{new_form.id}"),
+                label=content["label"],
+                field_type=content["field_type"],
+                choices=content["choices"],
+                required=content["required"],
+                dependencies=content["dependencies"],
+                validation_type=content["validation_type"],
+                validation_min=content["validation_min"],
+                validation_max=content["validation_max"],
+                identifier=content["identifier"],
+                branching_logic=content["branching_logic"],
+                field_annotation=content["field_annotation"],
+                field_note=content["field_note"],
+                custom_alignment=content["custom_alignment"],
+                question_number=content["question_number"],
+                matrix_group_name=content["matrix_group_name"],
+                matrix_ranking=content["matrix_ranking"],
                 section_id=default_section.id,
             )
             db.session.add(copied)
 
+    db.session.flush()
+    index_form_questions(new_form.id)
+    index_form_references(new_form.id)
+    bump_data_generation()
     db.session.commit()
     return jsonify({"message": "Form created successfully"}), 201
 
@@ -182,6 +162,10 @@ def convert_imported_csvs_to_forms():
         db.session.flush()
 
         section_map = {}
+        # Wiederholte Variablen einer Section bekämen dieselbe Version: die Wiederholung wird umbenannt
+        names = VariableNameAllocator()
+        names.reserve(row.get("Variable / Field Name", f"var_{index}") for index, row in enumerate(content))
+        seen = set()
         for index, row in enumerate(content):
             section_title = row.get("Section Header", "General") or "General"
             if section_title not in section_map:
@@ -190,8 +174,13 @@ def convert_imported_csvs_to_forms():
                 db.session.flush()
                 section_map[section_title] = section
 
+            variable_name = row.get("Variable / Field Name", f"var_{index}")
+            if (section_title, variable_name) in seen:
+                variable_name = names.allocate(variable_name)
+            seen.add((section_title, variable_name))
+
             question = Question(
-                variable_name=row.get("Variable / Field Name", f"var_{index}"),
+                variable_name=variable_name,
                 label=row.get("Field Label", ""),
                 field_type=row.get("Field Type", "text"),
                 choices=parse_choices(row.get("Choices, Calculations, OR Slider Labels", "")),
@@ -212,10 +201,31 @@ def convert_imported_csvs_to_forms():
             )
             db.session.add(question)
 
+        db.session.flush()
+        index_form_questions(form.id)
+        index_form_references(form.id)
         created_forms.append(form.name)
 
+    bump_data_generation()
     db.session.commit()
     return jsonify({
         "message": f"{len(created_forms)} forms created",
         "forms": created_forms
     }), 201
+
+
+# ✅ Check a REDCap records export against the form before loading it
+@form_builder_bp.route("/api/forms/<int:form_id>/validate-records", methods=["POST"])
+def validate_form_records(form_id):
+    file = request.files.get("file")
+    if not file:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    validator = form_validator(form_id)
+    if validator is None:
+        return jsonify({"error": "Form not found or without questions"}), 404
+
+    try:
+        return jsonify(validate_upload(validator, file, current_app.config))
+    except (ValueError, csv.Error) as e:
+        return jsonify({"error": str(e)}), 400
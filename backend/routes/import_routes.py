@@ -1,161 +1,191 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, current_app
 from backend.extensions import db
 from backend.dbmodels.imported_csv import ImportedCSV
-from backend.dbmodels.form_models import Form, Section, Question
+from backend.dbmodels.form_models import Form, Section, Question, parse_version
 from backend.dbmodels.custom_form import CustomForm, CustomSection, CustomQuestion
-import csv
-import io
-import json
+from datetime import datetime
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from backend.dbmodels.user import User
+from backend.services.content_hash import file_sha256
+from backend.services.batch_import import UploadTooLarge, import_batch
+from backend.services.bulk_import import VariableNameAllocator
+from backend.services.csv_import import find_duplicate_upload, import_csv_stream
+from backend.services.import_jobs import create_import_job, job_to_dict, live_job_status
+from backend.dbmodels.import_job import ImportJob
+from backend.services.csv_export import csv_download, iter_csv, safe_filename
+from backend.services.form_structure import ensure_structures, imported_csvs_query
+from backend.services.serializers import CUSTOM_QUESTION_STRUCTURED
+from backend.services.similarity import index_form_questions
+from backend.services.variable_references import index_form_references
+from backend.services.response_cache import bump_data_generation, cached_response
+from backend.services.db_routing import replica_read
+from backend.services.pagination import (
+    PageRequest, encode_cursor, get_page_request, keyset_page, page_response
+)
 
 import_bp = Blueprint("import", __name__)
 
 
-def make_unique_variable_name(base_name, existing_names):
-    """Generates a unique variable name by appending _1, _2, etc."""
-    if base_name not in existing_names:
-        return base_name
-    i = 1
-    while f"{base_name}_{i}" in existing_names:
-        i += 1
-    return f"{base_name}_{i}"
-
-
-def str_to_bool(val):
-    if isinstance(val, bool):
-        return val
-    if isinstance(val, str):
-        return val.strip().lower() in ('y', 'yes', 'true', '1')
-    return False
+@import_bp.route("/api/import-csv", methods=["POST"])
+@jwt_required()
+def import_csv():
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    file = request.files.get("file")
+    if not file:
+        return jsonify({"error": "No file uploaded"}), 400
 
+    try:
+        # Erst hashen (Stream wird danach zurückgespult), identische Uploads werden nicht erneut importiert
+        content_hash, stream = file_sha256(file.stream)
+        force = request.args.get("force", "").lower() in ("1", "true", "yes")
+        existing = None if force else find_duplicate_upload(content_hash)
+        if existing:
+            return jsonify({
+                "message": "File was already imported",
+                "duplicate_of": existing,
+                "content_hash": content_hash,
+                "import_stats": None
+            }), 200
 
-def parse_choices(raw):
-    """Converts REDCap choice string into a dictionary."""
-    if not raw:
-        return None
-    result = {}
-    for entry in raw.split("|"):
-        parts = entry.strip().split(",", 1)
-        if len(parts) == 2:
-            key, value = parts
-            result[key.strip()] = value.strip()
-    return result
+        try:
+            _, stats = import_csv_stream(stream, file.filename, user, content_hash=content_hash)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
 
+        return jsonify({"message": "CSV imported successfully", "content_hash": content_hash, "import_stats": stats}), 200
 
-def import_csv_to_db(form_name, content, imported_csv):
-    if not content:
-        return
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
 
-    form = Form(name=form_name, import_source_id=imported_csv.id,imported_by=imported_csv.imported_by,created_at=datetime.utcnow())
-    db.session.add(form)
-    db.session.flush()
 
-    section_map = {}
-    seen = set()
-    existing_names = set(q.variable_name for q in Question.query.with_entities(Question.variable_name).all())
-
-    for row in content:
-        section_title = row.get("Section Header", "General").strip() or "General"
-
-        if section_title not in section_map:
-            section = Section(title=section_title, form_id=form.id)
-            db.session.add(section)
-            db.session.flush()
-            section_map[section_title] = section
-        else:
-            section = section_map[section_title]
-
-        base_var_name = row.get("Variable / Field Name", "").strip()
-        variable_name = make_unique_variable_name(base_var_name, existing_names)
-        existing_names.add(variable_name)
-
-        question = Question(
-            variable_name=variable_name,
-            label=row.get("Field Label", ""),
-            field_type=row.get("Field Type", ""),
-            choices=parse_choices(row.get("Choices, Calculations, OR Slider Labels", "")),
-            required=str_to_bool(row.get("Required Field?")),
-            dependencies=None,
-            section_id=section.id,
-            validation_type=row.get("Text Validation Type OR Show Slider Number"),
-            validation_min=row.get("Text Validation Min"),
-            validation_max=row.get("Text Validation Max"),
-            identifier=row.get("Identifier?"),
-            branching_logic=row.get("Branching Logic (Show field only if...)"),
-            field_annotation=row.get("Field Annotation"),
-            field_note=row.get("Field Note"),
-            custom_alignment=row.get("Custom Alignment"),
-            question_number=row.get("Question Number (surveys only)"),
-            matrix_group_name=row.get("Matrix Group Name"),
-            matrix_ranking=str_to_bool(row.get("Matrix Ranking?"))
-        )
+# Mehrere Data Dictionaries (CSV-Dateien und/oder ZIP-Archive) in einem Aufruf
+@import_bp.route("/api/import-batch", methods=["POST"])
+@jwt_required()
+def import_batch_route():
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"error": "User not found"}), 401
 
-        key = (question.variable_name, section.id)
-        if key in seen:
-            print(f"⚠️ Duplicate skipped: {key}")
-            continue
-        seen.add(key)
+    files = request.files.getlist("files") + request.files.getlist("file")
+    if not files:
+        return jsonify({"error": "No file uploaded"}), 400
 
-        db.session.add(question)
+    force = request.args.get("force", "").lower() in ("1", "true", "yes")
+    try:
+        results, summary = import_batch(files, user, force=force)
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Batch import failed")
+        return jsonify({"error": "Batch import failed"}), 500
 
-    db.session.commit()
+    return jsonify({"results": results, "summary": summary}), 200
 
 
-@import_bp.route("/api/import-csv", methods=["POST"])
+# Hintergrund-Import: Upload wird gespeichert, ein Worker übernimmt den Import
+@import_bp.route("/api/import-jobs", methods=["POST"])
 @jwt_required()
-def import_csv():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+def create_import_job_route():
+    user = User.query.get(get_jwt_identity())
+    if not user:
+        return jsonify({"error": "User not found"}), 401
+
     file = request.files.get("file")
     if not file:
         return jsonify({"error": "No file uploaded"}), 400
 
-    try:
-        raw = file.read()
-        try:
-            decoded = raw.decode("utf-8-sig")
-        except UnicodeDecodeError:
-            decoded = raw.decode("latin1")
-
-        stream = io.StringIO(decoded)
-        reader = csv.DictReader(stream)
-        data = list(reader)
-
-        imported = ImportedCSV(
-            filename=file.filename,
-            content=data,
-            imported_by=user
-        )
-        db.session.add(imported)
-        db.session.commit()
+    force = request.args.get("force", "").lower() in ("1", "true", "yes")
+    job = create_import_job(current_app._get_current_object(), file, user, force=force)
+    return jsonify({
+        "job_id": job.id,
+        "status_url": f"/api/import-jobs/{job.id}",
+        "job": job_to_dict(job)
+    }), 202
 
-        form_name = data[0].get("Form Name", file.filename)
-        import_csv_to_db(form_name, data, imported)
 
-        return jsonify({"message": "CSV imported successfully"}), 200
+@import_bp.route("/api/import-jobs/<int:job_id>", methods=["GET"])
+@jwt_required()
+def get_import_job(job_id):
+    live = live_job_status(job_id)
+    if live:
+        if str(live["created_by_id"]) != str(get_jwt_identity()):
+            return jsonify({"error": "Not authorized to view this job"}), 403
+        return jsonify({key: value for key, value in live.items() if key != "created_by_id"})
 
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    job = db.session.get(ImportJob, job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    if str(job.created_by_id) != str(get_jwt_identity()):
+        return jsonify({"error": "Not authorized to view this job"}), 403
+    return jsonify(job_to_dict(job))
 
 
 @import_bp.route("/api/imported-csvs", methods=["GET"])
+@replica_read
+@cached_response
 def get_imported_csvs():
-    csvs = ImportedCSV.query.order_by(ImportedCSV.created_at.desc()).all()
+    # Nur Metadaten – content wird über /api/imported-csvs/<id>/content geladen
+    csvs = (
+        db.session.query(
+            ImportedCSV.id,
+            ImportedCSV.filename,
+            ImportedCSV.created_at,
+            ImportedCSV.imported_by_id,
+            ImportedCSV.row_count,
+            ImportedCSV.column_count,
+            User.username,
+        )
+        .outerjoin(User, ImportedCSV.imported_by_id == User.id)
+        .order_by(ImportedCSV.created_at.desc())
+        .all()
+    )
     return jsonify([
         {
             "id": csv.id,
             "filename": csv.filename,
-            "content": csv.content,
             "created_at": csv.created_at.isoformat(),
-            "imported_by": csv.imported_by.username if csv.imported_by else "Unknown",
-            "imported_by_id": csv.imported_by_id
-
+            "imported_by": csv.username or "Unknown",
+            "imported_by_id": csv.imported_by_id,
+            "row_count": csv.row_count,
+            "column_count": csv.column_count
         }
         for csv in csvs
     ])
 
 
+@import_bp.route("/api/imported-csvs/<int:csv_id>/content", methods=["GET"])
+def get_imported_csv_content(csv_id):
+    csv_file = (
+        db.session.query(ImportedCSV.id, ImportedCSV.filename, ImportedCSV.content)
+        .filter(ImportedCSV.id == csv_id)
+        .first()
+    )
+    if not csv_file:
+        return jsonify({"error": "File not found"}), 404
+
+    content = csv_file.content or []
+    try:
+        start = max(int(request.args.get("start", 0)), 0)
+        end = int(request.args.get("end", len(content)))
+    except ValueError:
+        return jsonify({"error": "start and end must be integers"}), 400
+    end = min(max(end, start), len(content))
+
+    return jsonify({
+        "id": csv_file.id,
+        "filename": csv_file.filename,
+        "row_count": len(content),
+        "columns": list(content[0].keys()) if content else [],
+        "start": start,
+        "end": end,
+        "rows": content[start:end]
+    })
+
+
 @import_bp.route("/api/imported-csvs/<int:csv_id>", methods=["DELETE"])
 @jwt_required()
 def delete_imported_csv(csv_id):
@@ -173,6 +203,7 @@ def delete_imported_csv(csv_id):
         db.session.delete(form)
 
     db.session.delete(csv)
+    bump_data_generation()
     db.session.commit()
 
     return {"message": "File and associated data successfully deleted"}
@@ -180,192 +211,137 @@ def delete_imported_csv(csv_id):
 
 @import_bp.route("/api/export-csv/<int:csv_id>", methods=["GET"])
 def export_csv(csv_id):
-    import unicodedata
-
-    def safe_filename(name):
-        return unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
-
-    csv_file = ImportedCSV.query.get(csv_id)
+    csv_file = (
+        db.session.query(ImportedCSV.filename, ImportedCSV.content)
+        .filter(ImportedCSV.id == csv_id)
+        .first()
+    )
     if not csv_file:
         return jsonify({"error": "File not found"}), 404
+    if not csv_file.content:
+        return jsonify({"error": "Export error: file has no rows"}), 500
 
-    try:
-        output = io.StringIO(newline='')
-        writer = csv.DictWriter(output, fieldnames=csv_file.content[0].keys(), extrasaction='ignore')
-        writer.writeheader()
-        writer.writerows(csv_file.content)
+    content = csv_file.content
+    fieldnames = list(content[0].keys())
+    rows = ([row.get(name, "") for name in fieldnames] for row in content)
 
-        mem = io.BytesIO()
-        mem.write(output.getvalue().encode("utf-8-sig"))
-        mem.seek(0)
+    filename = safe_filename(csv_file.filename or "export.csv")
+    return csv_download(iter_csv(fieldnames, rows, bom=True), filename, mimetype="text/csv")
 
-        filename = safe_filename(csv_file.filename or "export.csv")
 
-        return send_file(mem, as_attachment=True, download_name=filename, mimetype='text/csv')
-    except Exception as e:
-        return jsonify({"error": f"Export error: {str(e)}"}), 500
+def _imported_by(csv_file):
+    if not csv_file.imported_by:
+        return None
+    return {"id": csv_file.imported_by.id, "username": csv_file.imported_by.username}
 
 
 @import_bp.route("/api/imported-forms", methods=["GET"])
+@replica_read
+@cached_response
 def get_imported_forms_structured():
-    csvs = ImportedCSV.query.order_by(ImportedCSV.created_at.desc()).all()
-    results = []
+    try:
+        page = get_page_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    for csv_file in csvs:
-        try:
-            raw_data = csv_file.content
-            form_structure = {}
-
-            for row in raw_data:
-                form_name = row.get("Form Name", "Unknown Form")
-                section_name = row.get("Section Header", "General")
-
-                form_structure.setdefault(form_name, {})
-                form_structure[form_name].setdefault(section_name, [])
-
-                question_data = {
-                    "variable_name": row.get("Variable / Field Name", ""),
-                    "question_text": row.get("Field Label", ""),
-                    "type": row.get("Field Type", ""),
-                    "choices": row.get("Choices, Calculations, OR Slider Labels", ""),
-                    "required": row.get("Required Field?", ""),
-                    "validation_type": row.get("Text Validation Type OR Show Slider Number", ""),
-                    "validation_min": row.get("Text Validation Min", ""),
-                    "validation_max": row.get("Text Validation Max", ""),
-                    "identifier": row.get("Identifier?", ""),
-                    "branching_logic": row.get("Branching Logic (Show field only if...)", ""),
-                    "field_annotation": row.get("Field Annotation", ""),
-                    "custom_alignment": row.get("Custom Alignment", ""),
-                    "question_number": row.get("Question Number (surveys only)", ""),
-                    "matrix_group_name": row.get("Matrix Group Name", ""),
-                    "matrix_ranking": row.get("Matrix Ranking?", ""),
-                }
-
-                form_structure[form_name][section_name].append(question_data)
-
-            structured_form = {
-                "id": csv_file.id,
-                "filename": csv_file.filename,
-                "created_at": csv_file.created_at.isoformat(),
-                "imported_by": {
-                    "id": csv_file.imported_by.id,
-                    "username": csv_file.imported_by.username
-                } if csv_file.imported_by else None,
-
-                "form_name": list(form_structure.keys())[0],
-                "sections": [
-                    {
-                        "section_name": sec_name,
-                        "questions": questions
-                    }
-                    for sec_name, questions in form_structure[list(form_structure.keys())[0]].items()
-                ]
-            }
+    if page:
+        csvs, next_cursor = keyset_page(imported_csvs_query(), ImportedCSV, page)
+    else:
+        csvs = imported_csvs_query().order_by(ImportedCSV.created_at.desc()).all()
 
-            results.append(structured_form)
+    # Ältere Importe ohne vorberechnete Struktur werden einmalig nachgezogen
+    ensure_structures(csvs)
 
-        except Exception as e:
-            print(f"Error processing CSV {csv_file.filename}: {e}")
+    results = [
+        {
+            "id": csv_file.id,
+            "filename": csv_file.filename,
+            "created_at": csv_file.created_at.isoformat(),
+            "imported_by": _imported_by(csv_file),
+            "form_name": csv_file.structure["form_name"],
+            "sections": csv_file.structure["sections"]
+        }
+        for csv_file in csvs
+        if csv_file.structure
+    ]
 
+    if page:
+        return page_response(results, next_cursor)
     return jsonify(results)
 
 
 @import_bp.route("/api/all-forms", methods=["GET"])
+@replica_read
+@cached_response
 def get_all_forms_combined():
+    try:
+        page = get_page_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     results = []
+    next_cursor = None
+
+    # Seiten laufen zuerst durch die importierten, danach durch die Custom-Formulare
+    custom_forms_query = db.session.query(CustomForm.id, CustomForm.name, CustomForm.created_at)
+    if page is None:
+        imported_csvs = imported_csvs_query().order_by(ImportedCSV.created_at.desc()).all()
+        custom_forms = custom_forms_query.order_by(CustomForm.created_at.desc()).all()
+    elif page.cursor.get("source", "imported") == "imported":
+        imported_csvs, next_cursor = keyset_page(imported_csvs_query(), ImportedCSV, page, source="imported")
+        custom_forms = []
+        remaining = page.limit - len(imported_csvs)
+        if next_cursor is None and remaining > 0:
+            custom_forms, next_cursor = keyset_page(
+                custom_forms_query, CustomForm, PageRequest(remaining), source="custom"
+            )
+        elif next_cursor is None and db.session.query(CustomForm.id).first():
+            next_cursor = encode_cursor(source="custom")
+    else:
+        imported_csvs = []
+        custom_forms, next_cursor = keyset_page(custom_forms_query, CustomForm, page, source="custom")
+
+    ensure_structures(imported_csvs)
 
-    imported_csvs = ImportedCSV.query.order_by(ImportedCSV.created_at.desc()).all()
     for csv_file in imported_csvs:
-        try:
-            raw_data = csv_file.content
-            form_structure = {}
-
-            for row in raw_data:
-                form_name = row.get("Form Name", "Unknown Form")
-                section_name = row.get("Section Header", "General")
-
-                form_structure.setdefault(form_name, {})
-                form_structure[form_name].setdefault(section_name, [])
-
-                question_data = {
-                    "variable_name": row.get("Variable / Field Name", ""),
-                    "question_text": row.get("Field Label", ""),
-                    "type": row.get("Field Type", ""),
-                    "choices": row.get("Choices, Calculations, OR Slider Labels", ""),
-                    "required": row.get("Required Field?", ""),
-                    "field_note": row.get("Field Note", ""),
-                    "validation_type": row.get("Text Validation Type OR Show Slider Number", ""),
-                    "validation_min": row.get("Text Validation Min", ""),
-                    "validation_max": row.get("Text Validation Max", ""),
-                    "identifier": row.get("Identifier?", ""),
-                    "branching_logic": row.get("Branching Logic (Show field only if...)", ""),
-                    "field_annotation": row.get("Field Annotation", ""),
-                    "custom_alignment": row.get("Custom Alignment", ""),
-                    "question_number": row.get("Question Number (surveys only)", ""),
-                    "matrix_group_name": row.get("Matrix Group Name", ""),
-                    "matrix_ranking": row.get("Matrix Ranking?", ""),
-                }
-
-                form_structure[form_name][section_name].append(question_data)
-
-            results.append({
-                "id": f"imported_{csv_file.id}",
-                "source": "imported",
-                "filename": csv_file.filename,
-                "created_at": csv_file.created_at.isoformat(),
-                "form_name": list(form_structure.keys())[0],
-                "imported_by": {
-    "id": csv_file.imported_by.id,
-    "username": csv_file.imported_by.username
-} if csv_file.imported_by else None,
-
-
-
-                "sections": [
-                    {
-                        "section_name": sec,
-                        "questions": qs
-                    }
-                    for sec, qs in form_structure[list(form_structure.keys())[0]].items()
-                ]
-            })
-
-
-        except Exception as e:
-            print(f"Error processing {csv_file.filename}: {e}")
-
-    custom_forms = CustomForm.query.order_by(CustomForm.created_at.desc()).all()
-    for form in custom_forms:
-        sections = CustomSection.query.filter_by(form_id=form.id).all()
-        structured_sections = []
+        if not csv_file.structure:
+            continue
+        results.append({
+            "id": f"imported_{csv_file.id}",
+            "source": "imported",
+            "filename": csv_file.filename,
+            "created_at": csv_file.created_at.isoformat(),
+            "form_name": csv_file.structure["form_name"],
+            "imported_by": _imported_by(csv_file),
+            "sections": csv_file.structure["sections"]
+        })
 
-        for section in sections:
-            questions = CustomQuestion.query.filter_by(section_id=section.id).all()
-            structured_sections.append({
+    # Custom-Formulare: Sections und Fragen je eine Query über Spalten-Tupel
+    sections_by_form = {}
+    questions_by_section = {}
+    if custom_forms:
+        section_query = db.session.query(CustomSection.id, CustomSection.title, CustomSection.form_id)
+        question_stmt = (
+            CUSTOM_QUESTION_STRUCTURED.select(CustomQuestion.section_id)
+            .join(CustomSection, CustomQuestion.section_id == CustomSection.id)
+            .order_by(CustomQuestion.id)
+        )
+        if page:
+            custom_ids = [form.id for form in custom_forms]
+            section_query = section_query.filter(CustomSection.form_id.in_(custom_ids))
+            question_stmt = question_stmt.where(CustomSection.form_id.in_(custom_ids))
+        for section in section_query.order_by(CustomSection.id):
+            sections_by_form.setdefault(section.form_id, []).append(section)
+        questions_by_section = CUSTOM_QUESTION_STRUCTURED.grouped(question_stmt)
+
+    for form in custom_forms:
+        structured_sections = [
+            {
                 "section_name": section.title,
-                "questions": [
-                    {
-                        "variable_name": q.variable_name,
-                        "question_text": q.label,
-                        "type": q.field_type,
-                        "choices": q.choices,
-                        "required": q.required,
-                        "validation_type": q.validation_type,
-                        "validation_min": q.validation_min,
-                        "validation_max": q.validation_max,
-                        "identifier": q.identifier,
-                        "branching_logic": q.branching_logic,
-                        "field_annotation": q.field_annotation,
-                        "dependencies": q.dependencies,
-                        "field_note": q.field_note,
-                        "custom_alignment": q.custom_alignment,
-                        "question_number": q.question_number,
-                        "matrix_group_name": q.matrix_group_name,
-                        "matrix_ranking": q.matrix_ranking
-                    }
-                    for q in questions
-                ]
-            })
+                "questions": questions_by_section.get(section.id, [])
+            }
+            for section in sections_by_form.get(form.id, [])
+        ]
 
         results.append({
             "id": f"custom_{form.id}",
@@ -376,15 +352,11 @@ def get_all_forms_combined():
             "sections": structured_sections
         })
 
+    if page:
+        return page_response(results, next_cursor)
     return jsonify(results)
 
 
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.extensions import db
-from backend.dbmodels.form_models import Form, Section, Question
-from backend.dbmodels.user import User
-from datetime import datetime
-
 @import_bp.route("/api/import-forms", methods=["POST"])
 @jwt_required()
 def import_forms():
@@ -402,6 +374,9 @@ def import_forms():
         created_at=datetime.utcnow()
     )
 
+    # Dieselbe Variable in derselben Version zweimal in einer Section: die Wiederholung wird umbenannt
+    names = VariableNameAllocator()
+    names.reserve(q_data["variable_name"] for section_data in data["sections"] for q_data in section_data["questions"])
     for section_data in data["sections"]:
         section = Section(
             title=section_data["title"],
@@ -409,9 +384,16 @@ def import_forms():
             form=imported_form
         )
 
+        seen = set()
         for q_data in section_data["questions"]:
+            variable_name = q_data["variable_name"]
+            version = parse_version(q_data.get("version", "1.0"))
+            if (variable_name, version) in seen:
+                variable_name = names.allocate(variable_name)
+            seen.add((variable_name, version))
+
             question = Question(
-                variable_name=q_data["variable_name"],
+                variable_name=variable_name,
                 label=q_data["label"],
                 field_type=q_data["field_type"],
                 choices=q_data.get("choices"),
@@ -435,6 +417,10 @@ def import_forms():
             )
 
     db.session.add(imported_form)
+    db.session.flush()
+    index_form_questions(imported_form.id)
+    index_form_references(imported_form.id)
+    bump_data_generation()
     db.session.commit()
 
     return jsonify({"message": "Imported form created successfully"}), 201
@@ -0,0 +1,92 @@
+from flask import Blueprint, current_app, jsonify, request
+from backend.extensions import db
+from backend.dbmodels.form_models import Section, Question
+from backend.dbmodels.custom_form import CustomSection, CustomQuestion
+from backend.services.branching_logic import BranchingLogicError, compile_logic, evaluate_fields
+from backend.services.question_versions import latest_only
+from backend.services.version_storage import materialized, with_snapshots
+from sqlalchemy import select
+import time
+
+logic_bp = Blueprint("logic", __name__)
+
+
+def _form_logic(form_id):
+    rows = db.session.execute(with_snapshots(latest_only(
+        select(Question.variable_name, materialized("branching_logic"))
+        .join(Section, Question.section_id == Section.id)
+        .where(Section.form_id == form_id)
+    ))).all()
+    return dict(rows)
+
+
+def _custom_form_logic(custom_form_id):
+    rows = (
+        db.session.query(CustomQuestion.variable_name, CustomQuestion.branching_logic)
+        .join(CustomSection, CustomQuestion.section_id == CustomSection.id)
+        .filter(CustomSection.form_id == custom_form_id)
+        .order_by(CustomSection.order, CustomQuestion.id)
+        .all()
+    )
+    return dict(rows)
+
+
+# 🔎 Syntax check of one expression, with the referenced variables
+@logic_bp.route("/api/branching-logic/validate", methods=["POST"])
+def validate_branching_logic():
+    data = request.get_json(silent=True) or {}
+    logic = data.get("logic")
+    if not isinstance(logic, str):
+        return jsonify({"error": "logic must be a string"}), 400
+
+    try:
+        compiled = compile_logic(logic)
+    except BranchingLogicError as e:
+        return jsonify({"valid": False, "error": e.message, "position": e.position, "variables": []})
+    return jsonify({"valid": True, "error": None, "position": None, "variables": list(compiled.variables)})
+
+
+# 👁️ Visibility of one expression, explicit fields or a whole form for a batch of test records
+@logic_bp.route("/api/branching-logic/evaluate", methods=["POST"])
+def evaluate_branching_logic():
+    data = request.get_json(silent=True) or {}
+    records = data.get("records")
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        return jsonify({"error": "records must be a list of objects"}), 400
+
+    max_records = current_app.config.get("BRANCHING_LOGIC_MAX_RECORDS", 50000)
+    if len(records) > max_records:
+        return jsonify({"error": f"At most {max_records} records per request"}), 400
+
+    started = time.perf_counter()
+    if "logic" in data:
+        try:
+            compiled = compile_logic(data["logic"] if isinstance(data["logic"], str) else "")
+        except BranchingLogicError as e:
+            return jsonify({"error": e.message, "position": e.position}), 400
+        return jsonify({
+            "visible": compiled.evaluate_many(records),
+            "variables": list(compiled.variables),
+            "records": len(records),
+            "seconds": round(time.perf_counter() - started, 4)
+        })
+
+    if isinstance(data.get("fields"), dict):
+        logic_by_field = {str(name): logic if isinstance(logic, str) else "" for name, logic in data["fields"].items()}
+    elif data.get("form_id") is not None:
+        logic_by_field = _form_logic(data["form_id"])
+    elif data.get("custom_form_id") is not None:
+        logic_by_field = _custom_form_logic(data["custom_form_id"])
+    else:
+        return jsonify({"error": "Provide logic, fields, form_id or custom_form_id"}), 400
+
+    if not logic_by_field:
+        return jsonify({"error": "Form not found or without questions"}), 404
+
+    results, errors = evaluate_fields(logic_by_field, records)
+    return jsonify({
+        "fields": results,
+        "errors": errors,
+        "records": len(records),
+        "seconds": round(time.perf_counter() - started, 4)
+    })
@@ -0,0 +1,10 @@
+from flask import Blueprint, jsonify
+from backend.services.db_routing import pool_status
+
+monitoring_bp = Blueprint("monitoring", __name__)
+
+
+# 📊 Auslastung der Verbindungspools (Primary und ggf. Replikat) für das Monitoring
+@monitoring_bp.route("/api/monitoring/db-pool", methods=["GET"])
+def get_db_pool_status():
+    return jsonify(pool_status())
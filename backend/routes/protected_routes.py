@@ -3,6 +3,7 @@ from backend.dbmodels.user import User
 from backend.extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
+from backend.services.response_cache import bump_data_generation
 
 protected_bp = Blueprint('protected', __name__)
 
@@ -32,6 +33,7 @@ def update_profile():
 
     user.username = data.get("username", user.username)
     user.email = data.get("email", user.email)
+    bump_data_generation()  # Benutzernamen erscheinen in den Katalog-Antworten
     db.session.commit()
     return jsonify({"message": "Profile updated successfully"}), 200
 
@@ -57,5 +59,6 @@ def delete_account():
     user_id = get_jwt_identity()
     user = User.query.get(user_id)
     db.session.delete(user)
+    bump_data_generation()
     db.session.commit()
     return jsonify({"message": "Account deleted successfully"}), 200
@@ -1,89 +1,247 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from backend.extensions import db
 from backend.dbmodels.form_models import Form, Section, Question
 from backend.dbmodels.user import User
 from datetime import datetime
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 import logging
+import random
+import time
+from backend.services.pagination import (
+    PageRequest, encode_cursor, get_page_request, keyset_page, page_response
+)
+from backend.services.question_search import SearchIndexMissing, search_questions, search_terms
+from backend.services.similarity import find_duplicates, index_question_version
+from backend.services.csv_stream import iter_csv_rows, DEFAULT_CHUNK_SIZE
+from backend.dbmodels.question_similarity import QuestionLSHBand, QuestionSignature
+from backend.services.variable_references import (
+    REFERENCE_SOURCES, drop_references, find_references, index_reference_version
+)
+from sqlalchemy import delete
+from backend.services.response_cache import bump_data_generation, cached_response
+from backend.services.db_routing import replica_read
+from backend.services.serializers import QUESTION_VERSION, USER_REF, user_ref
+from backend.services.question_versions import (
+    latest_questions_query, lock_version_group, next_version_numbers
+)
+from backend.services.version_storage import encode_versions, release_version, version_content
 
 logging.basicConfig(level=logging.DEBUG)
 questions_bp = Blueprint("questions_bp", __name__)
 
 
+def question_versions_stmt(*key_columns):
+    """Versions serialized with QUESTION_VERSION, joined to their section."""
+    return (
+        QUESTION_VERSION.select(*key_columns)
+        .select_from(Question)
+        .join(Section, Question.section_id == Section.id)
+    )
+
+
 @questions_bp.route("/api/questions/all", methods=["GET"])
+@replica_read
+@cached_response
 def get_all_questions_grouped():
+    try:
+        page = get_page_request()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Konstante Anzahl Queries über Spalten-Tupel: Formulare (+ User), Sections, Fragen
     results = []
-    forms = Form.query.order_by(Form.created_at.desc()).all()
+    form_query = (
+        db.session.query(Form.id, Form.name, Form.created_at, *USER_REF.labelled("user_"))
+        .outerjoin(User, Form.imported_by_id == User.id)
+    )
+    if page:
+        forms, next_cursor = keyset_page(form_query, Form, page)
+    else:
+        forms = form_query.order_by(Form.created_at.desc()).all()
+
+    section_query = db.session.query(Section.id, Section.title, Section.form_id)
+    question_stmt = question_versions_stmt(Question.section_id, Question.variable_name)
+    if page:
+        form_ids = [form.id for form in forms]
+        section_query = section_query.filter(Section.form_id.in_(form_ids))
+        question_stmt = question_stmt.where(Section.form_id.in_(form_ids))
+
+    sections_by_form = {}
+    for section in section_query.order_by(Section.id.asc()):
+        sections_by_form.setdefault(section.form_id, []).append(section)
+
+    grouped_by_section = {}
+    question_stmt = question_stmt.order_by(
+        Question.section_id.asc(), Question.variable_name.asc(),
+        Question.version_major.desc(), Question.version_minor.desc()
+    )
+    for (section_id, variable_name), versions in QUESTION_VERSION.grouped(question_stmt, key_count=2).items():
+        grouped_by_section.setdefault(section_id, {})[variable_name] = versions
+
     for form in forms:
-        sections = Section.query.filter_by(form_id=form.id).all()
-        structured_sections = []
-
-        for section in sections:
-            questions = Question.query.filter_by(section_id=section.id).order_by(
-                Question.variable_name.asc(), Question.version.desc()
-            ).all()
-
-            grouped = {}
-            for q in questions:
-                if q.variable_name not in grouped:
-                    grouped[q.variable_name] = []
-                grouped[q.variable_name].append({
-                    "id": q.id,
-                    "source": "versioned",
-                    "form_id": form.id,
-                    "section_id": section.id,
-                    "section": section.title,
-                    "question_text": q.label,
-                    "variable_name": q.variable_name,
-                    "type": q.field_type,
-                    "choices": q.choices,
-                    "required": q.required,
-                    "validation_type": q.validation_type,
-                    "validation_min": q.validation_min,
-                    "validation_max": q.validation_max,
-                    "identifier": q.identifier,
-                    "branching_logic": q.branching_logic,
-                    "field_annotation": q.field_annotation,
-                    "field_note": q.field_note,
-                    "custom_alignment": q.custom_alignment,
-                    "question_number": q.question_number,
-                    "matrix_group_name": q.matrix_group_name,
-                    "matrix_ranking": q.matrix_ranking,
-                    "version": q.version,
-                    "last_edited_by": q.modified_by,
-                    "last_edited_at": q.last_modified.isoformat() if q.last_modified else None,
-                    "change_type": q.change_type or "changed",
-                    "change_annotation": q.change_annotation,
-                })
-
-            structured_sections.append({
+        structured_sections = [
+            {
                 "section_name": section.title,
                 "questions": [
                     {
                         "variable_name": varname,
                         "versions": versions
                     }
-                    for varname, versions in grouped.items()
+                    for varname, versions in grouped_by_section.get(section.id, {}).items()
                 ]
-            })
+            }
+            for section in sections_by_form.get(form.id, [])
+        ]
 
         results.append({
             "form_id": f"form_{form.id}",
             "form_name": form.name,
             "source": "versioned",
             "created_at": form.created_at.isoformat(),
-            "imported_by": {
-                "id": form.imported_by.id,
-                "username": form.imported_by.username
-            } if form.imported_by else None,
+            "imported_by": user_ref(form[3:]),
 
             "sections": structured_sections
         })
 
+    if page:
+        return page_response(results, next_cursor)
     return jsonify(results)
 
 
+@questions_bp.route("/api/questions/latest", methods=["GET"])
+@replica_read
+@cached_response
+def get_latest_questions():
+    latest = latest_questions_query().with_entities(Question.id).subquery()
+    stmt = question_versions_stmt().join(latest, latest.c.id == Question.id)
+    form_id = request.args.get("form_id", type=int)
+    if form_id is not None:
+        stmt = stmt.where(Section.form_id == form_id)
+
+    return jsonify(QUESTION_VERSION.all(stmt.order_by(Question.section_id, Question.variable_name)))
+
+
+@questions_bp.route("/api/questions/search", methods=["GET"])
+@replica_read
+@cached_response
+def search_question_bank():
+    query = request.args.get("q", "")
+    if not search_terms(query):
+        return jsonify({"error": "Search query (q) is required"}), 400
+
+    try:
+        page = get_page_request() or PageRequest(current_app.config.get("SEARCH_PAGE_SIZE", 20))
+        offset = int(page.cursor.get("offset", 0))
+        if offset < 0:
+            raise ValueError("Invalid cursor")
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    field_types = [t.strip() for t in request.args.get("field_type", "").split(",") if t.strip()]
+    latest = request.args.get("all_versions", "").lower() not in ("1", "true", "yes")
+
+    try:
+        items, has_more = search_questions(
+            QUESTION_VERSION, query, field_types=field_types, latest=latest,
+            limit=page.limit, offset=offset
+        )
+    except SearchIndexMissing as e:
+        return jsonify({"error": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    next_cursor = encode_cursor(offset=offset + len(items)) if has_more else None
+    return page_response(items, next_cursor)
+
+
+# Wirkungsanalyse vor dem Umbenennen/Bearbeiten: wer verweist auf diese Variable?
+@questions_bp.route("/api/variables/<string:variable_name>/references", methods=["GET"])
+@replica_read
+@cached_response
+def get_variable_references(variable_name):
+    sources = [s.strip() for s in request.args.get("source", "").split(",") if s.strip()]
+    invalid = [s for s in sources if s not in REFERENCE_SOURCES]
+    if invalid:
+        return jsonify({"error": f"Unknown source: {', '.join(invalid)}", "allowed": list(REFERENCE_SOURCES)}), 400
+
+    references = find_references(variable_name, sources=sources)
+    return jsonify({"variable": variable_name, "count": len(references), "references": references})
+
+
+@questions_bp.route("/api/questions/duplicates", methods=["POST"])
+def find_duplicate_questions():
+    """
+    Candidate duplicates from the MinHash/LSH index, either for JSON input
+    ({"label", "choices"} or {"questions": [...]}) or for every row of an
+    uploaded REDCap data dictionary ("file").
+    """
+    file = request.files.get("file")
+    try:
+        if file:
+            options = request.form
+            inputs = [
+                {
+                    "variable_name": row.get("Variable / Field Name", ""),
+                    "label": row.get("Field Label", ""),
+                    "choices": row.get("Choices, Calculations, OR Slider Labels", ""),
+                }
+                for row in iter_csv_rows(file.stream, current_app.config.get("IMPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+            ]
+        else:
+            options = request.get_json(silent=True) or {}
+            inputs = options.get("questions") or ([options] if options.get("label") else [])
+
+        threshold = options.get("threshold")
+        threshold = float(threshold) if threshold not in (None, "") else None
+        limit = min(max(int(options.get("limit", 10)), 1), 100)
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({"error": "Invalid input"}), 400
+
+    if not inputs:
+        return jsonify({"error": "No questions given"}), 400
+
+    matches = find_duplicates(
+        [(item.get("label"), item.get("choices")) for item in inputs],
+        threshold=threshold, limit=limit
+    )
+
+    candidate_ids = list({question_id for pairs in matches for question_id, _ in pairs})
+    questions = {}
+    for start in range(0, len(candidate_ids), 500):
+        stmt = question_versions_stmt().where(Question.id.in_(candidate_ids[start:start + 500]))
+        questions.update((item["id"], item) for item in QUESTION_VERSION.all(stmt))
+
+    results = []
+    for index, (item, pairs) in enumerate(zip(inputs, matches)):
+        candidates = [
+            dict(questions[question_id], similarity=round(similarity, 3))
+            for question_id, similarity in pairs
+            if question_id in questions
+        ]
+        if file and not candidates:
+            continue
+        results.append({
+            "index": index,
+            "variable_name": item.get("variable_name"),
+            "label": item.get("label"),
+            "candidates": candidates
+        })
+
+    return jsonify({"checked": len(inputs), "results": results})
+
+
+# Eine beliebige Version, vollständig rekonstruiert (Delta-Versionen aus ihrem Snapshot)
+@questions_bp.route("/api/questions/<int:question_id>", methods=["GET"])
+@replica_read
+@cached_response
+def get_question_version(question_id):
+    versions = QUESTION_VERSION.all(question_versions_stmt().where(Question.id == question_id))
+    if not versions:
+        return jsonify({"error": "Question version not found"}), 404
+    return jsonify(versions[0])
+
+
 @questions_bp.route("/api/questions/<int:question_id>", methods=["PUT"])
 @jwt_required()
 def update_question(question_id):
@@ -104,95 +262,65 @@ def update_question(question_id):
 
     original_var = old_question.variable_name
     new_var = new_data.get("variable_name", original_var)
-
-
-
-    try:
-        main_version = int(float(old_question.version)) + 1
-    except ValueError:
-        main_version = 1
-
-    like_pattern = f"{main_version}.%"
-    existing_versions = Question.query.filter(
-        Question.section_id == old_question.section_id,
-        Question.variable_name == old_question.variable_name,
-        or_(
-            Question.version.like(like_pattern),
-            Question.version == str(main_version)
+    # Ältere Versionen können als Delta gespeichert sein -> vollständigen Inhalt rekonstruieren
+    content = version_content(old_question)
+
+    # Versionsnummer atomar vergeben: Zeilensperre auf die Versionsgruppe, der Unique-Constraint
+    # auf (Section, Variable, Version) fängt verbleibende Kollisionen ab -> neu berechnen und erneut versuchen
+    retries = current_app.config.get("VERSION_ALLOCATION_RETRIES", 10)
+    for attempt in range(retries):
+        lock_version_group(old_question.section_id, new_var)
+        main_version, next_sub = next_version_numbers(old_question, new_var)
+        new_version_str = f"{main_version}.{next_sub}"
+
+        new_version = Question(
+            variable_name=new_var,
+            label=new_data.get("label", content["label"]),
+            field_type=new_data.get("field_type", content["field_type"]),
+            choices=new_data.get("choices", content["choices"]),
+            required=new_data.get("required", content["required"]),
+            dependencies=new_data.get("dependencies", content["dependencies"]),
+            validation_type=new_data.get("validation_type", content["validation_type"]),
+            validation_min=new_data.get("validation_min", content["validation_min"]),
+            validation_max=new_data.get("validation_max", content["validation_max"]),
+            identifier=new_data.get("identifier", content["identifier"]),
+            branching_logic=new_data.get("branching_logic", content["branching_logic"]),
+            field_annotation=new_data.get("field_annotation", content["field_annotation"]),
+            version=new_version_str,
+            last_modified=datetime.utcnow(),
+            modified_by=user.username,
+            section_id=old_question.section_id,
+            field_note=new_data.get("field_note", content["field_note"]),
+            custom_alignment=new_data.get("custom_alignment", content["custom_alignment"]),
+            question_number=new_data.get("question_number", content["question_number"]),
+            matrix_group_name=new_data.get("matrix_group_name", content["matrix_group_name"]),
+            matrix_ranking=new_data.get("matrix_ranking", content["matrix_ranking"]),
+            change_type=new_data.get("change_type", "changed"),
+            change_annotation=new_data.get("change_annotation", ""),
         )
-    ).all()
-
-    existing_subs = [
-        int(v.version.split(".")[1]) for v in existing_versions
-        if v.version.count(".") == 1 and v.version.split(".")[1].isdigit()
-    ]
-    next_sub = max(existing_subs, default=-1) + 1
-    new_version_str = f"{main_version}.{next_sub}"
-
-    new_version = Question(
-        variable_name=new_var,
-        label=new_data.get("label", old_question.label),
-        field_type=new_data.get("field_type", old_question.field_type),
-        choices=new_data.get("choices", old_question.choices),
-        required=new_data.get("required", old_question.required),
-        dependencies=new_data.get("dependencies", old_question.dependencies),
-        validation_type=new_data.get("validation_type", old_question.validation_type),
-        validation_min=new_data.get("validation_min", old_question.validation_min),
-        validation_max=new_data.get("validation_max", old_question.validation_max),
-        identifier=new_data.get("identifier", old_question.identifier),
-        branching_logic=new_data.get("branching_logic", old_question.branching_logic),
-        field_annotation=new_data.get("field_annotation", old_question.field_annotation),
-        version=new_version_str,
-        last_modified=datetime.utcnow(),
-        modified_by=user.username,
-        section_id=old_question.section_id,
-        field_note=new_data.get("field_note", old_question.field_note),
-        custom_alignment=new_data.get("custom_alignment", old_question.custom_alignment),
-        question_number=new_data.get("question_number", old_question.question_number),
-        matrix_group_name=new_data.get("matrix_group_name", old_question.matrix_group_name),
-        matrix_ranking=new_data.get("matrix_ranking", old_question.matrix_ranking),
-        change_type=new_data.get("change_type", "changed"),
-        change_annotation=new_data.get("change_annotation", ""),
-    )
 
-    db.session.add(new_version)
-    db.session.commit()
-
-    all_versions = Question.query.filter_by(
-        variable_name=new_version.variable_name,
-        section_id=new_version.section_id
-    ).order_by(Question.version.desc()).all()
-
-    versions_serialized = []
-    for q in all_versions:
-        versions_serialized.append({
-            "id": q.id,
-            "source": "versioned",
-            "form_id": q.section.form.id,
-            "section_id": q.section_id,
-            "section": q.section.title,
-            "question_text": q.label,
-            "variable_name": q.variable_name,
-            "type": q.field_type,
-            "choices": q.choices,
-            "required": q.required,
-            "validation_type": q.validation_type,
-            "validation_min": q.validation_min,
-            "validation_max": q.validation_max,
-            "identifier": q.identifier,
-            "branching_logic": q.branching_logic,
-            "field_annotation": q.field_annotation,
-            "version": q.version,
-            "last_edited_by": q.modified_by,
-            "last_edited_at": q.last_modified.isoformat() if q.last_modified else None,
-            "field_note": q.field_note,
-            "custom_alignment": q.custom_alignment,
-            "question_number": q.question_number,
-            "matrix_group_name": q.matrix_group_name,
-            "matrix_ranking": q.matrix_ranking,
-            "change_type": q.change_type or "changed",
-            "change_annotation": q.change_annotation
-        })
+        db.session.add(new_version)
+        try:
+            db.session.flush()
+            index_question_version(new_version)
+            index_reference_version(new_version)
+            # Die verdrängte Version (bzw. eine mitten in die Historie eingefügte) nur noch als Delta speichern
+            encode_versions(new_version.section_id, new_version.variable_name, new_version_id=new_version.id)
+            bump_data_generation()
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            logging.debug(f"Version {new_version_str} for {new_var} already taken, retrying ({attempt + 1}/{retries})")
+            time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+    else:
+        return jsonify({"error": "Could not allocate a new version, please retry"}), 409
+
+    versions_serialized = QUESTION_VERSION.all(
+        question_versions_stmt()
+        .where(Question.variable_name == new_version.variable_name, Question.section_id == new_version.section_id)
+        .order_by(Question.version_major.desc(), Question.version_minor.desc())
+    )
 
     return jsonify({
         "message": "New version saved",
@@ -221,7 +349,25 @@ def delete_question_version(question_id):
         return jsonify({"error": "You can only delete your own versions"}), 403
 
     try:
+        section_id, variable_name = q.section_id, q.variable_name
+        db.session.execute(delete(QuestionLSHBand).where(QuestionLSHBand.question_id == q.id))
+        db.session.execute(delete(QuestionSignature).where(QuestionSignature.question_id == q.id))
+        drop_references([q.id])
+        released = release_version(q)
         db.session.delete(q)
+        db.session.flush()
+        # Hält die neue neueste Version vollständig und kodiert die freigegebenen Versionen neu
+        encode_versions(section_id, variable_name, candidate_ids=released)
+
+        # Wurde die neueste Version gelöscht, rückt die vorherige in den Ähnlichkeits- und Referenzindex nach
+        head = latest_questions_query().filter(
+            Question.section_id == section_id, Question.variable_name == variable_name
+        ).first()
+        if head and not db.session.get(QuestionSignature, head.id):
+            index_question_version(head)
+            index_reference_version(head)
+
+        bump_data_generation()
         db.session.commit()
         return jsonify({"message": f"Version {question_id} deleted successfully"}), 200
     except Exception as e:
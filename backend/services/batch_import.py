@@ -0,0 +1,247 @@
+import logging
+import os
+import posixpath
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+
+from backend.extensions import db
+from backend.services.bulk_import import question_values
+from backend.services.csv_import import find_duplicate_upload, import_csv_rows
+from backend.services.csv_stream import DEFAULT_CHUNK_SIZE, parse_dictionary
+from backend.services.similarity import question_signature, signature_settings
+
+logger = logging.getLogger(__name__)
+
+# Ein Prozess-Pool je Prozess, von allen Batch-Importen geteilt
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+def _is_dictionary_member(info):
+    name = info.filename
+    base = posixpath.basename(name)
+    return (
+        not info.is_dir()
+        and not name.startswith("__MACOSX/")
+        and not base.startswith(".")
+        and base.lower().endswith(".csv")
+    )
+
+
+def collect_uploads(files, max_files, max_bytes):
+    """
+    Reads the uploaded files into (filename, archive, data) tuples; ZIP
+    archives are unpacked to their CSV members. Raises UploadTooLarge when
+    the batch exceeds max_files or max_bytes (uncompressed); no file is read
+    further than the remaining limit.
+    """
+    uploads, rejected = [], []
+    total = 0
+
+    def take(filename, archive, data):
+        nonlocal total
+        total += len(data)
+        if len(uploads) >= max_files:
+            raise UploadTooLarge(f"Too many files, at most {max_files} per batch")
+        if total > max_bytes:
+            raise UploadTooLarge(f"Batch too large, at most {max_bytes} bytes (uncompressed)")
+        uploads.append((filename, archive, data))
+
+    for file in files:
+        stream = file.stream
+        filename = file.filename or "upload.csv"
+        # is_zipfile liest nur das Verzeichnisende; das Archiv selbst bleibt in der Upload-Datei
+        is_zip = zipfile.is_zipfile(stream)
+        stream.seek(0)
+        if not is_zip:
+            take(filename, None, stream.read(max_bytes - total + 1))
+            continue
+
+        try:
+            with zipfile.ZipFile(stream) as archive:
+                for info in archive.infolist():
+                    if not _is_dictionary_member(info):
+                        continue
+                    # Die Größenangabe im ZIP-Header ist nicht verlässlich -> höchstens bis zum Limit lesen
+                    with archive.open(info) as member:
+                        content = member.read(max_bytes - total + 1)
+                    take(posixpath.basename(info.filename), filename, content)
+        except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+            rejected.append({"filename": filename, "archive": None, "status": "failed", "error": f"Invalid ZIP archive: {e}"})
+
+    return uploads, rejected
+
+
+def parse_and_sign(filename, data, chunk_size, num_perm):
+    """
+    Worker task: parses one dictionary and computes the MinHash signature of
+    every question, keyed by its content hash (the CPU-heavy part of the
+    import besides parsing). Runs without app context.
+    """
+    result = parse_dictionary(filename, data, chunk_size)
+    signatures = {}
+    for row in result["rows"] or ():
+        values = question_values(row, "", None)
+        if values["content_hash"] not in signatures:
+            signatures[values["content_hash"]] = question_signature(values["label"], values["choices"], num_perm)
+    result["signatures"] = signatures
+    return result
+
+
+def _worker_count(uploads):
+    config = current_app.config
+    workers = config.get("IMPORT_PARSE_WORKERS") or os.cpu_count() or 1
+    # Kleine Batches lohnen den Start der Prozesse nicht
+    if sum(len(data) for _, _, data in uploads) < config.get("IMPORT_PARSE_INLINE_BYTES", 1024 * 1024):
+        return 1
+    return max(1, min(workers, len(uploads)))
+
+
+def _get_parse_pool(app):
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=app.config.get("IMPORT_PARSE_WORKERS") or os.cpu_count() or 1)
+        return _parse_pool
+
+
+def _reset_parse_pool(pool):
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False)
+
+
+def parse_uploads(uploads):
+    """Parses all uploads, in a process pool if that pays off. Returns (parsed, workers)."""
+    chunk_size = current_app.config.get("IMPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+    num_perm, _ = signature_settings()
+    workers = _worker_count(uploads)
+    args = (
+        [filename for filename, _, _ in uploads],
+        [data for _, _, data in uploads],
+        [chunk_size] * len(uploads),
+        [num_perm] * len(uploads),
+    )
+
+    parsed = None
+    if workers > 1:
+        pool = _get_parse_pool(current_app)
+        try:
+            parsed = list(pool.map(parse_and_sign, *args))
+        except BrokenProcessPool:
+            # Ein Worker ist abgestürzt: Pool verwerfen, diesen Batch im Request-Prozess parsen
+            logger.exception("Parse worker pool broken, parsing inline")
+            _reset_parse_pool(pool)
+            workers = 1
+    if parsed is None:
+        parsed = list(map(parse_and_sign, *args))
+
+    for result, (_, archive, _) in zip(parsed, uploads):
+        result["archive"] = archive
+    return parsed, workers
+
+
+def import_parsed(parsed, user, force=False):
+    """
+    Writes the parsed dictionaries one after another, one transaction per
+    file, so a broken file does not roll back the others. Identical files
+    (same SHA-256) are imported once unless force is set.
+    """
+    results = []
+    imported_hashes = {}
+
+    for item in parsed:
+        result = {
+            "filename": item["filename"],
+            "archive": item["archive"],
+            "content_hash": item["content_hash"],
+            "size": item["size"],
+            "parse_seconds": item["parse_seconds"],
+        }
+        results.append(result)
+
+        if item["error"]:
+            result.update(status="failed", error=item["error"])
+            continue
+
+        existing = None
+        if not force:
+            existing = imported_hashes.get(item["content_hash"]) or find_duplicate_upload(item["content_hash"])
+        if existing:
+            result.update(status="duplicate", duplicate_of=existing)
+            continue
+
+        started = time.perf_counter()
+        try:
+            imported, stats = import_csv_rows(
+                item["rows"], item["filename"], user,
+                content_hash=item["content_hash"], signatures=item["signatures"]
+            )
+        except ValueError as e:
+            db.session.rollback()
+            result.update(status="failed", error=str(e))
+            continue
+        except Exception:
+            db.session.rollback()
+            logger.exception("Importing %s failed", item["filename"])
+            result.update(status="failed", error="Import failed")
+            continue
+
+        imported_hashes[item["content_hash"]] = {
+            "id": imported.id,
+            "filename": imported.filename,
+            "created_at": imported.created_at.isoformat() if imported.created_at else None
+        }
+        result.update(
+            status="imported",
+            imported_csv_id=imported.id,
+            import_stats=stats,
+            write_seconds=round(time.perf_counter() - started, 3)
+        )
+        item["rows"] = item["signatures"] = None
+
+    return results
+
+
+def import_batch(files, user, force=False):
+    """Imports several dictionaries (CSV files or ZIP archives of CSVs) in one call."""
+    config = current_app.config
+    started = time.perf_counter()
+
+    uploads, rejected = collect_uploads(
+        files,
+        max_files=config.get("IMPORT_ARCHIVE_MAX_FILES", 200),
+        max_bytes=config.get("IMPORT_ARCHIVE_MAX_BYTES", 200 * 1024 * 1024)
+    )
+    parsed, workers = parse_uploads(uploads) if uploads else ([], 0)
+    parsed_at = time.perf_counter()
+
+    results = rejected + import_parsed(parsed, user, force=force)
+    finished = time.perf_counter()
+
+    summary = {
+        "files": len(results),
+        "imported": sum(1 for r in results if r["status"] == "imported"),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "rows": sum(r["import_stats"]["rows"] for r in results if r.get("import_stats")),
+        "workers": workers,
+        "parse_seconds": round(parsed_at - started, 3),
+        "write_seconds": round(finished - parsed_at, 3),
+        "total_seconds": round(finished - started, 3),
+    }
+    summary["rows_per_second"] = (
+        round(summary["rows"] / summary["total_seconds"], 1) if summary["total_seconds"] else None
+    )
+    return results, summary
@@ -0,0 +1,564 @@
+"""
+Compiler for REDCap branching logic ("Show field only if...").
+
+An expression such as ``[age] >= 18 and ([consent] = '1' or [sex(2)] = '1')``
+is tokenized, parsed by a recursive-descent parser and turned into a tree of
+Python closures. Compiled expressions are cached, so a batch of records is
+evaluated without parsing again:
+
+    logic = compile_logic("[smoker] = '1' and [packs] > 1")
+    logic.evaluate_many(records)  # -> [True, False, ...]
+
+Values follow REDCap's rules: field values are strings, operands that both
+look numeric are compared as numbers, a blank operand never satisfies <, <=,
+> or >=, and checkbox options ``[var(code)]`` read the export column
+``var___code``. Expressions nested deeper than MAX_NESTING levels are
+rejected with a BranchingLogicError.
+"""
+import math
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+CACHE_SIZE = 4096
+# Verschachtelungstiefe (Klammern, Funktionsaufrufe, Vorzeichen, Potenzen); tiefer -> BranchingLogicError statt RecursionError
+MAX_NESTING = 50
+
+_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<field>\[[^\[\]]*\])
+  | (?P<number>\d+(?:\.\d*)?|\.\d+)
+  | (?P<string>'[^']*'|"[^"]*")
+  | (?P<op><>|!=|<=|>=|==|=|<|>|\+|-|\*|/|\^)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<comma>,)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+""", re.VERBOSE)
+
+_FIELD = re.compile(r"^\s*([A-Za-z0-9_\-:]+)\s*(?:\(\s*([^()]*?)\s*\))?\s*$")
+_NUMERIC = re.compile(r"^\s*[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?\s*$")
+
+_COMPARISONS = {"=", "==", "<>", "!=", "<", "<=", ">", ">="}
+_NAN = float("nan")
+_ROUND_DIGITS = 308
+
+
+class BranchingLogicError(ValueError):
+    """Syntax error in a branching-logic expression; `position` is the offset in the source."""
+
+    def __init__(self, message, position=None):
+        super().__init__(message if position is None else f"{message} (at position {position})")
+        self.message = message
+        self.position = position
+
+
+class _Token:
+    __slots__ = ("kind", "value", "position")
+
+    def __init__(self, kind, value, position):
+        self.kind, self.value, self.position = kind, value, position
+
+
+def tokenize(source):
+    tokens = []
+    position = 0
+    while position < len(source):
+        match = _TOKEN.match(source, position)
+        if not match:
+            char = source[position]
+            if char == "[":
+                raise BranchingLogicError("Unclosed field reference", position)
+            if char in "'\"":
+                raise BranchingLogicError("Unterminated string", position)
+            raise BranchingLogicError(f"Unexpected character {char!r}", position)
+        kind = match.lastgroup
+        if kind != "ws":
+            tokens.append(_Token(kind, match.group(), position))
+        position = match.end()
+    tokens.append(_Token("end", "", len(source)))
+    return tokens
+
+
+# Werte nach REDCap-Regeln
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _to_number(value):
+    """Number for numeric values and numeric strings, NaN otherwise (blank included)."""
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and _NUMERIC.match(value):
+        return float(value)
+    return _NAN
+
+
+def _to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _truthy(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return not math.isnan(value) and value != 0
+    number = _to_number(value)
+    if not math.isnan(number):
+        return number != 0
+    return not _is_blank(value)
+
+
+def _compare(op, left, right):
+    left_number, right_number = _to_number(left), _to_number(right)
+    numeric = not math.isnan(left_number) and not math.isnan(right_number)
+
+    if op in ("=", "=="):
+        return left_number == right_number if numeric else _to_text(left) == _to_text(right)
+    if op in ("<>", "!="):
+        return left_number != right_number if numeric else _to_text(left) != _to_text(right)
+
+    if _is_blank(left) or _is_blank(right):
+        return False
+    if not numeric and (isinstance(left, float) or isinstance(right, float)):
+        # Ergebnis einer Rechnung mit leerem/ungültigem Wert (NaN)
+        return False
+    if numeric:
+        left, right = left_number, right_number
+    else:
+        left, right = _to_text(left), _to_text(right)
+    if op == "<":
+        return left < right
+    if op == "<=":
+        return left <= right
+    if op == ">":
+        return left > right
+    return left >= right
+
+
+def _arithmetic(op, left, right):
+    left, right = _to_number(left), _to_number(right)
+    try:
+        if op == "+":
+            return left + right
+        if op == "-":
+            return left - right
+        if op == "*":
+            return left * right
+        if op == "/":
+            return left / right
+        return left ** right
+    except (ZeroDivisionError, OverflowError, ValueError):
+        return _NAN
+
+
+# Funktionen
+
+def _numbers(values):
+    numbers = [_to_number(value) for value in values if not _is_blank(value)]
+    return [number for number in numbers if not math.isnan(number)]
+
+
+def _mean(*values):
+    numbers = _numbers(values)
+    return math.fsum(numbers) / len(numbers) if numbers else _NAN
+
+
+def _round(value, digits=0, mode=round):
+    number, digits = _to_number(value), _to_number(digits)
+    if math.isnan(number) or math.isnan(digits):
+        return _NAN
+    # Auf den Exponentenbereich von float begrenzen: 10 ** 1e9 würde sonst ewig rechnen, int(inf) wirft
+    factor = 10 ** int(max(-_ROUND_DIGITS, min(digits, _ROUND_DIGITS)))
+    try:
+        if mode is round:
+            # REDCap rundet kaufmännisch (0.5 -> 1), nicht auf die gerade Zahl
+            return math.floor(abs(number) * factor + 0.5) / factor * (1 if number >= 0 else -1)
+        return mode(number * factor) / factor
+    except OverflowError:
+        # Mehr Stellen, als float darstellen kann: die Zahl bleibt unverändert
+        return number
+
+
+def _roundup(value, digits=0):
+    return _round(value, digits, lambda x: math.ceil(x) if x >= 0 else math.floor(x))
+
+
+def _rounddown(value, digits=0):
+    return _round(value, digits, math.trunc)
+
+
+def _parse_date(value):
+    text = _to_text(value).strip()
+    if text.lower() == "today":
+        return datetime.combine(date.today(), datetime.min.time())
+    if text.lower() == "now":
+        return datetime.now()
+    for pattern in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, pattern)
+        except ValueError:
+            pass
+    return None
+
+
+_DATEDIFF_UNITS = {"y": 365.2425 * 86400, "M": 30.44 * 86400, "d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+def _datediff(first, second, unit, date_format="ymd", signed=False):
+    # Nur ISO-Datumsangaben (Y-M-D), wie sie REDCap exportiert
+    start, end = _parse_date(first), _parse_date(second)
+    unit = _to_text(unit)
+    if start is None or end is None or unit not in _DATEDIFF_UNITS:
+        return _NAN
+    difference = (end - start).total_seconds() / _DATEDIFF_UNITS[unit]
+    return difference if _truthy(signed) else abs(difference)
+
+
+def _sqrt(value):
+    number = _to_number(value)
+    return math.sqrt(number) if number >= 0 else _NAN
+
+
+def _mid(text, start, length):
+    start, length = _to_number(start), _to_number(length)
+    if math.isnan(start) or math.isnan(length):
+        return ""
+    start = max(int(start) - 1, 0)
+    return _to_text(text)[start:start + int(length)]
+
+
+def _find(needle, haystack):
+    return _to_text(haystack).lower().find(_to_text(needle).lower()) + 1
+
+
+# name -> (Funktion, min. Argumente, max. Argumente oder None)
+FUNCTIONS = {
+    "if": (None, 3, 3),
+    "sum": (lambda *values: math.fsum(_numbers(values)), 1, None),
+    "min": (lambda *values: min(_numbers(values), default=_NAN), 1, None),
+    "max": (lambda *values: max(_numbers(values), default=_NAN), 1, None),
+    "mean": (_mean, 1, None),
+    "round": (_round, 1, 2),
+    "roundup": (_roundup, 1, 2),
+    "rounddown": (_rounddown, 1, 2),
+    "abs": (lambda value: abs(_to_number(value)), 1, 1),
+    "sqrt": (_sqrt, 1, 1),
+    "datediff": (_datediff, 3, 5),
+    "isnumber": (lambda value: not math.isnan(_to_number(value)), 1, 1),
+    "isinteger": (lambda value: _to_number(value).is_integer(), 1, 1),
+    "isblank": (_is_blank, 1, 1),
+    "contains": (lambda text, part: _to_text(part).lower() in _to_text(text).lower(), 2, 2),
+    "not_contain": (lambda text, part: _to_text(part).lower() not in _to_text(text).lower(), 2, 2),
+    "starts_with": (lambda text, part: _to_text(text).lower().startswith(_to_text(part).lower()), 2, 2),
+    "ends_with": (lambda text, part: _to_text(text).lower().endswith(_to_text(part).lower()), 2, 2),
+    "length": (lambda text: len(_to_text(text)), 1, 1),
+    "left": (lambda text, count: _mid(text, 1, count), 2, 2),
+    "right": (lambda text, count: _to_text(text)[-int(_to_number(count)):] if _to_number(count) >= 1 else "", 2, 2),
+    "mid": (_mid, 3, 3),
+    "find": (_find, 2, 2),
+    "lower": (lambda text: _to_text(text).lower(), 1, 1),
+    "upper": (lambda text: _to_text(text).upper(), 1, 1),
+    "trim": (lambda text: _to_text(text).strip(), 1, 1),
+    "concat": (lambda *values: "".join(_to_text(value) for value in values), 1, None),
+}
+
+
+# Parser
+
+def checkbox_column(variable, code):
+    """Export column of a checkbox option, e.g. ("sex", "2") -> "sex___2"."""
+    return f"{variable}___{code}".replace("-", "_")
+
+
+def _field_reader(variable, code):
+    if code is None:
+        def read(record):
+            value = record.get(variable)
+            return "" if value is None else value
+        return read
+
+    column = checkbox_column(variable, code)
+
+    def read_checkbox(record):
+        value = record.get(column)
+        if value is None:
+            # Alternativ: Liste der angekreuzten Codes unter dem Variablennamen
+            checked = record.get(variable)
+            if isinstance(checked, (list, tuple, set)):
+                return "1" if code in {_to_text(c) for c in checked} else "0"
+            return "0"
+        return value
+    return read_checkbox
+
+
+class _Parser:
+    def __init__(self, source):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.index = 0
+        self.depth = 0
+        self.variables = {}
+
+    @property
+    def token(self):
+        return self.tokens[self.index]
+
+    def advance(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def keyword(self, word):
+        token = self.token
+        return token.kind == "name" and token.value.lower() == word
+
+    def expect(self, kind, description):
+        if self.token.kind != kind:
+            found = self.token.value or "end of expression"
+            raise BranchingLogicError(f"Expected {description}, found {found!r}", self.token.position)
+        return self.advance()
+
+    def parse(self):
+        node = self.parse_or()
+        if self.token.kind != "end":
+            raise BranchingLogicError(f"Unexpected {self.token.value!r}", self.token.position)
+        return node
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.keyword("or"):
+            self.advance()
+            operands.append(self.parse_and())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda record: any(_truthy(operand(record)) for operand in operands)
+
+    def parse_and(self):
+        operands = [self.parse_comparison()]
+        while self.keyword("and"):
+            self.advance()
+            operands.append(self.parse_comparison())
+        if len(operands) == 1:
+            return operands[0]
+        return lambda record: all(_truthy(operand(record)) for operand in operands)
+
+    def parse_comparison(self):
+        left = self.parse_additive()
+        if self.token.kind == "op" and self.token.value in _COMPARISONS:
+            op = self.advance().value
+            right = self.parse_additive()
+            if self.token.kind == "op" and self.token.value in _COMPARISONS:
+                raise BranchingLogicError("Chained comparisons need 'and'", self.token.position)
+            return lambda record: _compare(op, left(record), right(record))
+        return left
+
+    def parse_additive(self):
+        node = self.parse_term()
+        rest = []
+        while self.token.kind == "op" and self.token.value in ("+", "-"):
+            op = self.advance().value
+            rest.append((op, self.parse_term()))
+        return self._chain(node, rest) if rest else node
+
+    def parse_term(self):
+        node = self.parse_power()
+        rest = []
+        while self.token.kind == "op" and self.token.value in ("*", "/"):
+            op = self.advance().value
+            rest.append((op, self.parse_power()))
+        return self._chain(node, rest) if rest else node
+
+    def parse_power(self):
+        operands = [self.parse_unary()]
+        while self.token.kind == "op" and self.token.value == "^":
+            self.advance()
+            operands.append(self.parse_unary())
+        if len(operands) == 1:
+            return operands[0]
+
+        def evaluate(record):
+            # Rechtsassoziativ: 2 ^ 3 ^ 2 = 2 ^ 9
+            values = [operand(record) for operand in operands]
+            value = values.pop()
+            for base in reversed(values):
+                value = _arithmetic("^", base, value)
+            return value
+        return evaluate
+
+    def parse_unary(self):
+        # Jede Verschachtelung führt hier durch; die Tiefe begrenzt Parser und Auswertung
+        self.depth += 1
+        if self.depth > MAX_NESTING:
+            raise BranchingLogicError(f"Expression nested deeper than {MAX_NESTING} levels", self.token.position)
+        try:
+            if self.token.kind == "op" and self.token.value in ("-", "+"):
+                op = self.advance().value
+                operand = self.parse_unary()
+                if op == "+":
+                    return lambda record: _to_number(operand(record))
+                return lambda record: -_to_number(operand(record))
+            return self.parse_primary()
+        finally:
+            self.depth -= 1
+
+    @staticmethod
+    def _chain(first, rest):
+        # Linksassoziative Kette (a - b - c) in einer Schleife statt verschachtelter Closures
+        def evaluate(record):
+            value = first(record)
+            for op, operand in rest:
+                value = _arithmetic(op, value, operand(record))
+            return value
+        return evaluate
+
+    def parse_primary(self):
+        token = self.token
+
+        if token.kind == "number":
+            self.advance()
+            value = float(token.value)
+            return lambda record: value
+
+        if token.kind == "string":
+            self.advance()
+            value = token.value[1:-1]
+            return lambda record: value
+
+        if token.kind == "field":
+            return self.parse_field()
+
+        if token.kind == "lparen":
+            self.advance()
+            node = self.parse_or()
+            self.expect("rparen", "')'")
+            return node
+
+        if token.kind == "name":
+            name = token.value.lower()
+            if name in ("true", "false"):
+                self.advance()
+                value = name == "true"
+                return lambda record: value
+            if self.tokens[self.index + 1].kind == "lparen":
+                return self.parse_call()
+            raise BranchingLogicError(f"Unknown name {token.value!r}", token.position)
+
+        found = token.value or "end of expression"
+        raise BranchingLogicError(f"Unexpected {found!r}", token.position)
+
+    def parse_field(self):
+        token = self.advance()
+        # [event_name][variable]: das Event wird ignoriert, ausgewertet wird ein Datensatz
+        if self.token.kind == "field" and _FIELD.match(token.value[1:-1]):
+            token = self.advance()
+
+        match = _FIELD.match(token.value[1:-1])
+        if not match:
+            raise BranchingLogicError(f"Invalid field reference {token.value}", token.position)
+        variable, code = match.group(1), match.group(2)
+        if code is not None:
+            code = code.strip("'\"")
+            if not code:
+                raise BranchingLogicError(f"Empty checkbox code in {token.value}", token.position)
+        self.variables.setdefault(variable, None)
+        return _field_reader(variable, code)
+
+    def parse_call(self):
+        token = self.advance()
+        name = token.value.lower()
+        if name not in FUNCTIONS:
+            raise BranchingLogicError(f"Unknown function {token.value!r}", token.position)
+        self.expect("lparen", "'('")
+
+        args = []
+        if self.token.kind != "rparen":
+            args.append(self.parse_or())
+            while self.token.kind == "comma":
+                self.advance()
+                args.append(self.parse_or())
+        self.expect("rparen", "')'")
+
+        function, min_args, max_args = FUNCTIONS[name]
+        if len(args) < min_args or (max_args is not None and len(args) > max_args):
+            expected = str(min_args) if min_args == max_args else f"{min_args}-{max_args or 'n'}"
+            raise BranchingLogicError(f"{name}() takes {expected} arguments, got {len(args)}", token.position)
+
+        if name == "if":
+            condition, then, otherwise = args
+            return lambda record: then(record) if _truthy(condition(record)) else otherwise(record)
+        return lambda record: function(*(arg(record) for arg in args))
+
+
+class CompiledLogic:
+    """A compiled expression; `variables` lists the referenced fields in source order."""
+
+    __slots__ = ("source", "variables", "_evaluate")
+
+    def __init__(self, source, evaluate, variables):
+        self.source = source
+        self._evaluate = evaluate
+        self.variables = tuple(variables)
+
+    def evaluate(self, record):
+        """True if the field is shown for `record` (a dict of field values)."""
+        if self._evaluate is None:
+            return True
+        return _truthy(self._evaluate(record))
+
+    def evaluate_many(self, records):
+        if self._evaluate is None:
+            return [True] * len(records)
+        evaluate = self._evaluate
+        return [_truthy(evaluate(record)) for record in records]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_logic(source):
+    """
+    Compiles an expression; raises BranchingLogicError on syntax errors.
+    Blank logic compiles to "always shown". Results are cached per source.
+    """
+    source = (source or "").strip()
+    if not source:
+        return CompiledLogic("", None, ())
+    parser = _Parser(source)
+    evaluate = parser.parse()
+    return CompiledLogic(source, evaluate, parser.variables)
+
+
+def referenced_variables(source):
+    """Variable names referenced by an expression (checkbox options by their base name)."""
+    return list(compile_logic(source).variables)
+
+
+def evaluate_fields(logic_by_field, records):
+    """
+    Visibility of several fields over a batch of records. Every distinct
+    expression is compiled (and evaluated) once, even if fields share it.
+    Returns ({field: [bool, ...]}, {field: error message}).
+    """
+    results, errors = {}, {}
+    evaluated = {}
+    for field, source in logic_by_field.items():
+        source = (source or "").strip()
+        if source not in evaluated:
+            try:
+                evaluated[source] = compile_logic(source).evaluate_many(records)
+            except BranchingLogicError as e:
+                evaluated[source] = e
+        outcome = evaluated[source]
+        if isinstance(outcome, BranchingLogicError):
+            errors[field] = str(outcome)
+        else:
+            results[field] = outcome
+    return results, errors
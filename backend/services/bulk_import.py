@@ -0,0 +1,283 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Section, Question, QUESTION_CONTENT_FIELDS, question_content_hash
+from backend.services.content_hash import store_question_contents
+
+
+# Spaltenreihenfolge für INSERT und COPY
+QUESTION_COLUMNS = [
+    "variable_name",
+    "label",
+    "field_type",
+    "choices",
+    "required",
+    "dependencies",
+    "validation_type",
+    "validation_min",
+    "validation_max",
+    "identifier",
+    "branching_logic",
+    "field_annotation",
+    "field_note",
+    "custom_alignment",
+    "question_number",
+    "matrix_group_name",
+    "matrix_ranking",
+    "version",
+    "version_major",
+    "version_minor",
+    "last_modified",
+    "modified_by",
+    "section_id",
+    "change_type",
+    "change_annotation",
+    "content_hash",
+    "content_id",
+]
+
+
+def make_unique_variable_name(base_name, existing_names):
+    """Generates a unique variable name by appending _1, _2, etc."""
+    if base_name not in existing_names:
+        return base_name
+    i = 1
+    while f"{base_name}_{i}" in existing_names:
+        i += 1
+    return f"{base_name}_{i}"
+
+
+def str_to_bool(val):
+    if isinstance(val, bool):
+        return val
+    if isinstance(val, str):
+        return val.strip().lower() in ('y', 'yes', 'true', '1')
+    return False
+
+
+def parse_choices(raw):
+    """Converts REDCap choice string into a dictionary."""
+    if not raw:
+        return None
+    result = {}
+    for entry in raw.split("|"):
+        parts = entry.strip().split(",", 1)
+        if len(parts) == 2:
+            key, value = parts
+            result[key.strip()] = value.strip()
+    return result
+
+
+class VariableNameAllocator:
+    """
+    Makes variable names unique against the questions table without loading
+    every stored name: only names equal to a base name of the import are
+    looked up (batched IN over the variable_name index), and for bases that
+    are taken, the existing `base_<n>` suffixes (indexed prefix LIKE).
+    """
+
+    def __init__(self, chunk_size=500):
+        self.chunk_size = chunk_size
+        self.taken = set()
+        self.checked = set()
+        self.suffixes_loaded = set()
+
+    def prefetch(self, base_names):
+        new = list({name for name in base_names if name not in self.checked})
+        self.checked.update(new)
+        for i in range(0, len(new), self.chunk_size):
+            chunk = new[i:i + self.chunk_size]
+            self.taken.update(
+                name for (name,) in db.session.query(Question.variable_name)
+                .filter(Question.variable_name.in_(chunk))
+                .distinct()
+            )
+
+    def _load_suffixes(self, base_name):
+        self.suffixes_loaded.add(base_name)
+        self.taken.update(
+            name for (name,) in db.session.query(Question.variable_name)
+            .filter(Question.variable_name.startswith(f"{base_name}_", autoescape=True))
+            .distinct()
+        )
+
+    def reserve(self, names):
+        """Marks names the caller is about to insert as taken, without a lookup."""
+        self.taken.update(names)
+
+    def allocate(self, base_name):
+        if base_name not in self.checked:
+            self.prefetch([base_name])
+        if base_name in self.taken and base_name not in self.suffixes_loaded:
+            self._load_suffixes(base_name)
+
+        variable_name = make_unique_variable_name(base_name, self.taken)
+        self.taken.add(variable_name)
+        return variable_name
+
+
+def question_values(row, variable_name, now):
+    """Maps one REDCap dictionary row to the column values of a Question."""
+    field_type = row.get("Field Type", "")
+    raw_choices = row.get("Choices, Calculations, OR Slider Labels", "")
+    values = {
+        "variable_name": variable_name,
+        "label": row.get("Field Label", ""),
+        "field_type": field_type,
+        # Berechnete Felder: die Formel bleibt als Text erhalten (sie ist keine "key, label"-Liste)
+        "choices": (raw_choices or None) if field_type == "calc" else parse_choices(raw_choices),
+        "required": str_to_bool(row.get("Required Field?")),
+        "dependencies": None,
+        "validation_type": row.get("Text Validation Type OR Show Slider Number"),
+        "validation_min": row.get("Text Validation Min"),
+        "validation_max": row.get("Text Validation Max"),
+        "identifier": row.get("Identifier?"),
+        "branching_logic": row.get("Branching Logic (Show field only if...)"),
+        "field_annotation": row.get("Field Annotation"),
+        "field_note": row.get("Field Note"),
+        "custom_alignment": row.get("Custom Alignment"),
+        "question_number": row.get("Question Number (surveys only)"),
+        "matrix_group_name": row.get("Matrix Group Name"),
+        "matrix_ranking": str_to_bool(row.get("Matrix Ranking?")),
+        "version": "1.0",
+        "version_major": 1,
+        "version_minor": 0,
+        "last_modified": now,
+        "modified_by": None,
+        "section_id": None,
+        "change_type": "changed",
+        "change_annotation": None,
+    }
+    values["content_hash"] = question_content_hash(values)
+    return values
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class BulkQuestionWriter:
+    """
+    Collects the sections and questions of one form in memory and writes
+    them with one multi-row INSERT per batch (COPY on PostgreSQL). With
+    IMPORT_SHARED_CONTENT the question content goes to question_contents,
+    once per distinct payload, and the rows only refer to it.
+    """
+
+    def __init__(self, form, names=None, batch_size=None, use_copy=None, progress=None):
+        config = current_app.config
+        self.form = form
+        self.progress = progress
+        self.names = names or VariableNameAllocator()
+        self.batch_size = batch_size or config.get("IMPORT_BATCH_SIZE", 1000)
+        if use_copy is None:
+            use_copy = config.get("IMPORT_USE_COPY", True)
+        self.use_copy = use_copy and db.session.get_bind().dialect.name == "postgresql"
+        self.shared_content = config.get("IMPORT_SHARED_CONTENT", True)
+
+        self.section_ids = {}
+        self.pending_sections = []
+        self.pending = []
+        self.rows = 0
+        self.now = datetime.utcnow()
+        self.started = time.perf_counter()
+
+    def add(self, row):
+        section_title = (row.get("Section Header") or "General").strip() or "General"
+        if section_title not in self.section_ids and section_title not in self.pending_sections:
+            self.pending_sections.append(section_title)
+
+        base_var_name = (row.get("Variable / Field Name") or "").strip()
+        self.pending.append((section_title, question_values(row, base_var_name, self.now)))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending_sections:
+            offset = len(self.section_ids)
+            section_rows = [
+                {"title": title, "order": offset + i + 1, "form_id": self.form.id}
+                for i, title in enumerate(self.pending_sections)
+            ]
+            ids = db.session.scalars(
+                insert(Section).returning(Section.id, sort_by_parameter_order=True),
+                section_rows
+            ).all()
+            self.section_ids.update(zip(self.pending_sections, ids))
+            self.pending_sections = []
+
+        if not self.pending:
+            return
+
+        # Namenskonflikte für den ganzen Batch mit einer Abfrage je 500 Namen auflösen
+        self.names.prefetch(values["variable_name"] for _, values in self.pending)
+
+        rows = []
+        for section_title, values in self.pending:
+            # allocate() vergibt jeden Namen nur einmal, auch bei doppelten Variablen in der Datei -> kein Zeilenverlust
+            values["variable_name"] = self.names.allocate(values["variable_name"])
+            values["section_id"] = self.section_ids[section_title]
+            rows.append(values)
+
+        content_ids = store_question_contents(rows) if self.shared_content else {}
+        for values in rows:
+            values["content_id"] = content_ids.get(values["content_hash"])
+            if values["content_id"] is not None:
+                values.update(dict.fromkeys(QUESTION_CONTENT_FIELDS))
+
+        if self.use_copy:
+            self.use_copy = self._copy_questions(rows)
+        if not self.use_copy:
+            # Core-INSERT: explizites NULL bleibt NULL (der ORM-Bulk-Insert setzt Defaults wie required=False ein)
+            db.session.execute(insert(Question.__table__), rows)
+
+        self.rows += len(rows)
+        self.pending = []
+        if self.progress:
+            self.progress(self.rows)
+
+    def _copy_questions(self, rows):
+        cursor = db.session.connection().connection.dbapi_connection.cursor()
+        if not hasattr(cursor, "copy_expert"):
+            return False
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for values in rows:
+            writer.writerow([_copy_value(values[c]) for c in QUESTION_COLUMNS])
+        buffer.seek(0)
+
+        cursor.copy_expert(
+            f"COPY {Question.__tablename__} ({', '.join(QUESTION_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+        cursor.close()
+        return True
+
+    def finish(self):
+        self.flush()
+        seconds = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "sections": len(self.section_ids),
+            "batch_size": self.batch_size,
+            "method": "copy" if self.use_copy else "insert",
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.rows / seconds, 1) if seconds > 0 else None,
+        }
@@ -0,0 +1,105 @@
+import hashlib
+import shutil
+import tempfile
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Question, QuestionContent, QUESTION_CONTENT_FIELDS, question_content_hash
+from backend.services.question_versions import update_questions
+
+HASH_CHUNK_SIZE = 1024 * 1024
+_QUERY_CHUNK = 500
+
+
+def file_sha256(stream, chunk_size=HASH_CHUNK_SIZE):
+    """
+    SHA-256 of an uploaded file. Returns (hexdigest, stream) with the stream
+    rewound; non-seekable streams are spooled into a temporary file first.
+    """
+    if not stream.seekable():
+        spooled = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+        shutil.copyfileobj(stream, spooled, chunk_size)
+        stream = spooled
+    stream.seek(0)
+
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest(), stream
+
+
+def backfill_question_hashes(batch_size=1000):
+    """Fills Question.content_hash for rows created before the column existed."""
+    columns = [getattr(Question, name) for name in QUESTION_CONTENT_FIELDS]
+    updated = 0
+    while True:
+        rows = (
+            db.session.query(Question.id, *columns)
+            .filter(Question.content_hash.is_(None), Question.base_id.is_(None), Question.content_id.is_(None))
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        params = [{"id": row.id, "content_hash": question_content_hash(row._asdict())} for row in rows]
+        update_questions(params)
+        db.session.commit()
+        updated += len(params)
+    return updated
+
+
+def _content_ids(hashes):
+    ids = {}
+    for start in range(0, len(hashes), _QUERY_CHUNK):
+        ids.update(db.session.execute(
+            select(QuestionContent.content_hash, QuestionContent.id)
+            .where(QuestionContent.content_hash.in_(hashes[start:start + _QUERY_CHUNK]))
+        ).all())
+    return ids
+
+
+def _insert_ignoring_duplicates():
+    # Gleichzeitige Importe derselben Inhalte: die zweite Zeile wird verworfen statt abzubrechen
+    table = QuestionContent.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=["content_hash"])
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=["content_hash"])
+    return insert(table)
+
+
+def store_question_contents(rows):
+    """
+    Stores the content of question value dicts in question_contents, once per
+    content_hash, and returns {content_hash: QuestionContent.id}. Payloads
+    that are already stored are only looked up. Runs in the caller's
+    transaction.
+    """
+    payloads = {}
+    for values in rows:
+        payloads.setdefault(values["content_hash"], values)
+    if not payloads:
+        return {}
+
+    ids = _content_ids(list(payloads))
+    missing = [
+        {"content_hash": content_hash, **{name: values[name] for name in QUESTION_CONTENT_FIELDS}}
+        for content_hash, values in payloads.items()
+        if content_hash not in ids
+    ]
+    if missing:
+        db.session.execute(_insert_ignoring_duplicates(), missing)
+        ids.update(_content_ids([row["content_hash"] for row in missing]))
+    return ids
+
+
+def prune_question_contents():
+    """Deletes shared contents no question refers to any more (left over by deleted forms)."""
+    result = db.session.execute(
+        delete(QuestionContent).where(~exists().where(Question.content_id == QuestionContent.id))
+    )
+    return result.rowcount
@@ -0,0 +1,244 @@
+import csv
+import io
+import re
+import tempfile
+import unicodedata
+import zlib
+
+from flask import Response, request, stream_with_context
+from sqlalchemy import func, select
+
+from backend.extensions import db
+from backend.dbmodels.custom_form import CustomForm, CustomSection, CustomQuestion
+from backend.dbmodels.form_models import Form, Section, Question
+from backend.dbmodels.imported_csv import ImportedCSV
+from backend.services.question_versions import latest_only
+from backend.services.version_storage import materialized, with_snapshots
+
+REDCAP_HEADER = [
+    "Variable / Field Name",
+    "Form Name",
+    "Section Header",
+    "Field Type",
+    "Field Label",
+    "Choices, Calculations, OR Slider Labels",
+    "Field Note",
+    "Text Validation Type OR Show Slider Number",
+    "Text Validation Min",
+    "Text Validation Max",
+    "Identifier?",
+    "Branching Logic (Show field only if...)",
+    "Required Field?",
+    "Custom Alignment",
+    "Question Number (surveys only)",
+    "Matrix Group Name",
+    "Matrix Ranking?",
+    "Field Annotation",
+]
+
+ROWS_PER_CHUNK = 500
+YIELD_PER = 1000
+SPOOL_SIZE = 4 * 1024 * 1024
+
+# Pfadtrenner, Steuerzeichen und Anführungszeichen haben in Datei- und Archivnamen nichts zu suchen
+_UNSAFE_FILENAME_CHARS = re.compile(r'[\\/\x00-\x1f\x7f"]+')
+
+
+def format_choices(choices):
+    """Converts stored choices back into the REDCap "key, label | ..." notation."""
+    if choices is None:
+        return ""
+    try:
+        if isinstance(choices, (list, tuple)):
+            return " | ".join(f"{item['value']}, {item['label']}" for item in choices)
+        if isinstance(choices, dict):
+            return " | ".join(f"{key}, {label}" for key, label in choices.items())
+        return str(choices)
+    except (KeyError, TypeError):
+        return str(choices)
+
+
+def question_to_redcap_row(q, form_name, section_title):
+    return [
+        q.variable_name or "",
+        form_name or "",
+        section_title or "",
+        q.field_type or "",
+        q.label or "",
+        format_choices(q.choices),
+        q.field_note or "",
+        q.validation_type or "",
+        q.validation_min or "",
+        q.validation_max or "",
+        q.identifier or "",
+        q.branching_logic or "",
+        "y" if q.required else "n",
+        q.custom_alignment or "",
+        str(q.question_number or ""),
+        q.matrix_group_name or "",
+        "y" if getattr(q, "matrix_ranking", False) else "n",
+        q.field_annotation or "",
+    ]
+
+
+EXPORT_COLUMNS = [
+    "variable_name", "field_type", "label", "choices", "field_note",
+    "validation_type", "validation_min", "validation_max", "identifier",
+    "branching_logic", "required", "custom_alignment", "question_number",
+    "matrix_group_name", "matrix_ranking", "field_annotation",
+]
+
+
+def custom_form_rows(form):
+    """Rows of a custom form from one ordered join, read with a server-side cursor."""
+    stmt = (
+        select(
+            *[getattr(CustomQuestion, name) for name in EXPORT_COLUMNS],
+            CustomSection.title.label("section_title")
+        )
+        .join(CustomSection, CustomQuestion.section_id == CustomSection.id)
+        .where(CustomSection.form_id == form.id)
+        .order_by(CustomSection.order.asc(), CustomSection.id.asc(), CustomQuestion.id.asc())
+        .execution_options(yield_per=YIELD_PER)
+    )
+    for q in db.session.execute(stmt):
+        yield question_to_redcap_row(q, form.name, q.section_title)
+
+
+def iter_csv(header, rows, bom=False, rows_per_chunk=ROWS_PER_CHUNK):
+    """Writes CSV rows into a small reusable buffer and yields it every few hundred rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if bom:
+        buffer.write("\ufeff")
+    writer.writerow(header)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    tail = buffer.getvalue()
+    if tail:
+        yield tail
+
+
+def encode_chunks(chunks, encoding="utf-8"):
+    for chunk in chunks:
+        yield chunk.encode(encoding)
+
+
+def gzip_chunks(chunks):
+    """Compresses a byte stream on the fly into the gzip format."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def wants_gzip():
+    return request.args.get("gzip", "").lower() in ("1", "true", "yes")
+
+
+def csv_download(chunks, filename, mimetype="text/csv; charset=utf-8"):
+    """Streaming attachment response; ?gzip=1 compresses it on the fly."""
+    body = encode_chunks(chunks)
+    if wants_gzip():
+        body = gzip_chunks(body)
+        filename = f"{filename}.gz"
+        mimetype = "application/gzip"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+def versioned_form_rows(form):
+    """Rows of a versioned form: the newest version of every variable, in import order."""
+    heads = db.session.execute(with_snapshots(latest_only(
+        select(
+            Question.id, Question.section_id, Question.variable_name,
+            *[materialized(name) for name in EXPORT_COLUMNS if name != "variable_name"],
+            Section.title.label("section_title"), Section.order.label("section_order")
+        )
+        .join(Section, Question.section_id == Section.id)
+        .where(Section.form_id == form.id)
+    ))).all()
+    first_ids = dict(
+        ((section_id, variable_name), first_id)
+        for section_id, variable_name, first_id in db.session.query(
+            Question.section_id, Question.variable_name, func.min(Question.id)
+        )
+        .join(Section, Question.section_id == Section.id)
+        .filter(Section.form_id == form.id)
+        .group_by(Question.section_id, Question.variable_name)
+    )
+    heads.sort(key=lambda q: (
+        q.section_order is None, q.section_order or 0, q.section_id,
+        first_ids.get((q.section_id, q.variable_name), q.id)
+    ))
+    for q in heads:
+        yield question_to_redcap_row(q, form.name, q.section_title)
+
+
+def safe_filename(name):
+    """ASCII file name without path separators, control characters or leading dots."""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return _UNSAFE_FILENAME_CHARS.sub("_", name).lstrip(".") or "export"
+
+
+def render_form_csv(form_ref, spool_size=SPOOL_SIZE):
+    """
+    Renders one form reference ("imported_<id>", "custom_<id>", "form_<id>")
+    as REDCap data dictionary into a spooled temporary file (on disk above
+    `spool_size` bytes). Returns (filename, file) with the file rewound, or
+    None if missing; the caller closes the file.
+    """
+    kind, _, raw_id = form_ref.partition("_")
+    form_id = int(raw_id)
+
+    if kind == "imported":
+        csv_file = (
+            db.session.query(ImportedCSV.filename, ImportedCSV.content)
+            .filter(ImportedCSV.id == form_id)
+            .first()
+        )
+        if not csv_file or not csv_file.content:
+            return None
+        fieldnames = list(csv_file.content[0].keys())
+        rows = ([row.get(name, "") for name in fieldnames] for row in csv_file.content)
+        chunks = iter_csv(fieldnames, rows, bom=True)
+        name = csv_file.filename or "export.csv"
+    elif kind == "custom":
+        form = db.session.get(CustomForm, form_id)
+        if not form:
+            return None
+        chunks = iter_csv(REDCAP_HEADER, custom_form_rows(form))
+        name = f"{form.name}.csv"
+    elif kind == "form":
+        form = db.session.get(Form, form_id)
+        if not form:
+            return None
+        chunks = iter_csv(REDCAP_HEADER, versioned_form_rows(form))
+        name = f"{form.name}.csv"
+    else:
+        raise ValueError(f"Unknown form reference: {form_ref}")
+
+    if not name.lower().endswith(".csv"):
+        name = f"{name}.csv"
+    out = tempfile.SpooledTemporaryFile(max_size=spool_size)
+    for chunk in encode_chunks(chunks):
+        out.write(chunk)
+    out.seek(0)
+    return f"{form_ref}_{safe_filename(name)}", out
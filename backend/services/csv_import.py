@@ -0,0 +1,167 @@
+import itertools
+import json
+import tempfile
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import Text, bindparam, text, update
+
+from backend.extensions import db
+from backend.dbmodels.imported_csv import ImportedCSV
+from backend.dbmodels.form_models import Form
+from backend.services.bulk_import import BulkQuestionWriter
+from backend.services.csv_stream import iter_csv_rows, DEFAULT_CHUNK_SIZE
+from backend.services.form_structure import FormStructureBuilder
+from backend.services.response_cache import bump_data_generation
+from backend.services.similarity import index_form_questions
+from backend.services.variable_references import index_form_references
+
+# ImportedCSV.content wird in Stücken dieser Größe (Zeichen) geschrieben
+_STORE_CHUNK_SIZE = 1024 * 1024
+_CHUNK_TABLE = "imported_csv_content_chunks"
+
+
+class _ContentSpool:
+    """
+    Collects the rows for ImportedCSV.content as JSON text in a spooled
+    temporary file (on disk above IMPORT_CONTENT_SPOOL_SIZE characters)
+    instead of a list of dicts.
+    """
+
+    def __init__(self, max_size):
+        self.file = tempfile.SpooledTemporaryFile(max_size=max_size, mode="w+", encoding="utf-8")
+        self.file.write("[")
+        self.row_count = 0
+        self.column_count = 0
+
+    def add(self, row):
+        if self.row_count:
+            self.file.write(",")
+        else:
+            self.column_count = len(row)
+        self.file.write(json.dumps(row))
+        self.row_count += 1
+
+    def store(self, imported_csv):
+        """
+        Writes the JSON text into imported_csv.content in chunks of
+        _STORE_CHUNK_SIZE characters, so it is never read back as a whole.
+        PostgreSQL checks every json value, so the chunks go to a temporary
+        table there and the server joins them in one UPDATE; other databases
+        store JSON as text and get the chunks appended in place.
+        """
+        self.file.write("]")
+        self.file.seek(0)
+        table = ImportedCSV.__table__
+        chunks = iter(lambda: self.file.read(_STORE_CHUNK_SIZE), "")
+        if db.session.get_bind().dialect.name == "postgresql":
+            db.session.execute(text(f"CREATE TEMPORARY TABLE {_CHUNK_TABLE} (seq integer PRIMARY KEY, chunk text NOT NULL)"))
+            for seq, chunk in enumerate(chunks):
+                db.session.execute(text(f"INSERT INTO {_CHUNK_TABLE} (seq, chunk) VALUES (:seq, :chunk)"), {"seq": seq, "chunk": chunk})
+            db.session.execute(
+                text(
+                    f"UPDATE {table.name} SET content = CAST("
+                    f"(SELECT string_agg(chunk, '' ORDER BY seq) FROM {_CHUNK_TABLE}) AS json) WHERE id = :id"
+                ),
+                {"id": imported_csv.id}
+            )
+            db.session.execute(text(f"DROP TABLE {_CHUNK_TABLE}"))
+        else:
+            chunk_param = bindparam("chunk", type_=Text)
+            first = update(table).where(table.c.id == imported_csv.id).values(content=chunk_param)
+            append = update(table).where(table.c.id == imported_csv.id).values(content=table.c.content.op("||")(chunk_param))
+            for seq, chunk in enumerate(chunks):
+                db.session.execute(append if seq else first, {"chunk": chunk})
+        db.session.expire(imported_csv, ["content"])
+
+    def close(self):
+        self.file.close()
+
+
+def import_csv_to_db(form_name, content, imported_csv, progress=None, signatures=None):
+    if not content:
+        return None
+
+    form = Form(name=form_name, import_source_id=imported_csv.id,imported_by=imported_csv.imported_by,created_at=datetime.utcnow())
+    db.session.add(form)
+    db.session.flush()
+
+    # Zeilen werden direkt an den Writer weitergereicht, für ImportedCSV.content nur als JSON-Text zwischengespeichert
+    spool = _ContentSpool(current_app.config.get("IMPORT_CONTENT_SPOOL_SIZE", 4 * 1024 * 1024))
+    try:
+        writer = BulkQuestionWriter(
+            form, progress=(lambda count: progress("writing", count)) if progress else None
+        )
+        structure = FormStructureBuilder()
+        for row in content:
+            spool.add(row)
+            writer.add(row)
+            structure.add(row)
+        stats = writer.finish()
+
+        if progress:
+            progress("indexing", stats["rows"])
+        stats["indexed"] = index_form_questions(form.id, signatures=signatures)
+        stats["references"] = index_form_references(form.id)
+
+        spool.store(imported_csv)
+    finally:
+        spool.close()
+
+    imported_csv.structure = structure.result()
+    imported_csv.row_count = spool.row_count
+    imported_csv.column_count = spool.column_count
+    bump_data_generation()
+    db.session.commit()
+    return stats
+
+
+def find_duplicate_upload(content_hash):
+    """The first ImportedCSV with the same file hash, or None."""
+    existing = (
+        db.session.query(ImportedCSV.id, ImportedCSV.filename, ImportedCSV.created_at)
+        .filter(ImportedCSV.content_hash == content_hash)
+        .order_by(ImportedCSV.id.asc())
+        .first()
+    )
+    if not existing:
+        return None
+    return {
+        "id": existing.id,
+        "filename": existing.filename,
+        "created_at": existing.created_at.isoformat() if existing.created_at else None
+    }
+
+
+def import_csv_rows(rows, filename, user, content_hash=None, progress=None, signatures=None):
+    """
+    Imports already parsed dictionary rows (dicts) as ImportedCSV plus
+    normalized Form/Section/Question rows, in one transaction. Raises
+    ValueError if there are no rows. Returns (imported_csv, import_stats).
+    `signatures` (content hash -> MinHash) skips recomputing them on indexing.
+    """
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        raise ValueError("CSV file is empty")
+
+    imported = ImportedCSV(
+        filename=filename,
+        content=[],
+        content_hash=content_hash,
+        imported_by=user
+    )
+    db.session.add(imported)
+    db.session.flush()
+
+    form_name = first_row.get("Form Name", filename)
+    stats = import_csv_to_db(
+        form_name, itertools.chain([first_row], rows), imported, progress=progress, signatures=signatures
+    )
+    return imported, stats
+
+
+def import_csv_stream(stream, filename, user, content_hash=None, progress=None):
+    """Parses an uploaded data dictionary and imports it, see import_csv_rows."""
+    rows = iter_csv_rows(stream, current_app.config.get("IMPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+    return import_csv_rows(rows, filename, user, content_hash=content_hash, progress=progress)
@@ -0,0 +1,90 @@
+import codecs
+import csv
+import hashlib
+import io
+import shutil
+import tempfile
+import time
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def detect_encoding(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    "utf-8-sig" if the rest of the stream is valid UTF-8, otherwise
+    "latin1" – the same choice the old decode("utf-8-sig") /
+    decode("latin1") fallback made for the whole file. Reads the stream
+    once chunk by chunk and rewinds it to where it was.
+    """
+    position = stream.tell()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            decoder.decode(chunk)
+        decoder.decode(b"", True)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "latin1"
+    finally:
+        stream.seek(position)
+
+
+def iter_decoded_lines(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Reads a binary stream chunk by chunk and yields decoded text lines.
+
+    The encoding is chosen once for the whole stream (detect_encoding), so a
+    file is never decoded partly as UTF-8 and partly as latin1. Non-seekable
+    streams are spooled into a temporary file for that first pass.
+    """
+    if not stream.seekable():
+        spooled = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+        shutil.copyfileobj(stream, spooled, chunk_size)
+        spooled.seek(0)
+        stream = spooled
+    decoder = codecs.getincrementaldecoder(detect_encoding(stream, chunk_size))()
+    pending = ""
+
+    while True:
+        chunk = stream.read(chunk_size)
+        final = not chunk
+
+        pending += decoder.decode(chunk, final)
+        end = pending.rfind("\n")
+        if end != -1:
+            lines = pending[:end].split("\n")
+            pending = pending[end + 1:]
+            for line in lines:
+                yield line + "\n"
+
+        if final:
+            if pending:
+                yield pending
+            return
+
+
+def iter_csv_rows(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Streams the rows of an uploaded CSV file as dicts."""
+    return csv.DictReader(iter_decoded_lines(stream, chunk_size))
+
+
+def parse_dictionary(filename, data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Hashes and parses one data dictionary given as bytes. Has no app or
+    database dependencies, so it can run in a worker process; returns a
+    picklable dict with the rows (or the parse error) and the parse time.
+    """
+    started = time.perf_counter()
+    result = {
+        "filename": filename,
+        "content_hash": hashlib.sha256(data).hexdigest(),
+        "size": len(data),
+        "rows": None,
+        "error": None,
+    }
+    try:
+        result["rows"] = list(iter_csv_rows(io.BytesIO(data), chunk_size))
+    except csv.Error as e:
+        result["error"] = f"Invalid CSV: {e}"
+    result["parse_seconds"] = round(time.perf_counter() - started, 3)
+    return result
@@ -0,0 +1,104 @@
+import threading
+from functools import wraps
+
+from flask import current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = "replica"
+_USE_REPLICA = "use_replica"
+# Gesetzt, sobald die laufende Transaktion auf dem Primary geschrieben hat
+_PINNED = "pinned_to_primary"
+
+_lock = threading.Lock()
+_routed = {"primary": 0, "replica": 0}
+
+
+def _is_read(clause):
+    # Nur reine SELECTs (ohne FOR UPDATE); Text-Statements und DML bleiben auf dem Primary
+    return (
+        clause is not None
+        and getattr(clause, "is_select", False)
+        and getattr(clause, "_for_update_arg", None) is None
+    )
+
+
+def _count(target):
+    with _lock:
+        _routed[target] += 1
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of requests marked with @replica_read to
+    the "replica" bind. Everything else (writes, flushes, SELECT ... FOR
+    UPDATE, raw SQL and all unmarked requests) uses the primary. Once a
+    transaction has used the primary for anything but a plain read, its
+    later reads stay there too, so they see its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if self._flushing or (clause is not None and not _is_read(clause)):
+            self.info[_PINNED] = True
+        if bind is None and self.info.get(_USE_REPLICA) and not self.info.get(_PINNED) and _is_read(clause):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                _count("replica")
+                return engine
+        if clause is not None:
+            _count("primary")
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _unpin(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_PINNED, None)
+
+
+def replica_read(view):
+    """
+    Runs the reads of a GET endpoint on the read replica, if one is
+    configured (DATABASE_REPLICA_URL). Put it above @cached_response so the
+    data generation is read from the same database as the data.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ("GET", "HEAD") or REPLICA_BIND not in current_app.config.get("SQLALCHEMY_BINDS", {}):
+            return view(*args, **kwargs)
+        session = current_app.extensions["sqlalchemy"].session
+        session.info[_USE_REPLICA] = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            session.info.pop(_USE_REPLICA, None)
+
+    return wrapper
+
+
+def _pool_status(engine):
+    pool = engine.pool
+    status = {"dialect": engine.dialect.name, "pool": type(pool).__name__}
+    # Kennzahlen gibt es nur bei QueuePool (bei SQLite im Speicher: StaticPool)
+    for key, method in (("size", "size"), ("checked_in", "checkedin"), ("checked_out", "checkedout"), ("overflow", "overflow")):
+        if hasattr(pool, method):
+            status[key] = getattr(pool, method)()
+    if "size" in status:
+        status["max_overflow"] = getattr(pool, "_max_overflow", None)
+        capacity = status["size"] + max(status["max_overflow"] or 0, 0)
+        status["utilization"] = round(status["checked_out"] / capacity, 3) if capacity else None
+    return status
+
+
+def pool_status():
+    """Pool utilisation of every bind plus the number of statements routed to primary/replica."""
+    engines = current_app.extensions["sqlalchemy"].engines
+    with _lock:
+        routed = dict(_routed)
+    return {
+        "binds": {
+            "primary" if key is None else key: _pool_status(engine)
+            for key, engine in engines.items()
+        },
+        "routed_statements": routed,
+    }
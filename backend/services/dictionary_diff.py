@@ -0,0 +1,264 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import defer
+
+from backend.extensions import db
+from backend.dbmodels.custom_form import CustomForm, CustomQuestion, CustomSection
+from backend.dbmodels.form_models import (
+    Form, Question, Section, QUESTION_CONTENT_FIELDS, question_content_hash
+)
+from backend.dbmodels.imported_csv import ImportedCSV
+from backend.services.bulk_import import question_values
+from backend.services.question_versions import latest_only
+from backend.services.version_storage import materialized, with_snapshots
+
+SOURCE_REF = re.compile(r"^(imported|form|custom)_(\d+)$")
+
+# Verglichene Spalten: Inhalt der Frage plus die Section, in der sie steht
+DIFF_FIELDS = QUESTION_CONTENT_FIELDS + ("section",)
+_BOOLEAN_FIELDS = ("required", "matrix_ranking")
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+
+
+class DiffSide:
+    """
+    One side of a diff: rows keyed by variable_name, each with a row hash and
+    its normalized column values. `digest` identifies the content as a whole.
+    """
+
+    def __init__(self, ref, name, digest=None, loader=None, hash_loader=None):
+        self.ref = ref
+        self.name = name
+        self._digest = digest
+        self._loader = loader
+        self._hash_loader = hash_loader
+        self._rows = None
+        self.duplicates = 0
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = {}
+            for variable_name, values in self._loader():
+                if variable_name in self._rows:
+                    # Gleicher Variablenname mehrfach (z. B. in zwei Sections): der erste zählt
+                    self.duplicates += 1
+                    continue
+                self._rows[variable_name] = (_row_hash(values), values)
+        return self._rows
+
+    def _row_hashes(self):
+        # Leichte Abfrage nur der Hashes, solange alle Zeilen einen gespeicherten Inhalts-Hash haben
+        if self._rows is None and self._hash_loader is not None:
+            hashes = {}
+            for variable_name, content_hash, section in self._hash_loader():
+                if content_hash is None:
+                    break
+                hashes.setdefault(variable_name, _row_hash({"content_hash": content_hash, "section": section}))
+            else:
+                return hashes
+        return {variable_name: row_hash for variable_name, (row_hash, _) in self.rows.items()}
+
+    @property
+    def digest(self):
+        if self._digest is None:
+            digest = hashlib.sha256()
+            for variable_name, row_hash in sorted(self._row_hashes().items()):
+                digest.update(f"{variable_name}\x1f{row_hash}\x1e".encode("utf-8"))
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    def describe(self):
+        return {"ref": self.ref, "name": self.name, "digest": self.digest}
+
+
+def _normalize(name, value):
+    if name in _BOOLEAN_FIELDS:
+        return bool(value)
+    if value == "":
+        return None
+    return value
+
+
+def _row_hash(values):
+    content_hash = values.get("content_hash") or question_content_hash(values)
+    raw = f"{content_hash}\x1f{values.get('section') or ''}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _imported_rows(csv_id):
+    content = db.session.query(ImportedCSV.content).filter(ImportedCSV.id == csv_id).scalar() or []
+    for row in content:
+        if not isinstance(row, dict):
+            continue
+        variable_name = (row.get("Variable / Field Name") or "").strip()
+        values = question_values(row, variable_name, None)
+        # Gleiche Section-Regel wie beim Import (BulkQuestionWriter)
+        values["section"] = (row.get("Section Header") or "General").strip() or "General"
+        yield variable_name, values
+
+
+def _question_rows(stmt):
+    for row in db.session.execute(stmt):
+        values = {name: getattr(row, name) for name in QUESTION_CONTENT_FIELDS}
+        # Custom-Fragen haben keinen gespeicherten Hash, er wird dann aus den Werten berechnet
+        values["content_hash"] = getattr(row, "content_hash", None)
+        values["section"] = row.section
+        yield row.variable_name, values
+
+
+def load_side(ref, as_of=None):
+    """
+    Resolves a reference like "imported_3", "form_5" or "custom_2" to a
+    DiffSide, or returns None if it does not exist. `as_of` (forms only)
+    selects the state of the form at that time.
+    """
+    match = SOURCE_REF.match(ref or "")
+    if not match:
+        raise ValueError(f"Invalid reference {ref!r}, expected imported_<id>, form_<id> or custom_<id>")
+    kind, source_id = match.group(1), int(match.group(2))
+    if as_of is not None and kind != "form":
+        raise ValueError("as_of is only supported for form_<id>")
+
+    if kind == "imported":
+        imported = (
+            db.session.query(ImportedCSV)
+            .options(defer(ImportedCSV.content), defer(ImportedCSV.structure))
+            .filter(ImportedCSV.id == source_id)
+            .first()
+        )
+        if imported is None:
+            return None
+        # Der Datei-Hash identifiziert den Inhalt, ohne das JSON zu laden
+        digest = f"file:{imported.content_hash}" if imported.content_hash else None
+        return DiffSide(ref, imported.filename, digest, lambda: _imported_rows(source_id))
+
+    if kind == "form":
+        form = db.session.get(Form, source_id)
+        if form is None:
+            return None
+        def form_stmt(*columns):
+            return latest_only(
+                select(Question.variable_name, Question.content_hash, Section.title.label("section"), *columns)
+                .join(Section, Question.section_id == Section.id)
+                .where(Section.form_id == source_id),
+                as_of=as_of
+            ).order_by(Section.order, Question.id)
+
+        # Mit as_of können ältere, als Delta gespeicherte Versionen dabei sein
+        columns = [materialized(name) for name in QUESTION_CONTENT_FIELDS]
+        name = form.name if as_of is None else f"{form.name} @ {as_of.isoformat()}"
+        return DiffSide(
+            ref, name,
+            loader=lambda: _question_rows(with_snapshots(form_stmt(*columns))),
+            hash_loader=lambda: db.session.execute(form_stmt())
+        )
+
+    form = db.session.get(CustomForm, source_id)
+    if form is None:
+        return None
+    columns = [getattr(CustomQuestion, name) for name in QUESTION_CONTENT_FIELDS]
+    stmt = (
+        select(CustomQuestion.variable_name, CustomSection.title.label("section"), *columns)
+        .join(CustomSection, CustomQuestion.section_id == CustomSection.id)
+        .where(CustomSection.form_id == source_id)
+        .order_by(CustomSection.order, CustomQuestion.id)
+    )
+    return DiffSide(ref, form.name, None, lambda: _question_rows(stmt))
+
+
+def _summary_item(variable_name, values):
+    return {
+        "variable_name": variable_name,
+        "label": values.get("label"),
+        "field_type": values.get("field_type"),
+        "section": values.get("section"),
+    }
+
+
+def compute_diff(left, right):
+    """
+    Aligns both sides by variable_name and compares the row hashes; column
+    deltas are only computed for rows whose hash differs. Linear in the
+    number of rows.
+    """
+    left_rows, right_rows = left.rows, right.rows
+    added, removed, changed = [], [], []
+    unchanged = 0
+
+    for variable_name, (row_hash, values) in left_rows.items():
+        other = right_rows.get(variable_name)
+        if other is None:
+            removed.append(_summary_item(variable_name, values))
+        elif other[0] == row_hash:
+            unchanged += 1
+        else:
+            other_values = other[1]
+            changes = {}
+            for name in DIFF_FIELDS:
+                before, after = _normalize(name, values.get(name)), _normalize(name, other_values.get(name))
+                if before != after:
+                    changes[name] = {"from": before, "to": after}
+            # Der Hash unterscheidet "" und NULL, der Vergleich nicht
+            if changes:
+                changed.append({"variable_name": variable_name, "changes": changes})
+            else:
+                unchanged += 1
+
+    for variable_name, (_, values) in right_rows.items():
+        if variable_name not in left_rows:
+            added.append(_summary_item(variable_name, values))
+
+    return {
+        "summary": {
+            "added": len(added),
+            "removed": len(removed),
+            "changed": len(changed),
+            "unchanged": unchanged,
+            "duplicate_variables": {"left": left.duplicates, "right": right.duplicates},
+        },
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+    }
+
+
+def cached_diff(left, right):
+    """
+    compute_diff with an LRU cache keyed by the pair of content digests. The
+    digests come from the stored file hash (imports) or the stored question
+    hashes (forms), so a repeated comparison does not load or compare rows.
+    Returns (diff, cached).
+    """
+    key = (left.digest, right.digest)
+    with _lock:
+        diff = _cache.get(key)
+        if diff is not None:
+            _cache.move_to_end(key)
+            return diff, True
+
+    diff = compute_diff(left, right)
+    max_entries = current_app.config.get("DIFF_CACHE_SIZE", 128)
+    with _lock:
+        _cache[key] = diff
+        _cache.move_to_end(key)
+        while len(_cache) > max_entries:
+            _cache.popitem(last=False)
+    return diff, False
+
+
+def parse_as_of(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError("as_of must be an ISO timestamp")
@@ -0,0 +1,107 @@
+from sqlalchemy.orm import defer, joinedload, undefer
+
+from backend.extensions import db
+from backend.dbmodels.imported_csv import ImportedCSV
+
+# Schlüssel im strukturierten Formular → Spalte im REDCap Data Dictionary
+QUESTION_FIELDS = [
+    ("variable_name", "Variable / Field Name"),
+    ("question_text", "Field Label"),
+    ("type", "Field Type"),
+    ("choices", "Choices, Calculations, OR Slider Labels"),
+    ("required", "Required Field?"),
+    ("field_note", "Field Note"),
+    ("validation_type", "Text Validation Type OR Show Slider Number"),
+    ("validation_min", "Text Validation Min"),
+    ("validation_max", "Text Validation Max"),
+    ("identifier", "Identifier?"),
+    ("branching_logic", "Branching Logic (Show field only if...)"),
+    ("field_annotation", "Field Annotation"),
+    ("custom_alignment", "Custom Alignment"),
+    ("question_number", "Question Number (surveys only)"),
+    ("matrix_group_name", "Matrix Group Name"),
+    ("matrix_ranking", "Matrix Ranking?"),
+]
+
+
+class FormStructureBuilder:
+    """
+    Builds the form → section → question representation of an imported CSV
+    row by row, so it can be filled while the upload is streamed.
+    Like before, only the first form of a file ends up in the result.
+    """
+
+    def __init__(self):
+        self.form_name = None
+        self.sections = {}
+
+    def add(self, row):
+        form_name = row.get("Form Name", "Unknown Form")
+        if self.form_name is None:
+            self.form_name = form_name
+        elif form_name != self.form_name:
+            return
+
+        section_name = row.get("Section Header", "General")
+        self.sections.setdefault(section_name, []).append(
+            {key: row.get(column, "") for key, column in QUESTION_FIELDS}
+        )
+
+    def result(self):
+        if self.form_name is None:
+            return None
+        return {
+            "form_name": self.form_name,
+            "sections": [
+                {"section_name": name, "questions": questions}
+                for name, questions in self.sections.items()
+            ]
+        }
+
+
+def build_form_structure(rows):
+    builder = FormStructureBuilder()
+    for row in rows:
+        builder.add(row)
+    return builder.result()
+
+
+def imported_csvs_query():
+    """ImportedCSV query without the raw content blob, uploader loaded in the same query."""
+    return ImportedCSV.query.options(defer(ImportedCSV.content), joinedload(ImportedCSV.imported_by))
+
+
+def ensure_structures(csv_files):
+    """
+    Computes and stores the structure for files imported before it was
+    precomputed. Returns True if something had to be persisted.
+    """
+    changed = False
+    for csv_file in csv_files:
+        if csv_file.structure is None and csv_file.content:
+            csv_file.structure = build_form_structure(csv_file.content)
+            changed = True
+    if changed:
+        db.session.commit()
+    return changed
+
+
+def backfill_form_structures(batch_size=100):
+    """Fills ImportedCSV.structure for all rows that don't have one yet."""
+    updated = 0
+    last_id = 0
+    while True:
+        csv_files = (
+            ImportedCSV.query
+            .options(undefer(ImportedCSV.content))
+            .filter(ImportedCSV.structure.is_(None), ImportedCSV.id > last_id)
+            .order_by(ImportedCSV.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not csv_files:
+            break
+        last_id = csv_files[-1].id
+        if ensure_structures(csv_files):
+            updated += sum(1 for csv_file in csv_files if csv_file.structure is not None)
+    return updated
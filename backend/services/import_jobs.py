@@ -0,0 +1,251 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import update
+
+from backend.extensions import db
+from backend.dbmodels.import_job import ImportJob
+from backend.dbmodels.user import User
+from backend.services.content_hash import file_sha256
+from backend.services.csv_import import find_duplicate_upload, import_csv_stream
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Jobs, die vor dem Start dieses Prozesses begonnen wurden, gehören keinem lebenden Worker mehr
+_process_started_at = datetime.utcnow()
+_recovery_lock = threading.Lock()
+_recovered = False
+
+# Fortschritt laufender Jobs dieses Prozesses; in der DB nur gedrosselt (und auf SQLite gar nicht) fortgeschrieben
+_live = {}
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("IMPORT_JOB_WORKERS", 2),
+                thread_name_prefix="import-job"
+            )
+        return _executor
+
+
+def create_import_job(app, file, user, force=False):
+    """Stores the upload in IMPORT_JOB_DIR, records a queued job and hands it to the worker pool."""
+    directory = app.config["IMPORT_JOB_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.csv")
+    file.save(path)
+
+    job = ImportJob(
+        filename=file.filename or os.path.basename(path),
+        file_path=path,
+        file_size=os.path.getsize(path),
+        force=force,
+        created_by_id=user.id
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    _get_executor(app).submit(run_import_job, app, job.id)
+    return job
+
+
+def _remove_upload(app, path):
+    if path and not app.config.get("IMPORT_JOB_KEEP_FILES", False):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def recover_import_jobs(app):
+    """
+    Picks up the jobs a previous server process left behind: jobs still
+    "running" that were started before this process are marked as failed
+    and their upload is removed, "queued" jobs are handed to the worker
+    pool again (or failed if their upload is gone). Returns (requeued, failed).
+    """
+    jobs = ImportJob.query.filter(
+        ImportJob.status.in_(("queued", "running")),
+        ImportJob.created_at < _process_started_at
+    ).all()
+    requeue, failed = [], 0
+    for job in jobs:
+        if job.status == "queued" and job.file_path and os.path.exists(job.file_path):
+            requeue.append(job.id)
+            continue
+        if job.status == "running" and (job.started_at is None or job.started_at >= _process_started_at):
+            continue
+        error = "Interrupted by a server restart" if job.status == "running" else "Uploaded file is missing"
+        job.status, job.error, job.finished_at = "failed", error, datetime.utcnow()
+        _remove_upload(app, job.file_path)
+        failed += 1
+    db.session.commit()
+
+    for job_id in requeue:
+        _get_executor(app).submit(run_import_job, app, job_id)
+    if requeue or failed:
+        logger.info("Import jobs recovered: %s requeued, %s failed", len(requeue), failed)
+    return len(requeue), failed
+
+
+def init_import_jobs(app):
+    """
+    Runs recover_import_jobs() once per process, on the first request it
+    serves; scripts that only import the app leave the jobs alone. Disable
+    with IMPORT_JOB_RECOVER=false.
+    """
+    if not app.config.get("IMPORT_JOB_RECOVER", True):
+        return
+
+    @app.before_request
+    def _recover_import_jobs_once():
+        global _recovered
+        if _recovered:
+            return
+        with _recovery_lock:
+            if _recovered:
+                return
+            _recovered = True
+            try:
+                recover_import_jobs(app)
+            except Exception:
+                logger.exception("Recovering import jobs failed")
+                db.session.rollback()
+
+
+class _Progress:
+    """Progress callback for the import; throttles the writes to the job row."""
+
+    def __init__(self, app, job):
+        self.job_id = job.id
+        self.started = time.monotonic()
+        self.interval = app.config.get("IMPORT_JOB_PROGRESS_INTERVAL", 1.0)
+        # Auf SQLite würde ein zweiter Schreiber neben der offenen Import-Transaktion blockieren
+        self.persist = db.engine.dialect.name != "sqlite"
+        self.written_at = 0.0
+        self.phase = None
+        # Momentaufnahme des Jobs, damit Statusabfragen während des Imports ohne DB-Zugriff auskommen
+        self.snapshot = job_to_dict(job)
+        self.snapshot["created_by_id"] = job.created_by_id
+
+    def __call__(self, phase, rows=0):
+        seconds = time.monotonic() - self.started
+        _live[self.job_id] = dict(
+            self.snapshot,
+            phase=phase,
+            rows_processed=rows,
+            seconds=round(seconds, 3),
+            rows_per_second=round(rows / seconds, 1) if seconds and rows else None
+        )
+        now = time.monotonic()
+        if not self.persist or (phase == self.phase and now - self.written_at < self.interval):
+            return
+        self.phase, self.written_at = phase, now
+        # Eigene Verbindung, damit der Stand schon vor dem Commit des Imports sichtbar ist
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(ImportJob).where(ImportJob.id == self.job_id).values(phase=phase, rows_processed=rows)
+            )
+
+
+def run_import_job(app, job_id):
+    file_path = None
+    with app.app_context():
+        try:
+            # Job über die Tabelle beanspruchen: nach einer Wiederaufnahme läuft er trotzdem nur einmal
+            claimed = db.session.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id, ImportJob.status == "queued")
+                .values(status="running", phase="hashing", started_at=datetime.utcnow())
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                return
+            job = db.session.get(ImportJob, job_id)
+            file_path = job.file_path
+
+            progress = _Progress(app, job)
+            progress("hashing")
+            user = db.session.get(User, job.created_by_id)
+            filename, force = job.filename, job.force
+
+            with open(job.file_path, "rb") as stream:
+                content_hash, stream = file_sha256(stream)
+                existing = None if force else find_duplicate_upload(content_hash)
+                if existing:
+                    imported_csv_id, stats = None, None
+                    result = {"message": "File was already imported", "duplicate_of": existing}
+                else:
+                    progress("parsing")
+                    imported, stats = import_csv_stream(stream, filename, user, content_hash=content_hash, progress=progress)
+                    imported_csv_id = imported.id
+                    result = {"message": "CSV imported successfully"}
+
+            result.update({"content_hash": content_hash, "import_stats": stats})
+            job = db.session.get(ImportJob, job_id)
+            job.status, job.phase = "succeeded", "done"
+            job.rows_processed = stats["rows"] if stats else 0
+            job.imported_csv_id = imported_csv_id
+            job.result = result
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+        except Exception as e:
+            logger.exception("Import job %s failed", job_id)
+            db.session.rollback()
+            try:
+                job = db.session.get(ImportJob, job_id)
+                if job is not None:
+                    job.status, job.error, job.finished_at = "failed", str(e), datetime.utcnow()
+                    db.session.commit()
+            except Exception:
+                # Datenbank nicht erreichbar: der Job bleibt "running" bis zur Wiederaufnahme nach einem Neustart
+                logger.exception("Could not mark import job %s as failed", job_id)
+                db.session.rollback()
+
+        finally:
+            _live.pop(job_id, None)
+            # Pfad aus dem Claim, damit hier nach einem DB-Fehler keine weitere Abfrage nötig ist
+            _remove_upload(app, file_path)
+            db.session.remove()
+
+
+def live_job_status(job_id):
+    """Status of a job running in this process (no database access), or None."""
+    return _live.get(job_id)
+
+
+def job_to_dict(job):
+    rows = job.rows_processed or 0
+    if job.started_at:
+        seconds = ((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds()
+    else:
+        seconds = None
+
+    return {
+        "id": job.id,
+        "filename": job.filename,
+        "file_size": job.file_size,
+        "status": job.status,
+        "phase": job.phase,
+        "rows_processed": rows,
+        "seconds": round(seconds, 3) if seconds is not None else None,
+        "rows_per_second": round(rows / seconds, 1) if seconds and rows else None,
+        "error": job.error,
+        "result": job.result,
+        "imported_csv_id": job.imported_csv_id,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,32 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, ohne orjson bleibt Flasks Standard-Provider aktiv
+    orjson = None
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. Output matches the stdlib provider:
+    keys are sorted, dates use Flask's HTTP date format and everything orjson
+    can't encode natively goes through Flask's default hook.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def init_json_provider(app):
+    """Switches the app to the orjson provider if it is installed and enabled."""
+    if orjson is not None and app.config.get("JSON_USE_ORJSON", True):
+        app.json = ORJSONProvider(app)
+    return app.json
@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, jsonify, request
+from sqlalchemy import and_, or_
+
+
+class PageRequest:
+    def __init__(self, limit, cursor=None):
+        self.limit = limit
+        self.cursor = cursor or {}
+
+
+def encode_cursor(created_at=None, id=None, **extra):
+    payload = dict(extra)
+    if id is not None:
+        payload["created_at"] = created_at.isoformat()
+        payload["id"] = id
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, dict):
+            raise ValueError
+        if "id" in payload:
+            payload["created_at"] = datetime.fromisoformat(payload["created_at"])
+            payload["id"] = int(payload["id"])
+            if not 0 <= payload["id"] < 2 ** 63:
+                raise ValueError
+        return payload
+    except (ValueError, TypeError, KeyError, OverflowError):
+        raise ValueError("Invalid cursor")
+
+
+def get_page_request():
+    """
+    Reads ?limit= and ?cursor= from the request. Returns None if neither is
+    given, so the endpoint can keep answering with the full list.
+    """
+    if "limit" not in request.args and "cursor" not in request.args:
+        return None
+
+    default_size = current_app.config.get("PAGE_SIZE_DEFAULT", 100)
+    max_size = current_app.config.get("PAGE_SIZE_MAX", 1000)
+    try:
+        limit = int(request.args.get("limit", default_size))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    limit = min(max(limit, 1), max_size)
+
+    cursor = request.args.get("cursor")
+    return PageRequest(limit, decode_cursor(cursor) if cursor else None)
+
+
+def keyset_page(query, model, page, **cursor_extra):
+    """
+    Returns one page of `query` ordered by (created_at, id) descending and
+    the cursor for the next page (None on the last page).
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    if "id" in page.cursor:
+        created_at, last_id = page.cursor["created_at"], page.cursor["id"]
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < last_id)
+        ))
+
+    items = query.limit(page.limit + 1).all()
+    if len(items) <= page.limit:
+        return items, None
+
+    items = items[:page.limit]
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.id, **cursor_extra)
+
+
+def page_response(items, next_cursor):
+    return jsonify({"items": items, "next_cursor": next_cursor})
@@ -0,0 +1,238 @@
+import re
+
+from flask import current_app
+from sqlalchemy import bindparam, case, column, func, literal_column, table, text
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Question, Section
+from backend.services.question_versions import latest_only
+from backend.services.version_storage import materialized
+
+SEARCH_COLUMNS = ("variable_name", "label", "field_note", "field_annotation")
+
+# Gewichtung je Spalte: Variablenname vor Label vor Field Note vor Annotation
+POSTGRES_WEIGHTS = ("A", "B", "C", "D")
+SQLITE_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+FTS_TABLE = "questions_fts"
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+SEARCH_TRIGGER = "questions_search_vector"
+
+# PostgreSQL-Datenbanken (URL), deren Trigger schon gefunden wurde
+_postgres_ready = set()
+
+
+class SearchIndexMissing(RuntimeError):
+    """The database has no search index yet (init_db.py / ensure_search_index() not run)."""
+
+
+def _stored_value_sql(row, name):
+    # Spaltenwert wie gelesen (vgl. version_storage.materialized): eigene Spalte, sonst der Snapshot
+    # einer Delta-Version bzw. dessen geteilter Inhalt, sonst der geteilte Inhalt der Frage
+    if name == "variable_name":
+        return f"{row}.{name}"
+    return (
+        f"coalesce({row}.{name}, "
+        f"(SELECT coalesce(base.{name}, base_shared.{name}) FROM questions AS base "
+        f"LEFT JOIN question_contents AS base_shared ON base_shared.id = base.content_id "
+        f"WHERE base.id = {row}.base_id), "
+        f"(SELECT shared.{name} FROM question_contents AS shared WHERE shared.id = {row}.content_id))"
+    )
+
+
+def _postgres_vector_sql(config, row):
+    parts = [
+        f"setweight(to_tsvector('{config}'::regconfig, coalesce({_stored_value_sql(row, name)}, '')), '{weight}')"
+        for name, weight in zip(SEARCH_COLUMNS, POSTGRES_WEIGHTS)
+    ]
+    return " || ".join(parts)
+
+
+def _ensure_postgres_index(config):
+    generated = db.session.execute(text(
+        "SELECT attgenerated FROM pg_attribute "
+        "WHERE attrelid = 'questions'::regclass AND attname = 'search_vector' AND NOT attisdropped"
+    )).scalar()
+    # Spalte und GIN-Index sind im Modell deklariert (Migration e5d27b90c4f1); hier nur für ältere Datenbanken
+    db.session.execute(text("ALTER TABLE questions ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+    if generated:
+        # Frühere Versionen: generierte Spalte, die nur die eigenen Spalten sieht
+        db.session.execute(text("ALTER TABLE questions ALTER COLUMN search_vector DROP EXPRESSION"))
+
+    body = f" BEGIN NEW.search_vector := {_postgres_vector_sql(config, 'NEW')}; RETURN NEW; END "
+    current = db.session.execute(
+        text("SELECT prosrc FROM pg_proc WHERE proname = :name"), {"name": SEARCH_TRIGGER}
+    ).scalar()
+    db.session.execute(text(
+        f"CREATE OR REPLACE FUNCTION {SEARCH_TRIGGER}() RETURNS trigger LANGUAGE plpgsql AS $${body}$$"
+    ))
+    db.session.execute(text(f"DROP TRIGGER IF EXISTS {SEARCH_TRIGGER} ON questions"))
+    db.session.execute(text(
+        f"CREATE TRIGGER {SEARCH_TRIGGER} BEFORE INSERT OR UPDATE ON questions "
+        f"FOR EACH ROW EXECUTE FUNCTION {SEARCH_TRIGGER}()"
+    ))
+    # Geänderte Definition (oder vorher generierte Spalte): alle Fragen neu indexieren, sonst nur neue
+    db.session.execute(text(
+        f"UPDATE questions SET search_vector = {_postgres_vector_sql(config, 'questions')}"
+        + ("" if generated or current != body else " WHERE search_vector IS NULL")
+    ))
+    db.session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_questions_search_vector ON questions USING GIN (search_vector)"
+    ))
+
+
+def _sqlite_statements():
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(_stored_value_sql("new", name) for name in SEARCH_COLUMNS)
+    return {
+        FTS_TABLE: f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({columns}, tokenize='unicode61')",
+        "questions_fts_ai": (
+            f"CREATE TRIGGER questions_fts_ai AFTER INSERT ON questions BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ),
+        "questions_fts_ad": (
+            f"CREATE TRIGGER questions_fts_ad AFTER DELETE ON questions BEGIN "
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END"
+        ),
+        "questions_fts_au": (
+            f"CREATE TRIGGER questions_fts_au AFTER UPDATE ON questions BEGIN "
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ),
+    }
+
+
+def _ensure_sqlite_index():
+    statements = _sqlite_statements()
+    existing = dict(db.session.execute(
+        text("SELECT name, sql FROM sqlite_master WHERE name IN :names").bindparams(bindparam("names", expanding=True)),
+        {"names": list(statements)}
+    ).all())
+    if existing == statements:
+        return
+
+    # Fehlend oder von einer früheren Version (z. B. External-Content-Tabelle): neu anlegen und befüllen
+    for name in statements:
+        if name != FTS_TABLE:
+            db.session.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    db.session.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    for statement in statements.values():
+        db.session.execute(text(statement))
+    columns = ", ".join(SEARCH_COLUMNS)
+    values = ", ".join(_stored_value_sql("questions", name) for name in SEARCH_COLUMNS)
+    db.session.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, {columns}) SELECT questions.id, {values} FROM questions"))
+
+
+def ensure_search_index():
+    """
+    Creates the full-text index over the question bank if it is missing or
+    outdated. The index covers the text of every version as it reads, i.e.
+    delta versions are indexed with the columns inherited from their
+    snapshot and imported questions with their shared content.
+
+    PostgreSQL: the tsvector column Question.search_vector with its GIN
+    index, filled by a trigger. SQLite: FTS5 table kept in sync by triggers (for local
+    testing). Other databases are left alone; search then returns 400.
+    """
+    dialect = _dialect()
+    if dialect == "postgresql":
+        _ensure_postgres_index(current_app.config.get("SEARCH_TEXT_CONFIG", "simple"))
+    elif dialect == "sqlite":
+        _ensure_sqlite_index()
+    else:
+        return False
+
+    db.session.commit()
+    return True
+
+
+def _require_index(dialect):
+    # Datenbanken aus db.create_all() oder alembic haben noch keinen Index (init_db.py nicht gelaufen)
+    if dialect == "sqlite":
+        # Auf SQLite billig: fehlende FTS-Tabelle oder Trigger werden beim ersten Suchen angelegt
+        names = [FTS_TABLE, "questions_fts_ai", "questions_fts_ad", "questions_fts_au"]
+        found = db.session.execute(
+            text("SELECT count(*) FROM sqlite_master WHERE name IN :names").bindparams(bindparam("names", expanding=True)),
+            {"names": names}
+        ).scalar()
+        if found != len(names):
+            _ensure_sqlite_index()
+            db.session.commit()
+        return
+
+    # PostgreSQL: das Befüllen schreibt jede Frage neu, das gehört nicht in eine Suchanfrage
+    url = str(db.session.get_bind().url)
+    if url in _postgres_ready:
+        return
+    if not db.session.execute(
+        text("SELECT 1 FROM pg_trigger WHERE tgname = :name"), {"name": SEARCH_TRIGGER}
+    ).first():
+        raise SearchIndexMissing("Search index is not set up yet, run init_db.py")
+    _postgres_ready.add(url)
+
+
+def search_terms(query):
+    """Splits the user input into word terms; every term is matched as prefix."""
+    return _TERM.findall(query or "")[:16]
+
+
+def search_questions(serializer, query, field_types=None, latest=True, limit=20, offset=0):
+    """
+    Ranked full-text search. Returns (items, has_more); every item is the
+    serialized question plus its "rank" (higher is better). Raises
+    SearchIndexMissing on a PostgreSQL database without the search trigger.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+
+    dialect = _dialect()
+    if dialect in ("postgresql", "sqlite"):
+        _require_index(dialect)
+    if dialect == "postgresql":
+        config = current_app.config.get("SEARCH_TEXT_CONFIG", "simple")
+        ts_query = func.to_tsquery(literal_column(f"'{config}'::regconfig"), " & ".join(f"{term}:*" for term in terms))
+        vector = Question.search_vector
+        rank = func.ts_rank_cd(vector, ts_query).label("rank")
+        stmt = serializer.select(rank).select_from(Question).where(vector.op("@@")(ts_query))
+        order = rank.desc()
+    elif dialect == "sqlite":
+        fts = table(FTS_TABLE, column("rowid"))
+        match = " AND ".join(f'"{term}"*' for term in terms)
+        weights = ", ".join(str(weight) for weight in SQLITE_WEIGHTS)
+        # bm25() ist negativ, kleiner = besser -> Vorzeichen drehen
+        rank = (-literal_column(f"bm25({FTS_TABLE}, {weights})")).label("rank")
+        stmt = (
+            serializer.select(rank)
+            .select_from(Question)
+            .join(fts, fts.c.rowid == Question.id)
+            .where(literal_column(FTS_TABLE).op("MATCH")(match))
+        )
+        order = literal_column(f"bm25({FTS_TABLE}, {weights})").asc()
+    else:
+        raise ValueError(f"Full-text search is not supported on {dialect}")
+
+    stmt = stmt.join(Section, Question.section_id == Section.id)
+    if field_types:
+        stmt = stmt.where(materialized("field_type").in_(field_types))
+    if latest:
+        stmt = latest_only(stmt)
+
+    # Exakter Treffer auf den Variablennamen steht immer vorne
+    exact = case((Question.variable_name == query.strip(), 1), else_=0)
+    rows = db.session.execute(
+        stmt.order_by(exact.desc(), order, Question.id.desc()).offset(offset).limit(limit + 1)
+    ).all()
+
+    items = []
+    for row in rows[:limit]:
+        item = serializer(row[1:])
+        item["rank"] = float(row[0] or 0)
+        items.append(item)
+    return items, len(rows) > limit
@@ -0,0 +1,142 @@
+from sqlalchemy import and_, bindparam, exists, func, or_, select, update
+from sqlalchemy.orm import aliased
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Question, parse_version
+
+
+def lock_version_group(section_id, variable_name):
+    """
+    Locks the oldest row of a (section, variable) history with SELECT ... FOR
+    UPDATE, so concurrent edits of the same question allocate versions one
+    after another. SQLite has no row locks: there an empty UPDATE takes the
+    database write lock instead, other writers wait for it (busy timeout).
+    For an empty group the unique constraint on the version columns is the
+    fallback.
+    """
+    if db.engine.dialect.name == "sqlite":
+        # Trifft keine Zeile, startet aber die Schreibtransaktion (pysqlite liest ohne BEGIN)
+        table = Question.__table__
+        db.session.execute(update(table).where(table.c.id == -1).values(id=table.c.id))
+        return None
+    return (
+        db.session.query(Question.id)
+        .filter(Question.section_id == section_id, Question.variable_name == variable_name)
+        .order_by(Question.id.asc())
+        .limit(1)
+        .with_for_update()
+        .first()
+    )
+
+
+def next_version_numbers(question, variable_name=None):
+    """
+    Returns (major, minor) for a new version derived from `question`:
+    the major number is bumped, the minor number continues after the highest
+    existing minor of that major for the same section and (target) variable.
+    """
+    major = question.version_major
+    if major is None:
+        major = parse_version(question.version)[0] or 0
+    major += 1
+
+    max_minor = db.session.query(func.max(Question.version_minor)).filter(
+        Question.section_id == question.section_id,
+        Question.variable_name == (variable_name or question.variable_name),
+        Question.version_major == major
+    ).scalar()
+    return major, (max_minor + 1 if max_minor is not None else 0)
+
+
+def latest_questions_query():
+    """Query over the newest version of every (section, variable_name)."""
+    order = (Question.version_major.desc(), Question.version_minor.desc(), Question.id.desc())
+
+    if db.session.get_bind().dialect.name == "postgresql":
+        return (
+            Question.query
+            .distinct(Question.section_id, Question.variable_name)
+            .order_by(Question.section_id, Question.variable_name, *order)
+        )
+
+    ranked = select(
+        Question.id,
+        func.row_number().over(
+            partition_by=(Question.section_id, Question.variable_name),
+            order_by=order
+        ).label("rank")
+    ).subquery()
+    return (
+        Question.query
+        .join(ranked, ranked.c.id == Question.id)
+        .filter(ranked.c.rank == 1)
+        .order_by(Question.section_id, Question.variable_name)
+    )
+
+
+def latest_only(stmt, as_of=None):
+    """
+    Restricts a statement over Question to the newest version of every
+    (section, variable): NOT EXISTS a newer row, using the unique index
+    on the version columns. With `as_of`, only versions modified up to
+    that point in time are considered (the state of the form back then).
+    """
+    newer = aliased(Question)
+    conditions = [
+        newer.section_id == Question.section_id,
+        newer.variable_name == Question.variable_name,
+        or_(
+            newer.version_major > Question.version_major,
+            and_(newer.version_major == Question.version_major, newer.version_minor > Question.version_minor)
+        )
+    ]
+    if as_of is not None:
+        conditions.append(newer.last_modified <= as_of)
+        stmt = stmt.where(Question.last_modified <= as_of)
+    return stmt.where(~exists().where(and_(*conditions)))
+
+
+def update_questions(params):
+    """
+    Executemany UPDATE of questions by id; every dict holds "id" plus the same
+    columns. Unlike the ORM bulk update this keeps last_modified: backfills
+    and storage rewrites are no edits, and latest_only(as_of) relies on the
+    timestamps. Objects already loaded in the session are not refreshed.
+    """
+    if not params:
+        return
+    table = Question.__table__
+    columns = [name for name in params[0] if name != "id"]
+    # Bind-Namen dürfen nicht wie die Spalten heißen (reserviert für SET)
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values({name: bindparam(f"_{name}", type_=table.c[name].type) for name in columns})
+        .values(last_modified=table.c.last_modified)
+    )
+    db.session.execute(stmt, [
+        {"_id": param["id"], **{f"_{name}": param[name] for name in columns}}
+        for param in params
+    ])
+
+
+def backfill_version_numbers(batch_size=1000):
+    """Fills version_major/version_minor for rows created before the columns existed."""
+    updated = 0
+    while True:
+        rows = (
+            db.session.query(Question.id, Question.version)
+            .filter(Question.version_major.is_(None))
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        params = []
+        for question_id, version in rows:
+            major, minor = parse_version(version)
+            params.append({"id": question_id, "version_major": major or 0, "version_minor": minor or 0})
+        update_questions(params)
+        db.session.commit()
+        updated += len(params)
+    return updated
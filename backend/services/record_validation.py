@@ -0,0 +1,386 @@
+import csv
+import re
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Form, Question, Section
+from backend.dbmodels.custom_form import CustomForm, CustomQuestion, CustomSection
+from backend.services.branching_logic import BranchingLogicError, checkbox_column, compile_logic
+from backend.services.csv_stream import DEFAULT_CHUNK_SIZE, iter_decoded_lines
+from backend.services.question_versions import latest_only
+from backend.services.version_storage import materialized, with_snapshots
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_EXAMPLES = 5
+
+# Spalten, die REDCap zusätzlich zu den Feldern exportiert
+SYSTEM_COLUMNS = {
+    "redcap_event_name", "redcap_repeat_instrument", "redcap_repeat_instance",
+    "redcap_data_access_group", "redcap_survey_identifier",
+}
+
+# Felder ohne eigene Datenspalte bzw. ohne prüfbaren Inhalt
+SKIPPED_TYPES = {"descriptive", "file", "signature", "sql"}
+
+_INTEGER = re.compile(r"^[-+]?\d+$")
+_NUMBER = re.compile(r"^[-+]?(?:\d+(?:\.\d*)?|\.\d+)$")
+_NUMBER_COMMA = re.compile(r"^[-+]?(?:\d+(?:,\d*)?|,\d+)$")
+
+# Formatprüfungen je validation_type; REDCap exportiert Datumswerte immer als Y-M-D
+_PATTERNS = {
+    "integer": _INTEGER,
+    "number": _NUMBER,
+    "number_comma_decimal": _NUMBER_COMMA,
+    "time": re.compile(r"^(?:[01]\d|2[0-3]):[0-5]\d$"),
+    "time_mm_ss": re.compile(r"^[0-5]\d:[0-5]\d$"),
+    "email": re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$"),
+    "phone": re.compile(r"^[\d\s()+\-.]{7,}$"),
+    "zipcode": re.compile(r"^\d{5}(?:-\d{4})?$"),
+    "alpha_only": re.compile(r"^[A-Za-z]+$"),
+}
+_DATE_FORMATS = {
+    "date": "%Y-%m-%d",
+    "datetime": "%Y-%m-%d %H:%M",
+    "datetime_seconds": "%Y-%m-%d %H:%M:%S",
+}
+
+
+def _number(value):
+    return float(value.replace(",", "."))
+
+
+def _value_parser(validation_type):
+    """(pattern or None, converter for min/max comparisons or None) of a validation type."""
+    validation_type = (validation_type or "").strip()
+    if validation_type in ("integer", "int"):
+        return _INTEGER, int
+    if validation_type in ("number", "float") or re.match(r"^number_\d+dp$", validation_type):
+        return _NUMBER, float
+    if validation_type.startswith("number_") and validation_type.endswith("comma_decimal"):
+        return _NUMBER_COMMA, _number
+    for prefix in ("datetime_seconds", "datetime", "date"):
+        if validation_type == prefix or validation_type.startswith(prefix + "_"):
+            pattern = _DATE_FORMATS[prefix]
+            return None, lambda value, pattern=pattern: datetime.strptime(value, pattern)
+    return _PATTERNS.get(validation_type), None
+
+
+def choice_keys(choices):
+    """Allowed raw values of stored choices (dict, list of {value, label} or "1, Yes | 0, No")."""
+    if not choices:
+        return set()
+    if isinstance(choices, dict):
+        return {str(key).strip() for key in choices}
+    if isinstance(choices, (list, tuple)):
+        return {
+            str(item.get("value", "")).strip() if isinstance(item, dict) else str(item).strip()
+            for item in choices
+        }
+    return {part.split(",", 1)[0].strip() for part in str(choices).split("|") if part.strip()}
+
+
+class FieldSpec:
+    __slots__ = (
+        "name", "field_type", "choices", "required", "validation_type", "validation_min", "validation_max",
+        "branching_logic",
+    )
+
+    def __init__(self, name, field_type, choices, required, validation_type, validation_min, validation_max,
+                 branching_logic=None):
+        self.name = name
+        self.field_type = (field_type or "text").strip().lower()
+        self.choices = choices
+        self.required = bool(required)
+        self.validation_type = validation_type
+        self.validation_min = validation_min
+        self.validation_max = validation_max
+        self.branching_logic = branching_logic
+
+
+def _value_check(spec):
+    """
+    Returns check(value) -> error code or None for one data column of `spec`.
+    Codes: required, invalid_choice, invalid_format, out_of_range.
+    """
+    allowed = None
+    pattern, convert = None, None
+    low = high = None
+
+    if spec.field_type in ("radio", "dropdown"):
+        allowed = choice_keys(spec.choices)
+    elif spec.field_type in ("yesno", "truefalse"):
+        allowed = {"0", "1"}
+    elif spec.field_type == "calc":
+        pattern, convert = _NUMBER, float
+    elif spec.field_type == "slider":
+        pattern, convert = _INTEGER, int
+        low, high = 0, 100
+    else:
+        pattern, convert = _value_parser(spec.validation_type)
+
+    if convert is not None:
+        for bound, name in ((spec.validation_min, "low"), (spec.validation_max, "high")):
+            if bound in (None, ""):
+                continue
+            try:
+                # "today"/"now" und Feldverweise als Grenzen werden nicht geprüft
+                if name == "low":
+                    low = convert(str(bound).strip())
+                else:
+                    high = convert(str(bound).strip())
+            except ValueError:
+                pass
+
+    required = spec.required
+
+    def check(value):
+        value = value.strip()
+        if not value:
+            return "required" if required else None
+        if allowed is not None:
+            return None if value in allowed else "invalid_choice"
+        if pattern is not None and not pattern.match(value):
+            return "invalid_format"
+        if convert is not None:
+            try:
+                converted = convert(value)
+            except ValueError:
+                return "invalid_format"
+            if (low is not None and converted < low) or (high is not None and converted > high):
+                return "out_of_range"
+        return None
+
+    return check
+
+
+class _FieldResult:
+    __slots__ = ("errors", "codes", "examples")
+
+    def __init__(self):
+        self.errors = 0
+        self.codes = {}
+        self.examples = []
+
+    def add(self, code, row, record, column, value):
+        self.errors += 1
+        self.codes[code] = self.codes.get(code, 0) + 1
+        if len(self.examples) < MAX_EXAMPLES:
+            self.examples.append({"row": row, "record": record, "column": column, "value": value, "code": code})
+
+    def to_dict(self):
+        return {"errors": self.errors, "codes": self.codes, "examples": self.examples}
+
+
+class RecordValidator:
+    """
+    Column-wise validator for REDCap record exports of one form.
+
+    Records are read in batches and transposed into columns; every column
+    is checked per distinct value (exports repeat the same codes, dates and
+    numbers over and over), and only columns containing an invalid value
+    are scanned again to locate the failing rows. A blank required field
+    only counts as an error in rows where its branching logic shows it.
+    """
+
+    def __init__(self, fields, form_name=None):
+        self.fields = [spec for spec in fields if spec.field_type not in SKIPPED_TYPES]
+        self.form_name = form_name
+
+    @staticmethod
+    def _logic(spec, positions, logic_columns, logic_errors):
+        """Compiled branching logic of a required field, or None if it is always shown."""
+        if not spec.required or not (spec.branching_logic or "").strip():
+            return None
+        try:
+            logic = compile_logic(spec.branching_logic)
+        except BranchingLogicError as e:
+            # Nicht auswertbar: das Feld gilt als immer sichtbar
+            logic_errors[spec.name] = str(e)
+            return None
+        for variable in logic.variables:
+            prefix = checkbox_column(variable, "")
+            logic_columns.update(
+                (name, index) for name, index in positions.items()
+                if name == variable or name.startswith(prefix)
+            )
+        return logic
+
+    def _plan(self, header):
+        positions = {name.strip(): index for index, name in enumerate(header)}
+        columns, checkbox_groups, missing = [], [], []
+        logic_columns, logic_errors = set(), {}
+        # Die erste Spalte ist immer der Record-Identifier, auch wenn das Formular ihn nicht enthält
+        known = set(SYSTEM_COLUMNS) | {header[0].strip()}
+
+        for spec in self.fields:
+            logic = self._logic(spec, positions, logic_columns, logic_errors)
+            if spec.field_type == "checkbox":
+                codes = sorted(choice_keys(spec.choices))
+                names = [f"{spec.name}___{code}".replace("-", "_").lower() for code in codes]
+                present = [(name, positions[name]) for name in names if name in positions]
+                known.update(names)
+                if not present:
+                    missing.append(spec.name)
+                    continue
+                binary = FieldSpec(spec.name, "yesno", None, False, None, None, None)
+                for name, index in present:
+                    columns.append((spec.name, name, index, _value_check(binary), None))
+                if spec.required:
+                    checkbox_groups.append((spec.name, [index for _, index in present], logic))
+            else:
+                known.add(spec.name)
+                if spec.name not in positions:
+                    missing.append(spec.name)
+                    continue
+                columns.append((spec.name, spec.name, positions[spec.name], _value_check(spec), logic))
+
+        unknown = [
+            name for name in positions
+            if name not in known and not name.endswith("_complete")
+        ]
+        return columns, checkbox_groups, missing, unknown, sorted(logic_columns), logic_errors
+
+    def validate_stream(self, stream, batch_size=DEFAULT_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Validates an uploaded records CSV (binary stream) and returns the error summary."""
+        started = time.perf_counter()
+        reader = csv.reader(iter_decoded_lines(stream, chunk_size))
+        header = next(reader, None)
+        if not header:
+            raise ValueError("CSV file is empty")
+
+        width = len(header)
+        columns, checkbox_groups, missing, unknown, logic_columns, logic_errors = self._plan(header)
+        plan = (columns, checkbox_groups, logic_columns)
+        results = {}
+        error_rows = set()
+        rows = malformed = 0
+
+        def result(field):
+            entry = results.get(field)
+            if entry is None:
+                entry = results[field] = _FieldResult()
+            return entry
+
+        batch = []
+        for row in reader:
+            if not row:
+                # Leerzeile
+                continue
+            if len(row) != width:
+                # Zu lange Zeilen werden gekürzt, zu kurze aufgefüllt; beide zählen als fehlerhaft
+                malformed += 1
+                row = row[:width] if len(row) > width else row + [""] * (width - len(row))
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self._check_batch(batch, rows, plan, result, error_rows)
+                rows += len(batch)
+                batch = []
+        if batch:
+            self._check_batch(batch, rows, plan, result, error_rows)
+            rows += len(batch)
+
+        seconds = time.perf_counter() - started
+        return {
+            "form": self.form_name,
+            "rows": rows,
+            "rows_with_errors": len(error_rows),
+            "errors": sum(entry.errors for entry in results.values()),
+            "fields": {field: entry.to_dict() for field, entry in results.items()},
+            "missing_columns": missing,
+            "unknown_columns": unknown,
+            "malformed_rows": malformed,
+            "logic_errors": logic_errors,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+        }
+
+    @staticmethod
+    def _check_batch(batch, offset, plan, result, error_rows):
+        columns, checkbox_groups, logic_columns = plan
+        table = list(zip(*batch))
+        records = table[0] if table else ()
+        visibility, logic_records = {}, []
+
+        def shown(logic):
+            # Sichtbarkeit je Ausdruck und Batch, erst berechnet, wenn ein Pflichtfeld leer ist
+            if logic.source not in visibility:
+                if not logic_records:
+                    logic_records.extend({name: row[index] for name, index in logic_columns} for row in batch)
+                visibility[logic.source] = logic.evaluate_many(logic_records)
+            return visibility[logic.source]
+
+        for field, column, index, check, logic in columns:
+            values = table[index]
+            # Jeder Wert wird nur einmal geprüft
+            invalid = {}
+            for value in set(values):
+                code = check(value)
+                if code is not None:
+                    invalid[value] = code
+            if not invalid:
+                continue
+            entry = None
+            visible = shown(logic) if logic is not None and "required" in invalid.values() else None
+            for position, value in enumerate(values):
+                code = invalid.get(value)
+                if code is None or (code == "required" and visible is not None and not visible[position]):
+                    continue
+                entry = entry or result(field)
+                entry.add(code, offset + position + 1, records[position], column, value)
+                error_rows.add(offset + position)
+
+        for field, indexes, logic in checkbox_groups:
+            entry = None
+            for position, checked in enumerate(zip(*(table[index] for index in indexes))):
+                if "1" in checked or (logic is not None and not shown(logic)[position]):
+                    continue
+                entry = entry or result(field)
+                entry.add("required", offset + position + 1, records[position], field, "")
+                error_rows.add(offset + position)
+
+
+def form_validator(form_id):
+    """Validator for the newest question versions of a Form, or None if it has no questions."""
+    rows = db.session.execute(
+        with_snapshots(latest_only(
+            select(
+                Question.variable_name, materialized("field_type"), materialized("choices"), materialized("required"),
+                materialized("validation_type"), materialized("validation_min"), materialized("validation_max"),
+                materialized("branching_logic")
+            )
+            .join(Section, Question.section_id == Section.id)
+            .where(Section.form_id == form_id)
+        )).order_by(Section.order, Question.id)
+    ).all()
+    if not rows:
+        return None
+    return RecordValidator([FieldSpec(*row) for row in rows], form_name=db.session.get(Form, form_id).name)
+
+
+def custom_form_validator(custom_form_id):
+    """Validator for a CustomForm, or None if it has no questions."""
+    rows = db.session.execute(
+        select(
+            CustomQuestion.variable_name, CustomQuestion.field_type, CustomQuestion.choices, CustomQuestion.required,
+            CustomQuestion.validation_type, CustomQuestion.validation_min, CustomQuestion.validation_max,
+            CustomQuestion.branching_logic
+        )
+        .join(CustomSection, CustomQuestion.section_id == CustomSection.id)
+        .where(CustomSection.form_id == custom_form_id)
+        .order_by(CustomSection.order, CustomQuestion.id)
+    ).all()
+    if not rows:
+        return None
+    return RecordValidator([FieldSpec(*row) for row in rows], form_name=db.session.get(CustomForm, custom_form_id).name)
+
+
+def validate_upload(validator, file, config):
+    """Runs `validator` over an uploaded records CSV with the batch/chunk sizes from the config."""
+    return validator.validate_stream(
+        file.stream,
+        batch_size=config.get("VALIDATION_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+        chunk_size=config.get("IMPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+    )
@@ -0,0 +1,119 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import event, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from backend.extensions import db
+from backend.dbmodels.data_generation import DataGeneration
+
+_lock = threading.Lock()
+_state = {"generation": None, "checked_at": 0.0}
+_cache = OrderedDict()
+
+
+def bump_data_generation():
+    """
+    Invalidates all cached catalog responses. Call it inside the write
+    transaction, before commit, so the new generation becomes visible
+    together with the data.
+    """
+    table = DataGeneration.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # Upsert: zwei Schreiber auf einer leeren Tabelle legen die Zeile nicht beide an
+        insert = (postgresql if dialect == "postgresql" else sqlite).insert(table).values(id=1, value=1)
+        db.session.execute(insert.on_conflict_do_update(index_elements=["id"], set_={"value": table.c.value + 1}))
+    else:
+        result = db.session.execute(
+            update(DataGeneration)
+            .where(DataGeneration.id == 1)
+            .values(value=DataGeneration.value + 1)
+        )
+        if not result.rowcount:
+            db.session.add(DataGeneration(id=1, value=1))
+    db.session.info["data_generation_bumped"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _reset_generation_after_commit(session):
+    if session.info.pop("data_generation_bumped", False):
+        _state["checked_at"] = 0.0
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_bump_after_rollback(session):
+    session.info.pop("data_generation_bumped", None)
+
+
+def current_generation():
+    """
+    Current data generation. It is re-read from the database at most every
+    CACHE_GENERATION_TTL seconds (and right after a local write), so
+    conditional requests in between are answered without a query.
+    """
+    ttl = current_app.config.get("CACHE_GENERATION_TTL", 1.0)
+    now = time.monotonic()
+    if _state["generation"] is None or now - _state["checked_at"] > ttl:
+        value = db.session.query(DataGeneration.value).filter(DataGeneration.id == 1).scalar()
+        _state["generation"] = value or 0
+        _state["checked_at"] = now
+    return _state["generation"]
+
+
+def _etag_for(generation, key):
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return f"g{generation}-{digest}"
+
+
+def cached_response(view):
+    """
+    Caches the JSON body of a GET endpoint per (data generation, URL) and
+    answers If-None-Match with 304 while the generation is unchanged.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        generation = current_generation()
+        key = request.full_path
+        etag = _etag_for(generation, key)
+
+        if request.if_none_match.contains(etag):
+            response = make_response("", 304)
+            response.set_etag(etag)
+            return response
+
+        with _lock:
+            cached = _cache.get((generation, key))
+            if cached is not None:
+                _cache.move_to_end((generation, key))
+
+        if cached is not None:
+            body, mimetype = cached
+            response = make_response(body)
+            response.mimetype = mimetype
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            _store(generation, key, response.get_data(), response.mimetype)
+
+        response.set_etag(etag)
+        return response
+
+    return wrapper
+
+
+def _store(generation, key, body, mimetype):
+    max_entries = current_app.config.get("CACHE_MAX_ENTRIES", 256)
+    with _lock:
+        stale = [k for k in _cache if k[0] != generation]
+        for k in stale:
+            del _cache[k]
+        _cache[(generation, key)] = (body, mimetype)
+        while len(_cache) > max_entries:
+            _cache.popitem(last=False)
@@ -0,0 +1,242 @@
+from flask import request
+from sqlalchemy import DateTime, select
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Form, Section, Question
+from backend.dbmodels.custom_form import CustomForm, CustomSection, CustomQuestion
+from backend.dbmodels.user import User
+from backend.services.version_storage import materialized, with_snapshots
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class RowSerializer:
+    """
+    Serializes plain result rows (column tuples) into dicts, without hydrating
+    ORM objects. Keys, columns and value converters are resolved once when the
+    serializer is built; per row only a zip and the converters remain.
+    """
+
+    def __init__(self, fields, converters=None, constants=None, prepare=None):
+        # fields: Liste von (JSON-Schlüssel, Spalte); DateTime-Spalten werden automatisch als ISO-String ausgegeben
+        # prepare: ergänzt jedes SELECT um Joins, die die Spalten brauchen
+        self.fields = list(fields)
+        self.keys = tuple(key for key, _ in self.fields)
+        self.columns = [column for _, column in self.fields]
+        self.converters = dict(converters or {})
+        for key, column in self.fields:
+            if key not in self.converters and isinstance(column.type, DateTime):
+                self.converters[key] = _isoformat
+        self.constants = dict(constants or {})
+        self.prepare = prepare
+        self._converter_items = tuple(self.converters.items())
+        self._subsets = {}
+
+    def __call__(self, row):
+        item = dict(zip(self.keys, row))
+        for key, convert in self._converter_items:
+            item[key] = convert(item[key])
+        if self.constants:
+            item.update(self.constants)
+        return item
+
+    def only(self, keys):
+        """
+        Serializer restricted to `keys` (in declaration order, "id" always kept).
+        Subsets are built once per key set and reused.
+        """
+        wanted = frozenset(keys) | {"id"}
+        unknown = wanted - set(self.keys) - set(self.constants)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        subset = self._subsets.get(wanted)
+        if subset is None:
+            subset = RowSerializer(
+                [(key, column) for key, column in self.fields if key in wanted],
+                converters={key: fn for key, fn in self.converters.items() if key in wanted},
+                constants={key: value for key, value in self.constants.items() if key in wanted},
+                prepare=self.prepare,
+            )
+            self._subsets[wanted] = subset
+        return subset
+
+    def labelled(self, prefix):
+        """Columns labelled "<prefix><key>", for joins whose column names would collide."""
+        return [column.label(f"{prefix}{key}") for key, column in self.fields]
+
+    def select(self, *key_columns):
+        """SELECT of the serializer columns, optionally prefixed by grouping columns."""
+        stmt = select(*key_columns, *self.columns)
+        return self.prepare(stmt) if self.prepare else stmt
+
+    def all(self, stmt):
+        return [self(row) for row in db.session.execute(stmt)]
+
+    def grouped(self, stmt, key_count=1):
+        """
+        Executes a statement built with select(key_column) and returns
+        {key: [item, ...]} in result order.
+        """
+        groups = {}
+        for row in db.session.execute(stmt):
+            key = row[0] if key_count == 1 else tuple(row[:key_count])
+            groups.setdefault(key, []).append(self(row[key_count:]))
+        return groups
+
+
+FORM = RowSerializer([
+    ("id", Form.id),
+    ("name", Form.name),
+    ("description", Form.description),
+    ("created_at", Form.created_at),
+])
+
+SECTION = RowSerializer([
+    ("id", Section.id),
+    ("title", Section.title),
+    ("order", Section.order),
+    ("form_id", Section.form_id),
+])
+
+# Inhaltsspalten der Fragen werden für Delta-Versionen aus ihrem Snapshot ergänzt (with_snapshots)
+_QUESTION_BASE = [
+    ("id", Question.id),
+    ("variable_name", Question.variable_name),
+    ("label", materialized("label")),
+    ("field_type", materialized("field_type")),
+    ("choices", materialized("choices")),
+    ("required", materialized("required")),
+    ("dependencies", materialized("dependencies")),
+    ("validation_type", materialized("validation_type")),
+    ("validation_min", materialized("validation_min")),
+    ("validation_max", materialized("validation_max")),
+    ("identifier", materialized("identifier")),
+    ("branching_logic", materialized("branching_logic")),
+    ("field_annotation", materialized("field_annotation")),
+    ("field_note", materialized("field_note")),
+    ("custom_alignment", materialized("custom_alignment")),
+    ("question_number", materialized("question_number")),
+    ("matrix_group_name", materialized("matrix_group_name")),
+    ("matrix_ranking", materialized("matrix_ranking")),
+]
+
+# Nested unter ihrer Section (/api/forms/full)
+QUESTION = RowSerializer(_QUESTION_BASE, prepare=with_snapshots)
+
+# Flache Liste mit Fremdschlüssel (/api/form-builder/data)
+QUESTION_FLAT = RowSerializer(_QUESTION_BASE + [("section_id", Question.section_id)], prepare=with_snapshots)
+
+# Eine Version einer Frage inklusive Section-Kontext (/api/questions/*); erwartet einen Join auf Section
+QUESTION_VERSION = RowSerializer(
+    [
+        ("id", Question.id),
+        ("form_id", Section.form_id),
+        ("section_id", Section.id),
+        ("section", Section.title),
+        ("question_text", materialized("label")),
+        ("variable_name", Question.variable_name),
+        ("type", materialized("field_type")),
+        ("choices", materialized("choices")),
+        ("required", materialized("required")),
+        ("validation_type", materialized("validation_type")),
+        ("validation_min", materialized("validation_min")),
+        ("validation_max", materialized("validation_max")),
+        ("identifier", materialized("identifier")),
+        ("branching_logic", materialized("branching_logic")),
+        ("field_annotation", materialized("field_annotation")),
+        ("field_note", materialized("field_note")),
+        ("custom_alignment", materialized("custom_alignment")),
+        ("question_number", materialized("question_number")),
+        ("matrix_group_name", materialized("matrix_group_name")),
+        ("matrix_ranking", materialized("matrix_ranking")),
+        ("version", Question.version),
+        ("last_edited_by", Question.modified_by),
+        ("last_edited_at", Question.last_modified),
+        ("change_type", Question.change_type),
+        ("change_annotation", Question.change_annotation),
+    ],
+    converters={"change_type": lambda value: value or "changed"},
+    constants={"source": "versioned"},
+    prepare=with_snapshots,
+)
+
+CUSTOM_FORM = RowSerializer([
+    ("id", CustomForm.id),
+    ("name", CustomForm.name),
+    ("created_at", CustomForm.created_at),
+])
+
+CUSTOM_SECTION = RowSerializer([
+    ("id", CustomSection.id),
+    ("title", CustomSection.title),
+    ("order", CustomSection.order),
+])
+
+CUSTOM_QUESTION = RowSerializer([
+    ("id", CustomQuestion.id),
+    ("variable_name", CustomQuestion.variable_name),
+    ("label", CustomQuestion.label),
+    ("field_type", CustomQuestion.field_type),
+    ("choices", CustomQuestion.choices),
+    ("required", CustomQuestion.required),
+    ("dependencies", CustomQuestion.dependencies),
+    ("validation_type", CustomQuestion.validation_type),
+    ("validation_min", CustomQuestion.validation_min),
+    ("validation_max", CustomQuestion.validation_max),
+    ("identifier", CustomQuestion.identifier),
+    ("branching_logic", CustomQuestion.branching_logic),
+    ("field_note", CustomQuestion.field_note),
+    ("custom_alignment", CustomQuestion.custom_alignment),
+    ("question_number", CustomQuestion.question_number),
+    ("matrix_group_name", CustomQuestion.matrix_group_name),
+    ("matrix_ranking", CustomQuestion.matrix_ranking),
+    ("field_annotation", CustomQuestion.field_annotation),
+    ("version", CustomQuestion.version),
+])
+
+# Custom-Fragen im Format der importierten Formulare (/api/all-forms)
+CUSTOM_QUESTION_STRUCTURED = RowSerializer([
+    ("variable_name", CustomQuestion.variable_name),
+    ("question_text", CustomQuestion.label),
+    ("type", CustomQuestion.field_type),
+    ("choices", CustomQuestion.choices),
+    ("required", CustomQuestion.required),
+    ("validation_type", CustomQuestion.validation_type),
+    ("validation_min", CustomQuestion.validation_min),
+    ("validation_max", CustomQuestion.validation_max),
+    ("identifier", CustomQuestion.identifier),
+    ("branching_logic", CustomQuestion.branching_logic),
+    ("field_annotation", CustomQuestion.field_annotation),
+    ("dependencies", CustomQuestion.dependencies),
+    ("field_note", CustomQuestion.field_note),
+    ("custom_alignment", CustomQuestion.custom_alignment),
+    ("question_number", CustomQuestion.question_number),
+    ("matrix_group_name", CustomQuestion.matrix_group_name),
+    ("matrix_ranking", CustomQuestion.matrix_ranking),
+])
+
+def requested_fields(serializer, param="fields"):
+    """
+    Applies a sparse fieldset (?fields=id,variable_name,label) to `serializer`.
+    Without the parameter (or with no names in it) the full serializer is
+    returned; unknown names raise ValueError.
+    """
+    raw = request.args.get(param) or ""
+    keys = [key.strip() for key in raw.split(",") if key.strip()]
+    if not keys:
+        return serializer
+    return serializer.only(keys)
+
+
+USER_REF = RowSerializer([
+    ("id", User.id),
+    ("username", User.username),
+])
+
+
+def user_ref(row):
+    """Nested {"id", "username"} object or None for an outer-joined user."""
+    item = USER_REF(row)
+    return item if item["id"] is not None else None
@@ -0,0 +1,266 @@
+import hashlib
+import heapq
+import operator
+import random
+import re
+import struct
+
+from flask import current_app
+from sqlalchemy import delete, exists, insert, select, tuple_
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Question, Section
+from backend.dbmodels.question_similarity import QuestionLSHBand, QuestionSignature
+from backend.services.question_versions import latest_only
+from backend.services.version_storage import materialized, version_content, with_snapshots
+
+# Mersenne-Primzahl für die Permutationen h(x) = (a * x + b) mod p
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_SEED = 1_700_003
+_QUERY_CHUNK = 500
+
+_TAG = re.compile(r"<[^>]+>")
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def signature_settings():
+    config = current_app.config
+    num_perm = config.get("SIMILARITY_NUM_PERM", 64)
+    bands = config.get("SIMILARITY_BANDS", 16)
+    if num_perm % bands:
+        raise ValueError("SIMILARITY_NUM_PERM must be a multiple of SIMILARITY_BANDS")
+    return num_perm, bands
+
+
+_permutations = {}
+
+
+def _permutation_params(num_perm):
+    params = _permutations.get(num_perm)
+    if params is None:
+        rng = random.Random(_SEED)
+        params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        _permutations[num_perm] = params
+    return params
+
+
+def normalize_text(value):
+    """Lower-cased text without HTML tags and punctuation, whitespace collapsed."""
+    value = _TAG.sub(" ", str(value or "")).lower()
+    return " ".join(_NON_WORD.sub(" ", value).split())
+
+
+def choice_labels(choices):
+    """Labels of stored or raw REDCap choices ("1, Yes | 0, No", dict or list)."""
+    if not choices:
+        return []
+    if isinstance(choices, dict):
+        labels = choices.values()
+    elif isinstance(choices, (list, tuple)):
+        labels = [item.get("label", "") if isinstance(item, dict) else item for item in choices]
+    else:
+        labels = [part.split(",", 1)[-1] for part in str(choices).split("|")]
+    return [label for label in (normalize_text(label) for label in labels) if label]
+
+
+def shingles(label, choices=None, size=4):
+    """Character n-grams of the normalized label plus one token per choice label."""
+    text = normalize_text(label)
+    tokens = {text[i:i + size] for i in range(max(len(text) - size + 1, 1))} if text else set()
+    tokens.update(f"choice:{label}" for label in choice_labels(choices))
+    return tokens
+
+
+def minhash(tokens, num_perm):
+    if not tokens:
+        return None
+    hashes = [
+        struct.unpack("<I", hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest())[0]
+        for token in tokens
+    ]
+    return [
+        min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH
+        for a, b in _permutation_params(num_perm)
+    ]
+
+
+def band_buckets(signature, bands):
+    """One 63-bit bucket key per band of the signature."""
+    rows = len(signature) // bands
+    buckets = []
+    for band in range(bands):
+        chunk = signature[band * rows:(band + 1) * rows]
+        digest = hashlib.blake2b(struct.pack(f"<{rows}I", *chunk), digest_size=8).digest()
+        buckets.append((band, struct.unpack("<q", digest)[0] >> 1))
+    return buckets
+
+
+def estimated_similarity(left, right):
+    if not left or not right or len(left) != len(right):
+        return 0.0
+    return sum(map(operator.eq, left, right)) / len(left)
+
+
+def _drop_from_index(question_ids):
+    for start in range(0, len(question_ids), _QUERY_CHUNK):
+        chunk = question_ids[start:start + _QUERY_CHUNK]
+        db.session.execute(delete(QuestionLSHBand).where(QuestionLSHBand.question_id.in_(chunk)))
+        db.session.execute(delete(QuestionSignature).where(QuestionSignature.question_id.in_(chunk)))
+
+
+def question_signature(label, choices, num_perm):
+    return minhash(shingles(label, choices), num_perm)
+
+
+def index_questions(rows, replace=True, precomputed=None):
+    """
+    Adds (question_id, label, choices) rows to the index, replacing existing
+    entries of the same questions. Runs in the caller's transaction.
+    Signatures in `precomputed` (question_id -> signature) are used as is.
+    """
+    num_perm, bands = signature_settings()
+    rows = list(rows)
+    precomputed = precomputed or {}
+    if replace:
+        _drop_from_index([question_id for question_id, _, _ in rows])
+
+    signatures, band_rows = [], []
+    for question_id, label, choices in rows:
+        signature = precomputed.get(question_id)
+        if signature is None or len(signature) != num_perm:
+            signature = question_signature(label, choices, num_perm)
+        if signature is None:
+            continue
+        signatures.append({"question_id": question_id, "signature": signature})
+        band_rows.extend(
+            {"question_id": question_id, "band": band, "bucket": bucket}
+            for band, bucket in band_buckets(signature, bands)
+        )
+
+    if signatures:
+        db.session.execute(insert(QuestionSignature), signatures)
+        db.session.execute(insert(QuestionLSHBand), band_rows)
+    return len(signatures)
+
+
+def index_form_questions(form_id, signatures=None):
+    """
+    Indexes every question of a freshly imported form. `signatures` may map
+    question content hashes to signatures computed beforehand (e.g. by the
+    parse workers of a batch import).
+    """
+    rows = db.session.execute(with_snapshots(
+        select(Question.id, materialized("label"), materialized("choices"), Question.content_hash)
+        .join(Section, Question.section_id == Section.id)
+        .where(Section.form_id == form_id)
+    )).all()
+    precomputed = {}
+    if signatures:
+        precomputed = {row.id: signatures.get(row.content_hash) for row in rows}
+    return index_questions([row[:3] for row in rows], replace=False, precomputed=precomputed)
+
+
+def index_question_version(question):
+    """
+    Indexes a new version and removes the older versions of the same
+    (section, variable) from the index, so only the newest one is a candidate.
+    """
+    older = db.session.scalars(
+        select(Question.id).where(
+            Question.section_id == question.section_id,
+            Question.variable_name == question.variable_name,
+            Question.id != question.id
+        )
+    ).all()
+    _drop_from_index(older)
+    content = version_content(question)
+    return index_questions([(question.id, content["label"], content["choices"])])
+
+
+def _unindexed_heads_query():
+    return with_snapshots(latest_only(
+        select(Question.id, materialized("label"), materialized("choices"))
+        .where(~exists().where(QuestionSignature.question_id == Question.id))
+        .order_by(Question.id)
+    ))
+
+
+def backfill_similarity_index(batch_size=1000):
+    """Indexes the newest version of every question that is not indexed yet."""
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            _unindexed_heads_query().where(Question.id > last_id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        indexed += index_questions(rows, replace=False)
+        db.session.commit()
+    return indexed
+
+
+def find_duplicates(items, threshold=None, limit=10, exclude_ids=None):
+    """
+    Candidate duplicates for a list of (label, choices) items.
+
+    Candidates come from the LSH buckets (one indexed lookup per chunk of
+    band keys, independent of the size of the question bank) and are then
+    verified against their stored signature. Per item only the candidates
+    sharing the most bands are verified (SIMILARITY_MAX_CANDIDATES). Returns
+    one list of (question_id, similarity) per item, best match first.
+    """
+    num_perm, bands = signature_settings()
+    if threshold is None:
+        threshold = current_app.config.get("SIMILARITY_THRESHOLD", 0.5)
+    max_candidates = max(current_app.config.get("SIMILARITY_MAX_CANDIDATES", 200), limit)
+    exclude_ids = set(exclude_ids or ())
+
+    signatures = [question_signature(label, choices, num_perm) for label, choices in items]
+    bucket_owners = {}
+    for index, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        for key in band_buckets(signature, bands):
+            bucket_owners.setdefault(key, set()).add(index)
+
+    candidates = {}
+    keys = list(bucket_owners)
+    for start in range(0, len(keys), _QUERY_CHUNK):
+        chunk = keys[start:start + _QUERY_CHUNK]
+        for question_id, band, bucket in db.session.execute(
+            select(QuestionLSHBand.question_id, QuestionLSHBand.band, QuestionLSHBand.bucket)
+            .where(tuple_(QuestionLSHBand.band, QuestionLSHBand.bucket).in_(chunk))
+        ):
+            if question_id in exclude_ids:
+                continue
+            for index in bucket_owners[(band, bucket)]:
+                hits = candidates.setdefault(index, {})
+                hits[question_id] = hits.get(question_id, 0) + 1
+
+    # Mehr gemeinsame Bänder = höhere erwartete Ähnlichkeit; nur die besten Kandidaten werden geprüft
+    for index, hits in candidates.items():
+        if len(hits) > max_candidates:
+            candidates[index] = heapq.nlargest(max_candidates, hits, key=hits.get)
+
+    candidate_ids = list({qid for ids in candidates.values() for qid in ids})
+    stored = {}
+    for start in range(0, len(candidate_ids), _QUERY_CHUNK):
+        chunk = candidate_ids[start:start + _QUERY_CHUNK]
+        stored.update(db.session.execute(
+            select(QuestionSignature.question_id, QuestionSignature.signature)
+            .where(QuestionSignature.question_id.in_(chunk))
+        ).all())
+
+    results = []
+    for index, signature in enumerate(signatures):
+        scored = []
+        for question_id in candidates.get(index, ()):
+            similarity = estimated_similarity(signature, stored.get(question_id))
+            if similarity >= threshold:
+                scored.append((question_id, similarity))
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        results.append(scored[:limit])
+    return results
@@ -0,0 +1,160 @@
+import re
+
+from sqlalchemy import delete, insert, select
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Form, Question, Section
+from backend.dbmodels.variable_reference import VariableReference
+from backend.services.question_versions import latest_only
+from backend.services.version_storage import materialized, version_content, with_snapshots
+
+_QUERY_CHUNK = 500
+
+# [var], [var(code)] und [event][var] – bei zwei aufeinanderfolgenden Klammern ist die erste das Event
+_REFERENCE = re.compile(r"\[([A-Za-z][A-Za-z0-9_]*)(?:\([^()\[\]]*\))?\](?!\[)")
+
+REFERENCE_SOURCES = ("branching_logic", "calculation", "annotation")
+
+REFERENCE_COLUMNS = (
+    Question.id, materialized("field_type"), materialized("choices"),
+    materialized("branching_logic"), materialized("field_annotation")
+)
+
+
+def referenced_names(text):
+    """Variable names referenced as [var] in a piece of REDCap syntax, in order of appearance."""
+    if not text:
+        return []
+    return list(dict.fromkeys(_REFERENCE.findall(str(text))))
+
+
+def _choices_text(choices):
+    if isinstance(choices, dict):
+        return " ".join(f"{key} {label}" for key, label in choices.items())
+    if isinstance(choices, (list, tuple)):
+        return " ".join(str(item.get("label", "")) if isinstance(item, dict) else str(item) for item in choices)
+    return choices
+
+
+def question_references(field_type, choices, branching_logic, field_annotation):
+    """(variable_name, source) pairs of one question."""
+    references = [(name, "branching_logic") for name in referenced_names(branching_logic)]
+    if field_type == "calc":
+        references += [(name, "calculation") for name in referenced_names(_choices_text(choices))]
+    references += [(name, "annotation") for name in referenced_names(field_annotation)]
+    return references
+
+
+def drop_references(question_ids):
+    question_ids = list(question_ids)
+    for start in range(0, len(question_ids), _QUERY_CHUNK):
+        chunk = question_ids[start:start + _QUERY_CHUNK]
+        db.session.execute(delete(VariableReference).where(VariableReference.question_id.in_(chunk)))
+
+
+def index_references(rows, replace=True):
+    """
+    Adds the references of (question_id, field_type, choices, branching_logic,
+    field_annotation) rows, replacing existing entries of the same questions.
+    Runs in the caller's transaction.
+    """
+    rows = list(rows)
+    if replace:
+        drop_references([row[0] for row in rows])
+
+    values = [
+        {"question_id": question_id, "variable_name": name, "source": source}
+        for question_id, *columns in rows
+        for name, source in question_references(*columns)
+    ]
+    if values:
+        db.session.execute(insert(VariableReference), values)
+    return len(values)
+
+
+def index_form_references(form_id):
+    """Indexes the references of every question of a freshly imported form."""
+    rows = db.session.execute(with_snapshots(
+        select(*REFERENCE_COLUMNS)
+        .join(Section, Question.section_id == Section.id)
+        .where(Section.form_id == form_id)
+    )).all()
+    return index_references(rows, replace=False)
+
+
+def index_reference_version(question):
+    """Indexes a new version; older versions of the same (section, variable) leave the index."""
+    older = db.session.scalars(
+        select(Question.id).where(
+            Question.section_id == question.section_id,
+            Question.variable_name == question.variable_name,
+            Question.id != question.id
+        )
+    ).all()
+    drop_references(older)
+    content = version_content(question)
+    return index_references([(
+        question.id, content["field_type"], content["choices"], content["branching_logic"], content["field_annotation"]
+    )])
+
+
+def backfill_variable_references(batch_size=1000, rebuild=False):
+    """
+    Builds the index from the newest version of every question. An existing
+    index is kept unless `rebuild` is set (it is maintained on every write).
+    """
+    if rebuild:
+        db.session.execute(delete(VariableReference))
+    elif db.session.query(VariableReference.id).first():
+        return 0
+
+    heads = with_snapshots(latest_only(select(*REFERENCE_COLUMNS))).order_by(Question.id)
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(heads.where(Question.id > last_id).limit(batch_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        indexed += index_references(rows, replace=False)
+        db.session.commit()
+    db.session.commit()
+    return indexed
+
+
+def find_references(variable_name, sources=None):
+    """Questions (newest versions) that reference `variable_name`, with the places it is used."""
+    stmt = (
+        select(
+            VariableReference.source,
+            Question.id, Question.variable_name, materialized("label"), materialized("field_type"), Question.version,
+            Section.id, Section.title, Form.id, Form.name
+        )
+        .join(Question, VariableReference.question_id == Question.id)
+        .join(Section, Question.section_id == Section.id)
+        .join(Form, Section.form_id == Form.id)
+        .where(VariableReference.variable_name == variable_name)
+        .order_by(Form.id, Section.order, Question.id)
+    )
+    stmt = with_snapshots(stmt)
+    if sources:
+        stmt = stmt.where(VariableReference.source.in_(sources))
+
+    references = {}
+    for source, question_id, name, label, field_type, version, section_id, section_title, form_id, form_name in db.session.execute(stmt):
+        item = references.get(question_id)
+        if item is None:
+            item = references[question_id] = {
+                "question_id": question_id,
+                "variable_name": name,
+                "label": label,
+                "field_type": field_type,
+                "version": version,
+                "section_id": section_id,
+                "section_title": section_title,
+                "form_id": form_id,
+                "form_name": form_name,
+                "sources": []
+            }
+        item["sources"].append(source)
+    return list(references.values())
@@ -0,0 +1,242 @@
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import func, inspect, select, tuple_
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Question, QuestionContent, QUESTION_CONTENT_FIELDS, question_content_hash
+from backend.services.question_versions import update_questions
+
+DEFAULT_SNAPSHOT_INTERVAL = 10
+_QUERY_CHUNK = 500
+
+# Snapshot, gegen den eine Delta-Version gespeichert ist (Core-Alias, braucht keine Mapper-Konfiguration)
+QuestionBase = Question.__table__.alias("question_base")
+# Geteilter Inhalt der Version selbst oder ihres Snapshots
+SharedContent = QuestionContent.__table__.alias("shared_content")
+
+
+def materialized(name):
+    """
+    Content column `name` as it reads for any version: a delta version stores
+    NULL for every column it shares with its snapshot, an imported question
+    keeps its content in question_contents. Needs with_snapshots() on the
+    statement.
+    """
+    return func.coalesce(getattr(Question, name), QuestionBase.c[name], SharedContent.c[name]).label(name)
+
+
+def with_snapshots(stmt):
+    """
+    Outer-joins every version to the snapshot it is stored against (one hop
+    at most) and to the shared content of the version or its snapshot.
+    """
+    return (
+        stmt.outerjoin_from(Question, QuestionBase, Question.base_id == QuestionBase.c.id)
+        .outerjoin_from(
+            Question, SharedContent,
+            SharedContent.c.id == func.coalesce(Question.content_id, QuestionBase.c.content_id)
+        )
+    )
+
+
+def snapshot_interval():
+    return current_app.config.get("VERSION_SNAPSHOT_INTERVAL", DEFAULT_SNAPSHOT_INTERVAL)
+
+
+def version_contents(question_ids):
+    """{question_id: {content field: value, "content_hash": ...}} of any versions, reconstructed in one query."""
+    question_ids = list(question_ids)
+    contents = {}
+    for start in range(0, len(question_ids), _QUERY_CHUNK):
+        rows = db.session.execute(with_snapshots(
+            select(Question.id, Question.content_hash, *[materialized(name) for name in QUESTION_CONTENT_FIELDS])
+            .where(Question.id.in_(question_ids[start:start + _QUERY_CHUNK]))
+        ))
+        for row in rows:
+            values = row._asdict()
+            contents[values.pop("id")] = values
+    return contents
+
+
+def version_content(question):
+    """Content fields of a loaded Question; delta versions and shared content are resolved."""
+    if question.base_id is None and question.content_id is None:
+        return {name: getattr(question, name) for name in QUESTION_CONTENT_FIELDS}
+    content = version_contents([question.id])[question.id]
+    content.pop("content_hash")
+    return content
+
+
+def _expire(question_ids):
+    # update_questions() aktualisiert bereits geladene Objekte nicht
+    mapper = inspect(Question)
+    for question_id in question_ids:
+        instance = db.session.identity_map.get(mapper.identity_key_from_primary_key((question_id,)))
+        if instance is not None:
+            db.session.expire(instance)
+
+
+def _can_inherit(values, base):
+    # NULL heißt "vom Snapshot geerbt": eine gegenüber dem Snapshot geleerte Spalte lässt sich so nicht speichern
+    return all(values[name] is not None or base[name] is None for name in QUESTION_CONTENT_FIELDS)
+
+
+def materialize_versions(question_ids):
+    """
+    Stores the given versions in full again (base_id NULL). Runs in the
+    caller's transaction; last_modified is kept, the content is unchanged.
+    """
+    contents = version_contents(question_ids)
+    params = [
+        {"id": question_id, "base_id": None, **values}
+        for question_id, values in contents.items()
+    ]
+    if params:
+        update_questions(params)
+        _expire(contents)
+    return list(contents)
+
+
+def release_version(question):
+    """
+    Prepares deleting a version: versions stored as delta against it are
+    written out in full first. Returns their ids (candidates for
+    encode_versions once the version is gone).
+    """
+    dependents = db.session.scalars(select(Question.id).where(Question.base_id == question.id)).all()
+    return materialize_versions(dependents)
+
+
+def encode_versions(section_id, variable_name, candidate_ids=None, new_version_id=None, interval=None):
+    """
+    Delta-encodes the history of one (section, variable).
+
+    Versions are walked in version order. A full version becomes a delta
+    against the closest preceding snapshot as long as that snapshot has
+    fewer than `interval - 1` deltas; otherwise it stays full and serves
+    as the next snapshot. Versions with shared content are snapshots only,
+    they store no content of their own. Deltas store only the columns that
+    differ from their snapshot, so any version is rebuilt from two rows
+    (plus its shared content). The newest version is never a delta.
+
+    Only `candidate_ids` are considered (all versions if None); with
+    `new_version_id` these are the new version and its predecessor, i.e.
+    the version it pushed out of the head position. Runs in the caller's
+    transaction and returns the number of versions encoded. Only the
+    storage changes, last_modified of the versions is kept.
+    """
+    interval = snapshot_interval() if interval is None else interval
+    group = db.session.execute(
+        select(Question.id, Question.base_id, Question.content_id)
+        .where(Question.section_id == section_id, Question.variable_name == variable_name)
+        .order_by(Question.version_major, Question.version_minor, Question.id)
+    ).all()
+    if not group:
+        return 0
+
+    head_id, head_base_id, _ = group[-1]
+    if head_base_id is not None:
+        materialize_versions([head_id])
+    if interval < 2 or len(group) < 2:
+        return 0
+
+    if new_version_id is not None:
+        ids = [question_id for question_id, _, _ in group]
+        position = ids.index(new_version_id) if new_version_id in ids else len(ids) - 1
+        candidate_ids = set(ids[max(position - 1, 0):position + 1])
+    candidates = set(candidate_ids) if candidate_ids is not None else None
+
+    # Nur die Kandidaten und der jeweils letzte feste Snapshot davor werden vollständig gelesen
+    history = group[:-1]
+    references = Counter(base_id for _, base_id, _ in history if base_id is not None)
+    needed, fixed = set(), None
+    for question_id, base_id, content_id in history:
+        if base_id is not None:
+            continue
+        if content_id is None and (candidates is None or question_id in candidates):
+            needed.add(question_id)
+            if fixed is not None:
+                needed.add(fixed)
+        else:
+            fixed = question_id
+    if not needed:
+        return 0
+    contents = version_contents(needed)
+
+    params = []
+    snapshot = None
+    for question_id, base_id, content_id in history:
+        if base_id is not None:
+            continue
+        values = contents.get(question_id)
+        if (
+            content_id is None
+            and (candidates is None or question_id in candidates)
+            and snapshot is not None
+            and not references[question_id]
+            and references[snapshot] < interval - 1
+            and _can_inherit(values, contents[snapshot])
+        ):
+            base = contents[snapshot]
+            delta = {
+                name: None if values[name] == base[name] else values[name]
+                for name in QUESTION_CONTENT_FIELDS
+            }
+            params.append({
+                "id": question_id,
+                "base_id": snapshot,
+                "content_hash": values["content_hash"] or question_content_hash(values),
+                **delta
+            })
+            references[snapshot] += 1
+        else:
+            snapshot = question_id
+
+    if params:
+        update_questions(params)
+        _expire(param["id"] for param in params)
+    return len(params)
+
+
+def compact_question_versions(interval=None, batch_size=200):
+    """
+    Delta-encodes every existing version history, for data written before
+    delta storage. Versions that are already deltas are left alone; groups
+    with a single version are skipped. Commits after every `batch_size`
+    groups and returns (groups, encoded).
+    """
+    interval = snapshot_interval() if interval is None else interval
+    groups_stmt = (
+        select(Question.section_id, Question.variable_name)
+        .group_by(Question.section_id, Question.variable_name)
+        .having(func.count(Question.id) > 1)
+        .order_by(Question.section_id, Question.variable_name)
+    )
+    groups = encoded = 0
+    last = None
+    while True:
+        stmt = groups_stmt
+        if last is not None:
+            stmt = stmt.where(tuple_(Question.section_id, Question.variable_name) > last)
+        batch = db.session.execute(stmt.limit(batch_size)).all()
+        if not batch:
+            break
+        for section_id, variable_name in batch:
+            encoded += encode_versions(section_id, variable_name, interval=interval)
+        groups += len(batch)
+        last = tuple_(*batch[-1])
+        db.session.commit()
+    return groups, encoded
+
+
+def storage_stats():
+    """Number of versions stored in full and as delta, and how many of them refer to shared content."""
+    full, delta, shared = db.session.execute(
+        select(
+            func.count(Question.id).filter(Question.base_id.is_(None)),
+            func.count(Question.id).filter(Question.base_id.isnot(None)),
+            func.count(Question.content_id)
+        )
+    ).one()
+    return {"versions": full + delta, "full": full, "delta": delta, "shared": shared}
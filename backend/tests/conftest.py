@@ -0,0 +1,85 @@
+"""
+Test fixtures: the app runs against a throw-away SQLite file (a file, not
+:memory:, so several connections and threads see the same data). The
+schema is recreated for every test.
+"""
+import csv
+import io
+import os
+import tempfile
+
+import pytest
+
+# Config liest DATABASE_URL beim Import der App
+_DB_DIR = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+
+from flask_jwt_extended import create_access_token
+
+from backend.app import app as flask_app
+from backend.extensions import db
+from backend.dbmodels.user import User
+from backend.services import dictionary_diff, response_cache
+
+CSV_HEADER = [
+    "Variable / Field Name", "Form Name", "Section Header", "Field Type", "Field Label",
+    "Choices, Calculations, OR Slider Labels", "Field Note", "Text Validation Type OR Show Slider Number",
+    "Text Validation Min", "Text Validation Max", "Identifier?", "Branching Logic (Show field only if...)",
+    "Required Field?", "Custom Alignment", "Question Number (surveys only)", "Matrix Group Name",
+    "Matrix Ranking?", "Field Annotation",
+]
+
+
+def make_csv(questions, form="demo", sections=1):
+    """REDCap data dictionary with `questions` rows spread over `sections` sections."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_HEADER)
+    for i in range(questions):
+        writer.writerow([
+            f"var_{i}", form, f"Section {i % sections}", "radio" if i % 2 else "text", f"Label {i}",
+            "1, Yes | 0, No" if i % 2 else "", "", "", "", "", "", "", "", "", "", "", "", "",
+        ])
+    return out.getvalue().encode("utf-8")
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        # Modulweite Caches überleben das Neuanlegen der Tabellen
+        response_cache._cache.clear()
+        response_cache._state.update(generation=None, checked_at=0.0)
+        dictionary_diff._cache.clear()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    user = User(username="alice", email="alice@example.org")
+    user.set_password("secret")
+    db.session.add(user)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+@pytest.fixture
+def import_csv(client, auth_headers):
+    def run(content, filename="dictionary.csv"):
+        response = client.post(
+            "/api/import-csv",
+            data={"file": (io.BytesIO(content), filename)},
+            headers=auth_headers,
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+
+    return run
@@ -0,0 +1,142 @@
+import io
+import zipfile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Form
+from backend.dbmodels.imported_csv import ImportedCSV
+from backend.services import batch_import
+
+from conftest import make_csv
+
+
+@pytest.fixture
+def import_batch(client, auth_headers):
+    def run(*files, query=""):
+        response = client.post(
+            f"/api/import-batch{query}",
+            data={"files": [(io.BytesIO(content), filename) for filename, content in files]},
+            headers=auth_headers,
+            content_type="multipart/form-data",
+        )
+        return response.status_code, response.get_json()
+
+    return run
+
+
+def make_zip(members):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members:
+            archive.writestr(name, content)
+    return out.getvalue()
+
+
+def test_zip_and_csv_files_in_one_batch(import_batch):
+    archive = make_zip([
+        ("dicts/a.csv", make_csv(3, form="a")),
+        ("dicts/b.csv", make_csv(4, form="b")),
+        ("__MACOSX/dicts/._a.csv", b"junk"),
+        ("dicts/.hidden.csv", b"junk"),
+        ("dicts/readme.txt", b"not a dictionary"),
+    ])
+    status, body = import_batch(("dicts.zip", archive), ("c.csv", make_csv(5, form="c")))
+    assert status == 200, body
+    assert [(r["filename"], r["archive"], r["status"]) for r in body["results"]] == [
+        ("a.csv", "dicts.zip", "imported"),
+        ("b.csv", "dicts.zip", "imported"),
+        ("c.csv", None, "imported"),
+    ]
+    assert body["summary"]["imported"] == 3
+    assert body["summary"]["rows"] == 12
+    assert sorted(name for name, in db.session.query(Form.name)) == ["a", "b", "c"]
+
+
+def test_identical_files_are_imported_once(import_batch):
+    content = make_csv(3, form="same")
+    status, body = import_batch(("one.csv", content), ("two.csv", content))
+    assert [r["status"] for r in body["results"]] == ["imported", "duplicate"]
+    assert body["results"][1]["duplicate_of"]["filename"] == "one.csv"
+
+    # Erneuter Upload: bereits importiert; mit force wieder importiert
+    status, body = import_batch(("three.csv", content))
+    assert [r["status"] for r in body["results"]] == ["duplicate"]
+    status, body = import_batch(("three.csv", content), query="?force=1")
+    assert [r["status"] for r in body["results"]] == ["imported"]
+    assert db.session.query(ImportedCSV).count() == 2
+
+
+def test_invalid_files_fail_without_stopping_the_batch(import_batch):
+    status, body = import_batch(("empty.csv", b""), ("ok.csv", make_csv(2, form="ok")), ("broken.zip", b"PK\x03\x04broken"))
+    assert status == 200
+    assert [(r["filename"], r["status"]) for r in body["results"]] == [
+        ("empty.csv", "failed"), ("ok.csv", "imported"), ("broken.zip", "failed"),
+    ]
+    assert body["summary"]["failed"] == 2
+
+
+def test_batch_limits(app, monkeypatch, import_batch):
+    monkeypatch.setitem(app.config, "IMPORT_ARCHIVE_MAX_FILES", 2)
+    status, body = import_batch(*((f"{n}.csv", make_csv(2, form=f"f{n}")) for n in range(3)))
+    assert status == 413
+    assert "Too many files" in body["error"]
+
+    monkeypatch.setitem(app.config, "IMPORT_ARCHIVE_MAX_FILES", 200)
+    monkeypatch.setitem(app.config, "IMPORT_ARCHIVE_MAX_BYTES", 1000)
+    status, body = import_batch(("big.csv", make_csv(50)))
+    assert status == 413
+    status, body = import_batch(("big.zip", make_zip([("big.csv", make_csv(50))])))
+    assert status == 413
+    assert "Batch too large" in body["error"]
+    assert db.session.query(ImportedCSV).count() == 0
+
+
+class CountingStream(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_oversized_upload_is_not_read_to_the_end(app):
+    stream = CountingStream(b"x" * (10 * 1024 * 1024))
+    with pytest.raises(batch_import.UploadTooLarge):
+        batch_import.collect_uploads([FileStorage(stream, "big.csv")], max_files=10, max_bytes=1000)
+    # Nur das ZIP-Verzeichnisende (höchstens 64 KiB) und das Limit werden gelesen
+    assert stream.bytes_read < 100 * 1024
+
+
+def test_parse_workers_share_one_pool(app, monkeypatch, import_batch):
+    monkeypatch.setitem(app.config, "IMPORT_PARSE_WORKERS", 2)
+    monkeypatch.setitem(app.config, "IMPORT_PARSE_INLINE_BYTES", 0)
+    status, body = import_batch(("a.csv", make_csv(3, form="a")), ("b.csv", make_csv(3, form="b")))
+    assert status == 200, body
+    assert body["summary"]["workers"] == 2
+    pool = batch_import._parse_pool
+    assert pool is not None
+
+    status, body = import_batch(("c.csv", make_csv(3, form="c")), ("d.csv", make_csv(3, form="d")))
+    assert body["summary"]["imported"] == 2
+    assert batch_import._parse_pool is pool
+
+
+def test_unexpected_errors_are_not_echoed(monkeypatch, import_batch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("connection to server at 10.0.0.5 failed")
+
+    monkeypatch.setattr(batch_import, "import_csv_rows", fail)
+    status, body = import_batch(("a.csv", make_csv(2)))
+    assert status == 200
+    assert body["results"][0]["status"] == "failed"
+    assert body["results"][0]["error"] == "Import failed"
+
+    monkeypatch.setattr("backend.routes.import_routes.import_batch", fail)
+    status, body = import_batch(("a.csv", make_csv(2)))
+    assert status == 500
+    assert body == {"error": "Batch import failed"}
@@ -0,0 +1,204 @@
+import pytest
+
+from backend.services.branching_logic import (
+    FUNCTIONS, MAX_NESTING, BranchingLogicError, checkbox_column, compile_logic, evaluate_fields,
+)
+
+
+@pytest.mark.parametrize("source, record", [
+    ("round([a], 1) = 1.6", {"a": "1.55"}),
+    ("roundup([a], [b]) = 1.56", {"a": "1.551", "b": "2"}),
+    # Stellenzahlen außerhalb des float-Bereichs: keine OverflowError, kein riesiges 10 ** n
+    ("round([a], 999999999) = 1.55", {"a": "1.55"}),
+    ("roundup([a], [b]) = 1.55", {"a": "1.55", "b": "400"}),
+    ("rounddown([a], -999999999) = 0", {"a": "1.55"}),
+    ("round([a], [b]) = 0", {"a": "1234.5", "b": "-400"}),
+])
+def test_round_digits(source, record):
+    assert compile_logic(source).evaluate(record)
+
+
+@pytest.mark.parametrize("source, record, expected", [
+    # Leere Operanden erfüllen nie <, <=, >, >=
+    ("[a] < 5", {"a": ""}, False),
+    ("[a] >= 0", {"a": "  "}, False),
+    ("[a] > [b]", {"a": "3"}, False),
+    ("[a] + 1 > 0", {"a": ""}, False),
+    ("[a] = ''", {}, True),
+    ("[a] <> ''", {"a": ""}, False),
+    ("[a] = 0", {"a": ""}, False),
+    ("[a] != 0", {"a": ""}, True),
+    # Numerisch, wenn beide Seiten Zahlen sind, sonst als Text
+    ("[a] = 1", {"a": "1.0"}, True),
+    ("[a] > 9", {"a": "10"}, True),
+    ("[a] > '9'", {"a": "abc"}, True),
+    ("[a] = 'abc'", {"a": "abc"}, True),
+])
+def test_comparisons(source, record, expected):
+    assert compile_logic(source).evaluate(record) is expected
+
+
+@pytest.mark.parametrize("record, expected", [
+    ({"sex___2": "1"}, True),
+    ({"sex___2": "0", "sex___1": "1"}, False),
+    ({"sex": ["1", "2"]}, True),
+    ({"sex": ["1"]}, False),
+    ({}, False),
+])
+def test_checkbox_options(record, expected):
+    logic = compile_logic("[sex(2)] = '1'")
+    assert logic.evaluate(record) is expected
+    assert logic.variables == ("sex",)
+
+
+def test_checkbox_columns_and_event_prefix():
+    assert checkbox_column("race-eth", "3") == "race_eth___3"
+    assert compile_logic("[race-eth(3)] = '1'").evaluate({"race_eth___3": "1"})
+    assert compile_logic("[event_1_arm_1][age] > 17").evaluate({"age": "18"})
+    assert compile_logic("[event_1_arm_1][age] > 17").variables == ("age",)
+
+
+@pytest.mark.parametrize("source", [
+    "1 + 2 * 3 = 7",
+    "(1 + 2) * 3 = 9",
+    "10 - 4 - 3 = 3",
+    "8 / 4 / 2 = 1",
+    "2 ^ 3 ^ 2 = 512",
+    "2 * 3 ^ 2 = 18",
+    "-2 + 5 = 3",
+    "1 = 1 or 1 = 2 and 1 = 2",
+    "not_contain('a', 'b') and 1 + 1 = 2",
+])
+def test_operator_precedence(source):
+    assert compile_logic(source).evaluate({})
+
+
+def test_and_binds_tighter_than_or():
+    assert not compile_logic("(1 = 1 or 1 = 2) and 1 = 2").evaluate({})
+    assert compile_logic("1 = 2 and 1 = 2 or 1 = 1").evaluate({})
+
+
+FUNCTION_CASES = [
+    ("if([a] = 1, 'yes', 'no') = 'yes'", {"a": "1"}),
+    ("if([a] = 1, 'yes', 'no') = 'no'", {"a": ""}),
+    ("sum(1, [a], [b]) = 3", {"a": "2", "b": ""}),
+    ("min(3, [a], 2) = 1", {"a": "1"}),
+    ("max(3, [a], 'x') = 5", {"a": "5"}),
+    ("mean(2, 4, [a]) = 3", {"a": ""}),
+    ("isnumber(mean([a])) = false", {"a": ""}),
+    ("round(1.45, 1) = 1.5", {}),
+    ("round(2.5) = 3", {}),
+    ("roundup(1.21, 1) = 1.3", {}),
+    ("rounddown(1.29, 1) = 1.2", {}),
+    ("abs([a]) = 4", {"a": "-4"}),
+    ("sqrt(9) = 3", {}),
+    ("isnumber(sqrt(-1)) = false", {}),
+    ("datediff('2020-01-01', '2020-01-31', 'd') = 30", {}),
+    ("datediff('2020-01-31', '2020-01-01', 'd') = 30", {}),
+    ("datediff('2020-01-31', '2020-01-01', 'd', 'ymd', true) = -30", {}),
+    ("isnumber(datediff([a], '2020-01-01', 'd')) = false", {"a": ""}),
+    ("isnumber([a])", {"a": "1.5"}),
+    ("isinteger([a])", {"a": "2"}),
+    ("isinteger([a]) = false", {"a": "2.5"}),
+    ("isblank([a])", {"a": " "}),
+    ("contains([a], 'PAIN')", {"a": "Back pain"}),
+    ("not_contain([a], 'fever')", {"a": "Back pain"}),
+    ("starts_with([a], 'back')", {"a": "Back pain"}),
+    ("ends_with([a], 'PAIN')", {"a": "Back pain"}),
+    ("length([a]) = 9", {"a": "Back pain"}),
+    ("left([a], 4) = 'Back'", {"a": "Back pain"}),
+    ("right([a], 4) = 'pain'", {"a": "Back pain"}),
+    ("mid([a], 6, 2) = 'pa'", {"a": "Back pain"}),
+    ("find('PAIN', [a]) = 6", {"a": "Back pain"}),
+    ("find('x', [a]) = 0", {"a": "Back pain"}),
+    ("lower([a]) = 'back pain'", {"a": "Back Pain"}),
+    ("upper([a]) = 'BACK PAIN'", {"a": "Back Pain"}),
+    ("trim([a]) = 'x'", {"a": "  x "}),
+    ("concat([a], '-', 2) = 'x-2'", {"a": "x"}),
+    ("IF(TRUE, 1, 0) = 1", {}),
+]
+
+
+@pytest.mark.parametrize("source, record", FUNCTION_CASES)
+def test_functions(source, record):
+    assert compile_logic(source).evaluate(record)
+
+
+def test_every_function_is_covered():
+    covered = " ".join(source for source, _ in FUNCTION_CASES).lower()
+    assert [name for name in FUNCTIONS if f"{name}(" not in covered] == []
+
+
+@pytest.mark.parametrize("source, message, position", [
+    ("[age", "Unclosed field reference", 0),
+    ("[a] = 'x", "Unterminated string", 6),
+    ("[a] = 1 # 2", "Unexpected character '#'", 8),
+    ("[a] = ", "Unexpected 'end of expression'", 5),
+    ("1 < 2 < 3", "Chained comparisons need 'and'", 6),
+    ("foo(1)", "Unknown function 'foo'", 0),
+    ("round()", "round() takes 1-2 arguments, got 0", 0),
+    ("if(1, 2)", "if() takes 3 arguments, got 2", 0),
+    ("age > 1", "Unknown name 'age'", 0),
+    ("([a] = 1", "Expected ')', found 'end of expression'", 8),
+    ("[a] = 1)", "Unexpected ')'", 7),
+    ("[] = 1", "Invalid field reference []", 0),
+    ("[a()] = 1", "Empty checkbox code in [a()]", 0),
+])
+def test_syntax_errors(source, message, position):
+    with pytest.raises(BranchingLogicError) as error:
+        compile_logic(source)
+    assert error.value.message == message
+    assert error.value.position == position
+
+
+@pytest.mark.parametrize("source", [
+    "(" * 2000 + "1" + ")" * 2000,
+    "-" * 5000 + "1",
+    "abs(" * 1000 + "1" + ")" * 1000,
+])
+def test_deep_nesting_is_a_syntax_error(source):
+    with pytest.raises(BranchingLogicError, match="nested deeper"):
+        compile_logic(source)
+
+
+def test_long_flat_expressions_evaluate():
+    # Die Zahl selbst zählt als eine Ebene
+    assert compile_logic("(" * (MAX_NESTING - 1) + "1" + ")" * (MAX_NESTING - 1) + " = 1").evaluate({})
+    with pytest.raises(BranchingLogicError):
+        compile_logic("(" * MAX_NESTING + "1" + ")" * MAX_NESTING)
+    assert compile_logic("1" + " + 1" * 5000 + " = 5001").evaluate({})
+    assert compile_logic("1" + " ^ 1" * 5000 + " = 1").evaluate({})
+    assert compile_logic(" and ".join(["[a] = 1"] * 5000)).evaluate({"a": "1"})
+
+
+def test_evaluate_many():
+    records = [{"age": "17"}, {"age": "18"}, {"age": ""}, {}]
+    assert compile_logic("[age] >= 18").evaluate_many(records) == [False, True, False, False]
+    assert compile_logic("  ").evaluate_many(records) == [True] * 4
+    assert compile_logic("[age] >= 18").evaluate_many([]) == []
+
+
+def test_evaluate_fields_compiles_shared_logic_once():
+    compile_logic.cache_clear()
+    results, errors = evaluate_fields(
+        {"a": "[x] = 1", "b": " [x] = 1 ", "c": "", "d": "[x] ="},
+        [{"x": "1"}, {"x": "2"}],
+    )
+    assert results == {"a": [True, False], "b": [True, False], "c": [True, True]}
+    assert list(errors) == ["d"]
+    assert compile_logic.cache_info().misses == 3
+
+
+def test_routes_reject_deep_nesting(client):
+    logic = "(" * 2000 + "1" + ")" * 2000
+    response = client.post("/api/branching-logic/validate", json={"logic": logic})
+    assert response.status_code == 200
+    assert response.get_json()["valid"] is False
+
+    response = client.post("/api/branching-logic/evaluate", json={"logic": logic, "records": [{}]})
+    assert response.status_code == 400
+    assert "nested deeper" in response.get_json()["error"]
+
+    response = client.post("/api/branching-logic/evaluate", json={"fields": {"a": logic, "b": "1 = 1"}, "records": [{}]})
+    assert response.status_code == 200
+    assert response.get_json()["fields"] == {"b": [True]}
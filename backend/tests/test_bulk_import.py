@@ -0,0 +1,15 @@
+from backend.extensions import db
+from backend.dbmodels.form_models import Question
+
+from conftest import make_csv
+
+
+def test_duplicate_variables_in_one_file_are_all_imported(import_csv):
+    # Zweimal dieselben Variablen in derselben Section: jede Zeile bekommt einen eigenen Namen
+    content = make_csv(3, form="dupes")
+    content += content.split(b"\n", 1)[1]
+    stats = import_csv(content)["import_stats"]
+
+    assert stats["rows"] == 6
+    names = db.session.scalars(db.select(Question.variable_name).order_by(Question.id)).all()
+    assert names == ["var_0", "var_1", "var_2", "var_0_1", "var_1_1", "var_2_1"]
@@ -0,0 +1,64 @@
+import csv
+import io
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Form, Question, QuestionContent, Section, question_content_hash
+from backend.dbmodels.imported_csv import ImportedCSV
+from backend.services.version_storage import version_content
+
+from conftest import make_csv
+
+
+def truncated(content, columns):
+    """The same dictionary with every row cut after `columns` cells (missing cells read as None)."""
+    rows = list(csv.reader(io.StringIO(content.decode("utf-8"))))
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(rows[0])
+    writer.writerows(row[:columns] for row in rows[1:])
+    return out.getvalue().encode("utf-8")
+
+
+def form_contents(name):
+    questions = (
+        db.session.query(Question).join(Section).join(Form)
+        .filter(Form.name == name).order_by(Question.variable_name).all()
+    )
+    return [version_content(question) for question in questions]
+
+
+def test_empty_string_and_null_hash_differently():
+    assert question_content_hash({"label": ""}) != question_content_hash({"label": None})
+    assert question_content_hash({"label": "Age", "field_note": ""}) != question_content_hash({"label": "Age"})
+    # Ja/Nein-Felder: fehlend und False sind derselbe Inhalt
+    assert question_content_hash({"label": "Age", "required": None}) == question_content_hash({"label": "Age", "required": False})
+
+
+def test_shared_contents_keep_empty_strings_and_nulls_apart(client, import_csv):
+    full = make_csv(4, form="full")
+    import_csv(full, filename="full.csv")
+    import_csv(truncated(full, 6).replace(b",full,", b",short,"), filename="short.csv")
+
+    assert db.session.query(QuestionContent).count() == 8
+    full_contents, short_contents = form_contents("full"), form_contents("short")
+    assert [content["field_note"] for content in full_contents] == [""] * 4
+    assert [content["field_note"] for content in short_contents] == [None] * 4
+    assert [content["label"] for content in short_contents] == [content["label"] for content in full_contents]
+
+    # Für den Vergleich bleiben "" und NULL gleich
+    left, right = (db.session.query(ImportedCSV.id).filter_by(filename=name).scalar() for name in ("full.csv", "short.csv"))
+    diff = client.get(f"/api/diff?left=imported_{left}&right=imported_{right}").get_json()
+    assert diff["summary"]["changed"] == 0
+    assert diff["summary"]["unchanged"] == 4
+
+
+def test_orm_questions_keep_their_values(app):
+    question = Question(variable_name="empty_label", label="", field_type="text", field_note=None)
+    db.session.add(question)
+    db.session.commit()
+    db.session.expire_all()
+
+    stored = db.session.get(Question, question.id)
+    assert stored.label == ""
+    assert stored.field_note is None
+    assert stored.content_hash == question_content_hash({"label": "", "field_type": "text"})
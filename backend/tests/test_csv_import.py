@@ -0,0 +1,31 @@
+import csv
+import io
+
+from sqlalchemy import event
+
+from backend.extensions import db
+from backend.dbmodels.imported_csv import ImportedCSV
+from backend.services import csv_import
+
+from conftest import make_csv
+
+
+def test_content_is_written_in_chunks(import_csv, monkeypatch):
+    monkeypatch.setattr(csv_import, "_STORE_CHUNK_SIZE", 100)
+    content = make_csv(40, form="chunks")
+    updates = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE imported_csvs SET content"):
+            updates.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        import_csv(content)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    stored = db.session.query(ImportedCSV).one()
+    assert stored.content == list(csv.DictReader(io.StringIO(content.decode("utf-8"))))
+    assert stored.row_count == 40
+    assert len(updates) > 10
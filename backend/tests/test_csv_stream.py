@@ -0,0 +1,42 @@
+import io
+
+from backend.services.csv_stream import iter_csv_rows, iter_decoded_lines
+
+
+class _NonSeekable(io.RawIOBase):
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self.data.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def test_latin1_byte_after_the_first_chunk_decodes_the_whole_file_as_latin1():
+    # Gültiges UTF-8 ("ü") im ersten Stück, das erste ungültige Byte erst weit dahinter
+    data = "a,b\nü,x\n".encode("utf-8") + b"y,z\n" * 50 + "é,1\n".encode("latin1")
+    lines = list(iter_decoded_lines(io.BytesIO(data), chunk_size=16))
+
+    assert lines == data.decode("latin1").splitlines(True)
+    assert lines[1] == "Ã¼,x\n"
+    assert lines[-1] == "é,1\n"
+
+
+def test_utf8_across_chunk_boundaries():
+    data = "\ufeffVariable,Label\n".encode("utf-8") + "v,Größe äöü €\n".encode("utf-8") * 20
+    for chunk_size in (1, 3, 7, 64):
+        rows = list(iter_csv_rows(io.BytesIO(data), chunk_size=chunk_size))
+        assert len(rows) == 20
+        assert rows[-1] == {"Variable": "v", "Label": "Größe äöü €"}
+
+
+def test_non_seekable_stream():
+    data = "a,b\n1,x\n".encode("utf-8") + b"2,y\n" * 20 + b"3,\xe9\n"
+    rows = list(iter_csv_rows(_NonSeekable(data), chunk_size=8))
+
+    assert len(rows) == 22
+    assert rows[-1] == {"a": "3", "b": "é"}
@@ -0,0 +1,80 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+
+from backend.extensions import db
+from backend.dbmodels.user import User
+from backend.services.db_routing import REPLICA_BIND, replica_read
+
+
+@pytest.fixture
+def replica(app, monkeypatch):
+    """A second SQLite database registered as the "replica" bind, holding different data than the primary."""
+    path = os.path.join(tempfile.mkdtemp(prefix="backend-replica-"), "replica.db")
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__).values(username="replica_only", email="r@example.org", password_hash="x"))
+
+    monkeypatch.setitem(app.config, "SQLALCHEMY_BINDS", {REPLICA_BIND: {"url": f"sqlite:///{path}"}})
+    db.engines[REPLICA_BIND] = engine
+    yield engine
+    db.engines.pop(REPLICA_BIND)
+    engine.dispose()
+
+
+def usernames():
+    return sorted(db.session.scalars(select(User.username)))
+
+
+def run_as_replica_read(app, view):
+    with app.test_request_context("/", method="GET"):
+        return replica_read(view)()
+
+
+def test_marked_reads_go_to_the_replica(app, replica):
+    db.session.add(User(username="primary_only", email="p@example.org", password_hash="x"))
+    db.session.commit()
+
+    assert usernames() == ["primary_only"]
+    assert run_as_replica_read(app, usernames) == ["replica_only"]
+    # Text-SQL bleibt auf dem Primary
+    assert db.session.execute(text("SELECT username FROM user")).scalars().all() == ["primary_only"]
+
+
+def test_reads_after_a_write_stay_on_the_primary_until_the_transaction_ends(app, replica):
+    def view():
+        seen = {"before": usernames()}
+        db.session.add(User(username="written", email="w@example.org", password_hash="x"))
+        # Autoflush schreibt auf den Primary, die folgende Abfrage sieht den eigenen Datensatz
+        seen["after_write"] = usernames()
+        seen["locked"] = db.session.scalars(select(User.username).with_for_update()).all()
+        db.session.commit()
+        seen["after_commit"] = usernames()
+        return seen
+
+    seen = run_as_replica_read(app, view)
+    assert seen == {
+        "before": ["replica_only"],
+        "after_write": ["written"],
+        "locked": ["written"],
+        "after_commit": ["replica_only"],
+    }
+
+
+def test_locking_reads_and_raw_sql_pin_the_transaction(app, replica):
+    def view():
+        locked = db.session.scalars(select(User.username).with_for_update()).all()
+        return locked, usernames()
+
+    assert run_as_replica_read(app, view) == ([], [])
+
+    def view_after_rollback():
+        db.session.execute(text("SELECT 1"))
+        pinned = usernames()
+        db.session.rollback()
+        return pinned, usernames()
+
+    assert run_as_replica_read(app, view_after_rollback) == ([], ["replica_only"])
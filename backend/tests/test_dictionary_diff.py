@@ -0,0 +1,39 @@
+import time
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Form, Question
+
+from conftest import make_csv
+
+
+def _edit(client, auth_headers, question_id, label):
+    response = client.put(f"/api/questions/{question_id}", json={"new_data": {"label": label}}, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()["new_id"]
+
+
+def test_diff_form_as_of_between_two_edits(client, auth_headers, import_csv):
+    import_csv(make_csv(5, form="diffed"))
+    form_id = db.session.query(Form.id).filter_by(name="diffed").scalar()
+    original_id = db.session.query(Question.id).filter_by(variable_name="var_1").scalar()
+
+    first_id = _edit(client, auth_headers, original_id, "First edit")
+    as_of = db.session.get(Question, first_id).last_modified
+    time.sleep(0.01)
+    _edit(client, auth_headers, first_id, "Second edit")
+    db.session.expire_all()
+
+    # Die zweite Bearbeitung speichert die erste als Delta, ihr Zeitstempel bleibt
+    first = db.session.get(Question, first_id)
+    assert first.base_id is not None
+    assert first.last_modified == as_of
+
+    response = client.get(f"/api/diff?left=form_{form_id}&left_as_of={as_of.isoformat()}&right=form_{form_id}")
+    assert response.status_code == 200, response.get_json()
+    diff = response.get_json()
+    assert diff["summary"]["changed"] == 1
+    assert diff["summary"]["unchanged"] == 4
+    assert diff["changed"] == [{
+        "variable_name": "var_1",
+        "changes": {"label": {"from": "First edit", "to": "Second edit"}},
+    }]
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+
+from backend.extensions import db
+from backend.dbmodels.custom_form import CustomForm, CustomQuestion, CustomSection
+from backend.dbmodels.form_models import Form
+from backend.dbmodels.imported_csv import ImportedCSV
+from backend.services.csv_export import safe_filename
+
+from conftest import make_csv
+
+
+def export(client, forms):
+    return client.post("/api/export-zip", json={"forms": forms})
+
+
+def test_export_zip(client, import_csv):
+    import_csv(make_csv(3, form="../../etc/cron.d/x"), filename="..\\..\\evil.csv")
+    custom = CustomForm(name="/abs/path")
+    custom.sections = [CustomSection(title="S", order=1, questions=[
+        CustomQuestion(variable_name="q1", label="Q1", field_type="text"),
+    ])]
+    db.session.add(custom)
+    db.session.commit()
+    imported_id = db.session.query(ImportedCSV.id).scalar()
+    form_id = db.session.query(Form.id).scalar()
+
+    refs = [f"imported_{imported_id}", f"form_{form_id}", f"custom_{custom.id}", "custom_999", "form_999"]
+    response = export(client, refs + [refs[0]])
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    manifest = json.loads(archive.read("manifest.json"))
+
+    assert manifest["files"] == {
+        f"imported_{imported_id}": f"imported_{imported_id}_evil.csv",
+        f"form_{form_id}": f"form_{form_id}__.._etc_cron.d_x.csv",
+        f"custom_{custom.id}": f"custom_{custom.id}__abs_path.csv",
+    }
+    assert sorted(manifest["missing"]) == ["custom_999", "form_999"]
+    assert manifest["errors"] == {}
+    assert sorted(archive.namelist()) == sorted(list(manifest["files"].values()) + ["manifest.json"])
+    for name in archive.namelist():
+        assert "/" not in name and "\\" not in name and not name.startswith(".")
+
+    rows = list(csv.reader(io.StringIO(archive.read(manifest["files"][f"form_{form_id}"]).decode("utf-8"))))
+    assert [row[0] for row in rows] == ["Variable / Field Name", "var_0", "var_1", "var_2"]
+    rows = list(csv.reader(io.StringIO(archive.read(manifest["files"][f"imported_{imported_id}"]).decode("utf-8-sig"))))
+    assert len(rows) == 4
+    rows = list(csv.reader(io.StringIO(archive.read(manifest["files"][f"custom_{custom.id}"]).decode("utf-8"))))
+    assert rows[1][:5] == ["q1", "/abs/path", "S", "text", "Q1"]
+
+
+def test_export_zip_spools_large_forms(app, client, import_csv):
+    import_csv(make_csv(400, form="large"))
+    app.config["EXPORT_SPOOL_SIZE"] = 1024
+    try:
+        response = export(client, ["imported_1", "form_1"])
+    finally:
+        app.config.pop("EXPORT_SPOOL_SIZE")
+
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    assert archive.testzip() is None
+    assert len(archive.read("form_1_large.csv").decode("utf-8").splitlines()) == 401
+
+
+def test_export_zip_rejects_invalid_ids(client):
+    response = export(client, ["form_1", "../form_1", "form_x", 5])
+    assert response.status_code == 400
+    assert response.get_json()["invalid"] == ["../form_1", "form_x", 5]
+
+    assert export(client, []).status_code == 400
+    assert client.post("/api/export-zip", data="nope").status_code == 400
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("../x.csv", "_x.csv"),
+    ("..\\..\\x.csv", "_.._x.csv"),
+    ("/etc/passwd", "_etc_passwd"),
+    ('a "b"\r\n.csv', "a _b_.csv"),
+    ("..", "export"),
+    ("Fragebogen Ärzte.csv", "Fragebogen Arzte.csv"),
+])
+def test_safe_filename(name, expected):
+    assert safe_filename(name) == expected
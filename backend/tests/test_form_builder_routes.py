@@ -0,0 +1,110 @@
+import pytest
+from sqlalchemy import event
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Form, Question, Section
+
+from conftest import make_csv
+
+
+def form_questions(name):
+    return db.session.execute(
+        db.select(Question.variable_name, Question.label, Question.version)
+        .join(Section, Question.section_id == Section.id)
+        .join(Form, Section.form_id == Form.id)
+        .where(Form.name == name)
+        .order_by(Question.id)
+    ).all()
+
+
+def test_new_form_from_two_versions_of_one_question(client, auth_headers, import_csv):
+    import_csv(make_csv(2, form="source"))
+    first = db.session.query(Question.id).filter_by(variable_name="var_0").scalar()
+    response = client.put(f"/api/questions/{first}", json={"new_data": {"label": "Edited"}}, headers=auth_headers)
+    assert response.status_code == 200
+    second = db.session.query(Question.id).filter_by(variable_name="var_0", version="2.0").scalar()
+
+    response = client.post("/api/forms", json={"name": "copy", "question_ids": [first, second, first]})
+
+    assert response.status_code == 201, response.get_json()
+    form_id = db.session.query(Form.id).filter_by(name="copy").scalar()
+    assert form_questions("copy") == [
+        (f"var_0_{form_id}", "Label 0", "1.0"),
+        (f"var_0_{form_id}_1", "Edited", "1.0"),
+    ]
+
+
+def test_forms_from_imports_with_repeated_variables(client, import_csv):
+    # Dieselben Variablen zweimal in derselben Section
+    content = make_csv(3, form="dupes")
+    content += content.split(b"\n", 1)[1]
+    import_csv(content)
+
+    response = client.post("/api/forms/from-imports")
+
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()["forms"] == ["dupes"]
+    names = [name for name, _, _ in form_questions("dupes")]
+    # Der erste Formular-Eintrag stammt aus dem Import, der zweite aus der Umwandlung
+    converted = names[len(names) // 2:]
+    assert converted[:3] == ["var_0", "var_1", "var_2"]
+    assert converted[3:] == ["var_0_2", "var_1_2", "var_2_2"]
+
+
+def test_sparse_fieldset_of_builder_data(client, auth_headers, import_csv):
+    import_csv(make_csv(4, form="sparse"))
+    full = client.get("/api/form-builder/data").get_json()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get("/api/form-builder/data?fields=label, variable_name")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["forms"] == full["forms"] and body["sections"] == full["sections"]
+    # "id" bleibt immer erhalten
+    assert [set(question) for question in body["questions"]] == [{"id", "variable_name", "label"}] * 4
+    assert body["questions"] == [
+        {"id": q["id"], "variable_name": q["variable_name"], "label": q["label"]} for q in full["questions"]
+    ]
+    question_selects = [s for s in statements if "FROM questions" in s and "questions.label" in s]
+    assert question_selects and all("questions.field_annotation" not in s for s in question_selects)
+
+
+def test_sparse_fieldset_of_full_forms_resolves_versions(client, auth_headers, import_csv):
+    import_csv(make_csv(2, form="sparse"))
+    question_id = db.session.query(Question.id).filter_by(variable_name="var_1").scalar()
+    for label in ("First edit", "Second edit"):
+        response = client.put(f"/api/questions/{question_id}", json={"new_data": {"label": label}}, headers=auth_headers)
+        assert response.status_code == 200
+
+    response = client.get("/api/forms/full?fields=label")
+
+    assert response.status_code == 200
+    [form] = response.get_json()
+    questions = [q for section in form["sections"] for q in section["questions"]]
+    assert all(set(q) == {"id", "label"} for q in questions)
+    assert sorted(q["label"] for q in questions) == ["First edit", "Label 0", "Label 1", "Second edit"]
+
+
+@pytest.mark.parametrize("path", ["/api/form-builder/data", "/api/forms/full"])
+def test_unknown_fields_are_rejected(client, path):
+    response = client.get(f"{path}?fields=label,bogus,password_hash")
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Unknown fields: bogus, password_hash"}
+
+
+@pytest.mark.parametrize("query", ["", "?fields=", "?fields=,%20,"])
+def test_empty_fieldset_returns_every_field(client, import_csv, query):
+    import_csv(make_csv(1, form="sparse"))
+    [question] = client.get(f"/api/form-builder/data{query}").get_json()["questions"]
+
+    assert {"id", "variable_name", "label", "field_type", "choices", "section_id"} <= set(question)
@@ -0,0 +1,61 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+from backend.extensions import db
+from backend.dbmodels.import_job import ImportJob
+from backend.dbmodels.user import User
+from backend.services import import_jobs
+
+from conftest import make_csv
+
+
+def _job(app, user, status, content=None, started=None):
+    path = os.path.join(app.config["IMPORT_JOB_DIR"], f"recover-{status}-{time.monotonic_ns()}.csv")
+    if content is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+    earlier = import_jobs._process_started_at - timedelta(minutes=5)
+    job = ImportJob(
+        filename=os.path.basename(path), file_path=path, status=status,
+        created_at=earlier, started_at=started, created_by_id=user.id
+    )
+    db.session.add(job)
+    return job
+
+
+def test_recover_import_jobs_after_restart(app, auth_headers):
+    user = User.query.filter_by(username="alice").one()
+    earlier = import_jobs._process_started_at - timedelta(minutes=4)
+    stale = _job(app, user, "running", content=b"partial", started=earlier)
+    queued = _job(app, user, "queued", content=make_csv(3, form="recovered"))
+    lost = _job(app, user, "queued")
+    # Von einem noch laufenden Prozess nach unserem Start beanspruchter Job bleibt unangetastet
+    alive = _job(app, user, "running", started=datetime.utcnow())
+    db.session.commit()
+
+    assert import_jobs.recover_import_jobs(app) == (1, 2)
+
+    db.session.refresh(stale)
+    assert (stale.status, stale.error) == ("failed", "Interrupted by a server restart")
+    assert not os.path.exists(stale.file_path)
+    db.session.refresh(lost)
+    assert (lost.status, lost.error) == ("failed", "Uploaded file is missing")
+    db.session.refresh(alive)
+    assert alive.status == "running"
+
+    for _ in range(100):
+        db.session.expire_all()
+        if db.session.get(ImportJob, queued.id).status not in ("queued", "running"):
+            break
+        time.sleep(0.05)
+    job = db.session.get(ImportJob, queued.id)
+    assert job.status == "succeeded", job.error
+    assert job.rows_processed == 3
+    assert not os.path.exists(job.file_path)
+
+    # Ein zweiter Lauf findet nichts mehr, ein schon beanspruchter Job wird nicht erneut importiert
+    assert import_jobs.recover_import_jobs(app) == (0, 0)
+    import_jobs.run_import_job(app, queued.id)
+    assert db.session.get(ImportJob, queued.id).imported_csv_id == job.imported_csv_id
@@ -0,0 +1,30 @@
+from backend.extensions import db
+from backend.dbmodels.form_models import Question
+
+
+def question(variable_name, version="1.0", label=None):
+    return {"variable_name": variable_name, "label": label or variable_name, "field_type": "text", "version": version}
+
+
+def test_import_forms_with_a_repeated_variable(client, auth_headers):
+    payload = {
+        "name": "manual",
+        "sections": [
+            {"title": "A", "order": 1, "questions": [
+                question("age"), question("age", label="again"), question("age_1"), question("age", version="2.0"),
+            ]},
+            {"title": "B", "order": 2, "questions": [question("age")]},
+        ],
+    }
+
+    response = client.post("/api/import-forms", json=payload, headers=auth_headers)
+
+    assert response.status_code == 201, response.get_json()
+    rows = db.session.execute(
+        db.select(Question.variable_name, Question.version, Question.label).order_by(Question.id)
+    ).all()
+    # Nur die Wiederholung von age 1.0 in Section A wird umbenannt, age_1 ist schon vergeben
+    assert rows == [
+        ("age", "1.0", "age"), ("age_2", "1.0", "again"), ("age_1", "1.0", "age_1"),
+        ("age", "2.0", "age"), ("age", "1.0", "age"),
+    ]
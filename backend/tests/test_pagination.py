@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from backend.extensions import db
+from backend.dbmodels.custom_form import CustomForm
+from backend.dbmodels.form_models import Form
+from backend.dbmodels.imported_csv import ImportedCSV
+from backend.services.pagination import decode_cursor, encode_cursor
+
+from conftest import make_csv
+
+ENDPOINTS = ["/api/imported-forms", "/api/all-forms", "/api/questions/all", "/api/custom-forms", "/api/forms/full"]
+
+
+def raw_cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def item_id(item):
+    # imported-forms/forms/full: Zahl, questions/all: "form_<id>"
+    return int(str(item.get("id", item.get("form_id"))).rsplit("_", 1)[-1])
+
+
+def fetch_pages(client, headers, path, limit):
+    pages, cursor = [], None
+    while True:
+        query = f"?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(path + query, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        pages.append(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 8, 30, 15, 123456)
+    token = encode_cursor(created_at, 42, source="custom")
+
+    assert "=" not in token
+    assert decode_cursor(token) == {"created_at": created_at, "id": 42, "source": "custom"}
+    assert decode_cursor(encode_cursor(source="custom")) == {"source": "custom"}
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "%%%",
+    raw_cursor([1, 2]),
+    raw_cursor({"id": 1}),
+    raw_cursor({"id": "x", "created_at": "2024-01-01T00:00:00"}),
+    raw_cursor({"id": 1, "created_at": "yesterday"}),
+    raw_cursor({"id": 1, "created_at": 5}),
+    raw_cursor({"id": 10 ** 30, "created_at": "2024-01-01T00:00:00"}),
+    base64.urlsafe_b64encode(b'{"id": 1e999, "created_at": "2024-01-01T00:00:00"}').decode("ascii"),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode("ascii"),
+])
+def test_invalid_cursor_is_rejected(client, auth_headers, path, cursor):
+    response = client.get(f"{path}?cursor={cursor}", headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("path", ENDPOINTS[:3])
+def test_invalid_limit_is_rejected(client, auth_headers, path):
+    response = client.get(f"{path}?limit=ten", headers=auth_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("path", ["/api/imported-forms", "/api/questions/all", "/api/forms/full"])
+def test_pages_are_stable_with_equal_timestamps(client, auth_headers, import_csv, path):
+    for n in range(7):
+        import_csv(make_csv(2, form=f"form_{n}"), filename=f"form_{n}.csv")
+    # Gleicher Zeitstempel überall: die Reihenfolge hängt dann nur noch an der id
+    same_time = datetime(2024, 1, 1)
+    db.session.query(ImportedCSV).update({ImportedCSV.created_at: same_time})
+    db.session.query(Form).update({Form.created_at: same_time})
+    db.session.commit()
+
+    full = client.get(path, headers=auth_headers).get_json()
+    pages = fetch_pages(client, auth_headers, path, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    ids = [item_id(item) for page in pages for item in page]
+    assert ids == sorted({item_id(item) for item in full}, reverse=True)
+
+
+def test_all_forms_pages_continue_into_custom_forms(client, auth_headers, import_csv):
+    for n in range(3):
+        import_csv(make_csv(2, form=f"form_{n}"), filename=f"form_{n}.csv")
+    for n in range(4):
+        db.session.add(CustomForm(name=f"custom_{n}", created_at=datetime(2024, 1, 1 + n)))
+    db.session.commit()
+
+    pages = fetch_pages(client, auth_headers, "/api/all-forms", limit=2)
+    items = [item for page in pages for item in page]
+    full = client.get("/api/all-forms", headers=auth_headers).get_json()
+
+    assert [item["id"] for item in items] == [item["id"] for item in full]
+    assert [item["source"] for item in items] == ["imported"] * 3 + ["custom"] * 4
+    assert [item["form_name"] for item in items if item["source"] == "custom"] == [f"custom_{n}" for n in (3, 2, 1, 0)]
@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from backend.extensions import db
+
+from conftest import make_csv
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.mark.parametrize("query_string", ["", "?limit=50"])
+def test_all_questions_query_count_independent_of_forms(client, import_csv, query_string):
+    def fetch():
+        with count_queries() as statements:
+            response = client.get(f"/api/questions/all{query_string}")
+        assert response.status_code == 200
+        body = response.get_json()
+        return len(statements), body["items"] if query_string else body
+
+    import_csv(make_csv(10, form="form_0", sections=2))
+    one_form, forms = fetch()
+    assert len(forms) == 1
+
+    for n in range(1, 6):
+        import_csv(make_csv(10 + n, form=f"form_{n}", sections=3), filename=f"form_{n}.csv")
+    many_forms, forms = fetch()
+    assert len(forms) == 6
+    assert sum(len(section["questions"]) for form in forms for section in form["sections"]) == 10 + sum(10 + n for n in range(1, 6))
+
+    assert many_forms == one_form, (one_form, many_forms)
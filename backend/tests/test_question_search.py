@@ -0,0 +1,46 @@
+from backend.extensions import db
+from backend.dbmodels.form_models import Question
+from backend.services import question_search
+
+from conftest import make_csv
+
+
+def search(client, query, **params):
+    response = client.get("/api/questions/search", query_string={"q": query, **params})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_search_without_init_db(client, auth_headers, import_csv):
+    # Die Test-Datenbank kommt aus db.create_all(), ensure_search_index() ist nie gelaufen
+    import_csv(make_csv(6, form="search"))
+
+    body = search(client, "label 3")
+    assert [item["variable_name"] for item in body["items"]] == ["var_3"]
+
+    # Ab jetzt halten die Trigger den Index aktuell
+    question_id = db.session.query(Question.id).filter_by(variable_name="var_5").scalar()
+    response = client.put(f"/api/questions/{question_id}", json={"new_data": {"label": "Blood pressure"}}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [item["variable_name"] for item in search(client, "blood")["items"]] == ["var_5"]
+    assert search(client, "label 5")["items"] == []
+    assert len(search(client, "label 5", all_versions=1)["items"]) == 1
+
+
+def test_search_ranks_variable_names_first(client, import_csv):
+    import_csv(make_csv(12, form="search"))
+
+    items = search(client, "var_1")["items"]
+    assert items[0]["variable_name"] == "var_1"
+    assert {item["variable_name"] for item in items} == {"var_1", "var_10", "var_11"}
+
+
+def test_missing_postgres_trigger_gives_503(client, monkeypatch):
+    def missing(dialect):
+        raise question_search.SearchIndexMissing("Search index is not set up yet, run init_db.py")
+
+    monkeypatch.setattr(question_search, "_require_index", missing)
+    response = client.get("/api/questions/search?q=label")
+
+    assert response.status_code == 503
+    assert response.get_json() == {"error": "Search index is not set up yet, run init_db.py"}
@@ -0,0 +1,41 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Question
+
+from conftest import make_csv
+
+EDITS = 200
+THREADS = 16
+
+
+def test_concurrent_edits_get_unique_versions(app, auth_headers, import_csv):
+    import_csv(make_csv(2, form="stress"))
+    question_id = db.session.query(Question.id).filter_by(variable_name="var_1").scalar()
+    db.session.remove()
+
+    def edit(n):
+        # Eigener Client je Aufruf: jeder Request bekommt seinen App-Kontext und damit seine Session
+        response = app.test_client().put(
+            f"/api/questions/{question_id}",
+            json={"new_data": {"label": f"Concurrent edit {n}"}},
+            headers=auth_headers,
+        )
+        return response.status_code, response.get_json()
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(edit, range(EDITS)))
+
+    statuses = Counter(status for status, _ in results)
+    assert statuses == {200: EDITS}, [body for status, body in results if status != 200][:3]
+
+    versions = db.session.execute(
+        db.select(Question.version, Question.label).where(Question.variable_name == "var_1")
+    ).all()
+    assert len(versions) == EDITS + 1
+    numbers = [version for version, _ in versions]
+    assert len(set(numbers)) == len(numbers), [v for v, count in Counter(numbers).items() if count > 1]
+    # Alle Bearbeitungen basieren auf 1.0 und bekommen fortlaufende Unterversionen von 2
+    assert sorted(numbers, key=lambda v: tuple(map(int, v.split(".")))) == ["1.0"] + [f"2.{n}" for n in range(EDITS)]
+    assert {label for _, label in versions} >= {f"Concurrent edit {n}" for n in range(EDITS)}
@@ -0,0 +1,155 @@
+import csv
+import io
+
+import pytest
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Form
+from backend.services.record_validation import FieldSpec, RecordValidator
+
+from conftest import CSV_HEADER
+
+
+def records(header, *rows):
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+def validate(fields, content, **options):
+    return RecordValidator(fields).validate_stream(io.BytesIO(content), **options)
+
+
+def codes(summary, field):
+    return summary["fields"].get(field, {}).get("codes", {})
+
+
+@pytest.mark.parametrize("spec, value, code", [
+    (FieldSpec("f", "radio", {"1": "Yes", "0": "No"}, False, None, None, None), "2", "invalid_choice"),
+    (FieldSpec("f", "dropdown", "1, A | 2, B", False, None, None, None), "2", None),
+    (FieldSpec("f", "yesno", None, False, None, None, None), "yes", "invalid_choice"),
+    (FieldSpec("f", "text", None, False, "integer", None, None), "1.5", "invalid_format"),
+    (FieldSpec("f", "text", None, False, "email", None, None), "a@b", "invalid_format"),
+    (FieldSpec("f", "text", None, False, "date_ymd", None, None), "2020-02-30", "invalid_format"),
+    (FieldSpec("f", "text", None, False, "integer", "0", "10"), "11", "out_of_range"),
+    (FieldSpec("f", "text", None, False, "number", "0.5", None), "0.4", "out_of_range"),
+    (FieldSpec("f", "text", None, False, "date_ymd", "2020-01-01", "today"), "2019-12-31", "out_of_range"),
+    (FieldSpec("f", "slider", None, False, None, None, None), "101", "out_of_range"),
+    (FieldSpec("f", "calc", None, False, None, None, None), "x", "invalid_format"),
+    (FieldSpec("f", "text", None, True, None, None, None), " ", "required"),
+    (FieldSpec("f", "text", None, False, "integer", None, None), "", None),
+])
+def test_value_codes(spec, value, code):
+    summary = validate([spec], records(["record_id", "f"], ["1", value]))
+    assert codes(summary, "f") == ({code: 1} if code else {})
+    assert summary["rows_with_errors"] == (1 if code else 0)
+
+
+def test_checkbox_groups():
+    fields = [FieldSpec("sym", "checkbox", "1, Fever | 2, Cough", True, None, None, None)]
+    summary = validate(fields, records(
+        ["record_id", "sym___1", "sym___2"],
+        ["1", "1", "0"],
+        ["2", "0", "0"],
+        ["3", "0", "x"],
+    ))
+    assert codes(summary, "sym") == {"required": 2, "invalid_choice": 1}
+    assert [(example["row"], example["column"], example["code"]) for example in summary["fields"]["sym"]["examples"]] == [
+        (3, "sym___2", "invalid_choice"), (2, "sym", "required"), (3, "sym", "required"),
+    ]
+
+
+def test_missing_and_unknown_columns():
+    fields = [
+        FieldSpec("age", "text", None, False, "integer", None, None),
+        FieldSpec("sym", "checkbox", "1, Fever", False, None, None, None),
+        FieldSpec("note", "descriptive", None, False, None, None, None),
+    ]
+    summary = validate(fields, records(
+        ["record_id", "redcap_event_name", "extra", "demo_complete"],
+        ["1", "baseline", "x", "2"],
+    ))
+    assert summary["missing_columns"] == ["age", "sym"]
+    assert summary["unknown_columns"] == ["extra"]
+
+
+def test_batch_boundaries_keep_row_numbers():
+    fields = [FieldSpec("age", "text", None, True, "integer", None, None)]
+    rows = [[str(n), "x" if n % 3 == 0 else str(n)] for n in range(1, 11)]
+    for batch_size in (1, 2, 3, 10, 5000):
+        summary = validate(fields, records(["record_id", "age"], *rows), batch_size=batch_size)
+        assert summary["rows"] == 10
+        assert summary["errors"] == summary["rows_with_errors"] == 3
+        assert [example["row"] for example in summary["fields"]["age"]["examples"]] == [3, 6, 9]
+
+
+def test_short_and_long_rows_count_as_malformed():
+    fields = [FieldSpec("a", "text", None, False, None, None, None), FieldSpec("b", "text", None, True, None, None, None)]
+    content = b"record_id,a,b\n1,x,y\n2,x\n\n3,x,y,z\n"
+    summary = validate(fields, content)
+    assert summary["rows"] == 3
+    assert summary["malformed_rows"] == 2
+    # Die fehlende Zelle der kurzen Zeile ist leer
+    assert codes(summary, "b") == {"required": 1}
+
+
+def test_required_fields_hidden_by_branching_logic_are_skipped():
+    fields = [
+        FieldSpec("smoker", "yesno", None, True, None, None, None),
+        FieldSpec("packs", "text", None, True, "integer", None, None, "[smoker] = '1'"),
+        FieldSpec("sym", "checkbox", "1, Fever | 2, Cough", True, None, None, None),
+        FieldSpec("cough_days", "text", None, True, "integer", "1", None, "[sym(2)] = '1'"),
+        FieldSpec("reason", "checkbox", "1, A | 2, B", True, None, None, None, "[smoker] = '0'"),
+    ]
+    summary = validate(fields, records(
+        ["record_id", "smoker", "packs", "sym___1", "sym___2", "cough_days", "reason___1", "reason___2"],
+        ["1", "1", "", "1", "0", "", "0", "0"],
+        ["2", "0", "", "0", "1", "", "0", "0"],
+        ["3", "0", "", "0", "1", "0", "1", "0"],
+        ["4", "1", "", "1", "0", "", "0", "0"],
+    ), batch_size=3)
+    assert codes(summary, "packs") == {"required": 2}
+    assert [example["row"] for example in summary["fields"]["packs"]["examples"]] == [1, 4]
+    assert codes(summary, "cough_days") == {"required": 1, "out_of_range": 1}
+    assert codes(summary, "reason") == {"required": 1}
+    assert summary["logic_errors"] == {}
+
+
+def test_invalid_branching_logic_keeps_the_required_check():
+    fields = [FieldSpec("a", "text", None, True, None, None, None, "[b] = = 1")]
+    summary = validate(fields, records(["record_id", "a"], ["1", ""]))
+    assert codes(summary, "a") == {"required": 1}
+    assert list(summary["logic_errors"]) == ["a"]
+
+
+def test_validate_records_route_uses_branching_logic(client, import_csv):
+    logic_column, required_column = CSV_HEADER.index("Branching Logic (Show field only if...)"), CSV_HEADER.index("Required Field?")
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_HEADER)
+    for name, field_type, choices, logic in (
+        ("record_id", "text", "", ""),
+        ("smoker", "yesno", "", ""),
+        ("packs", "text", "", "[smoker] = '1'"),
+    ):
+        row = [name, "checked", "", field_type, name.title(), choices] + [""] * (len(CSV_HEADER) - 6)
+        row[logic_column], row[required_column] = logic, "y" if name == "packs" else ""
+        writer.writerow(row)
+    import_csv(out.getvalue().encode("utf-8"))
+    form_id = db.session.query(Form.id).filter_by(name="checked").scalar()
+
+    response = client.post(
+        f"/api/forms/{form_id}/validate-records",
+        data={"file": (io.BytesIO(records(["record_id", "smoker", "packs"], ["1", "1", ""], ["2", "0", ""], ["3", "", "4"])), "records.csv")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200, response.get_json()
+    summary = response.get_json()
+    assert summary["rows"] == 3
+    assert summary["fields"] == {
+        "packs": {"errors": 1, "codes": {"required": 1}, "examples": [
+            {"row": 1, "record": "1", "column": "packs", "value": "", "code": "required"},
+        ]},
+    }
@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.extensions import db
+from backend.dbmodels.data_generation import DataGeneration
+from backend.services.response_cache import bump_data_generation
+
+
+def test_if_none_match_uses_strong_comparison(client):
+    response = client.get("/api/questions/all")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+
+    assert client.get("/api/questions/all", headers={"If-None-Match": etag}).status_code == 304
+    # Ein schwaches Validator-Tag passt bei starkem Vergleich nicht
+    assert client.get("/api/questions/all", headers={"If-None-Match": f"W/{etag}"}).status_code == 200
+
+
+def test_bump_data_generation_creates_and_increments_the_row(app):
+    assert db.session.get(DataGeneration, 1) is None
+
+    bump_data_generation()
+    db.session.commit()
+    bump_data_generation()
+    bump_data_generation()
+    db.session.commit()
+
+    assert db.session.query(DataGeneration.value).filter(DataGeneration.id == 1).scalar() == 3
+
+
+def test_concurrent_bumps_on_an_empty_table(app):
+    def bump(_):
+        with app.app_context():
+            bump_data_generation()
+            db.session.commit()
+            db.session.remove()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(bump, range(40)))
+
+    assert db.session.query(DataGeneration.value).filter(DataGeneration.id == 1).scalar() == 40
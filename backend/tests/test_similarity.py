@@ -0,0 +1,122 @@
+import csv
+import io
+
+from backend.extensions import db
+from backend.dbmodels.form_models import Question
+from backend.dbmodels.question_similarity import QuestionLSHBand, QuestionSignature
+from backend.services.similarity import estimated_similarity, find_duplicates, question_signature
+
+from conftest import CSV_HEADER
+
+QUESTIONS = [
+    ("smoking", "radio", "Do you currently smoke cigarettes?", "1, Yes | 0, No"),
+    ("birth_date", "text", "Date of birth of the participant", ""),
+    ("pain_score", "radio", "How severe is your pain today on a scale from 0 to 10?", "0, None | 5, Moderate | 10, Worst"),
+]
+
+
+def dictionary(rows, form="screening"):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_HEADER)
+    for name, field_type, label, choices in rows:
+        writer.writerow([name, form, "", field_type, label, choices] + [""] * (len(CSV_HEADER) - 6))
+    return out.getvalue().encode("utf-8")
+
+
+def duplicates(client, label, choices="", **options):
+    response = client.post("/api/questions/duplicates", json=dict(options, label=label, choices=choices))
+    assert response.status_code == 200, response.get_json()
+    [result] = response.get_json()["results"]
+    return {candidate["variable_name"]: candidate["similarity"] for candidate in result["candidates"]}
+
+
+def test_signature_similarity_tracks_text_overlap(app):
+    num_perm = app.config["SIMILARITY_NUM_PERM"]
+    base = question_signature("Do you currently smoke cigarettes?", "1, Yes | 0, No", num_perm)
+    near = question_signature("Do you currently smoke cigarettes ?", "1, yes | 0, no", num_perm)
+    other = question_signature("Date of birth of the participant", "", num_perm)
+    assert len(base) == num_perm
+    assert estimated_similarity(base, near) == 1.0
+    assert estimated_similarity(base, other) < 0.3
+    assert question_signature("", "", num_perm) is None
+
+
+def test_import_indexes_every_question(app, import_csv):
+    import_csv(dictionary(QUESTIONS))
+    assert db.session.query(QuestionSignature).count() == len(QUESTIONS)
+    assert db.session.query(QuestionLSHBand).count() == len(QUESTIONS) * app.config["SIMILARITY_BANDS"]
+
+
+def test_near_duplicates_are_found(client, import_csv):
+    import_csv(dictionary(QUESTIONS))
+    found = duplicates(client, "Do you currently smoke any cigarettes?", "1, Yes | 0, No")
+    assert list(found) == ["smoking"]
+    assert found["smoking"] >= 0.5
+
+    # Groß-/Kleinschreibung, Satzzeichen und HTML ändern nichts an der Signatur
+    found = duplicates(client, "<b>How severe is your PAIN today, on a scale from 0 to 10</b>", "0, None | 5, Moderate | 10, Worst")
+    assert found == {"pain_score": 1.0}
+
+
+def test_distinct_questions_are_not_found(client, import_csv):
+    import_csv(dictionary(QUESTIONS))
+    assert duplicates(client, "Which medications are you taking at the moment?") == {}
+    assert duplicates(client, "Home address") == {}
+
+
+def test_threshold_and_batch_input(client, import_csv):
+    import_csv(dictionary(QUESTIONS))
+    assert duplicates(client, "Do you currently smoke any cigarettes?", "1, Yes | 0, No", threshold=1.01) == {}
+
+    response = client.post("/api/questions/duplicates", json={"questions": [
+        {"label": "Date of birth of participant"},
+        {"label": "Favourite colour"},
+    ]})
+    body = response.get_json()
+    assert body["checked"] == 2
+    assert [list(c["variable_name"] for c in result["candidates"]) for result in body["results"]] == [["birth_date"], []]
+
+    assert client.post("/api/questions/duplicates", json={}).status_code == 400
+    assert client.post("/api/questions/duplicates", json={"label": "x", "limit": "many"}).status_code == 400
+
+
+def test_uploaded_dictionary_reports_only_rows_with_candidates(client, import_csv):
+    import_csv(dictionary(QUESTIONS))
+    upload = dictionary([
+        ("smokes", "radio", "Do you currently smoke cigarettes?", "1, Yes | 0, No"),
+        ("colour", "text", "Favourite colour", ""),
+    ], form="other")
+    response = client.post(
+        "/api/questions/duplicates",
+        data={"file": (io.BytesIO(upload), "other.csv")},
+        content_type="multipart/form-data",
+    )
+    body = response.get_json()
+    assert body["checked"] == 2
+    assert [(result["variable_name"], [c["variable_name"] for c in result["candidates"]]) for result in body["results"]] == [
+        ("smokes", ["smoking"])
+    ]
+
+
+def test_signatures_are_refreshed_after_edits(client, auth_headers, import_csv):
+    import_csv(dictionary(QUESTIONS))
+    original = db.session.query(Question).filter_by(variable_name="birth_date").one()
+    original_id = original.id
+    db.session.remove()
+
+    response = client.put(
+        f"/api/questions/{original_id}",
+        json={"new_data": {"label": "Which medications are you taking at the moment?"}},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.get_json()
+    new_id = db.session.query(Question.id).filter_by(variable_name="birth_date", version="2.0").scalar()
+
+    # Nur die neueste Version ist Kandidat, mit dem neuen Text
+    found = find_duplicates([("Which medications are you taking at the moment?", "")])
+    assert [question_id for question_id, _ in found[0]] == [new_id]
+    assert duplicates(client, "Date of birth of the participant") == {}
+    assert db.session.get(QuestionSignature, original_id) is None
+    assert db.session.query(QuestionLSHBand).filter_by(question_id=original_id).count() == 0
+    assert db.session.query(QuestionSignature).count() == len(QUESTIONS)
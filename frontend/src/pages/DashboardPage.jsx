@@ -161,13 +161,20 @@ export default function DashboardPage() {
                   </span>
                   <div className="flex gap-2">
                     <button
-                      onClick={() => {
+                      onClick={async () => {
                         if (expandedCsvId === csv.id) {
                           setExpandedCsvId(null);
                           setExpandedCsvContent(null);
                         } else {
-                          setExpandedCsvId(csv.id);
-                          setExpandedCsvContent(csv.content);
+                          try {
+                            const res = await axios.get(
+                              `http://localhost:5000/api/imported-csvs/${csv.id}/content`
+                            );
+                            setExpandedCsvContent(res.data.rows);
+                            setExpandedCsvId(csv.id);
+                          } catch (err) {
+                            console.error("Error fetching CSV content");
+                          }
                         }
                       }}
                       className="px-3 py-1 text-sm bg-blue-600 text-white rounded hover:bg-blue-700 transition"